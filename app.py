@@ -7,6 +7,7 @@ from modules import (
     glossary_explainer,
     scenario_simulator,
     retirement_planner,
+    metrics,
 )
 import logging
 
@@ -15,6 +16,7 @@ logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(level
 logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
+metrics.instrument_flask(app, "chatbot")
 
 @app.route('/')
 def home():
@@ -22,8 +24,11 @@ def home():
 
 @app.route('/market-watchdog', methods=['POST'])
 def market_watchdog_route():
-    data = request.json
-    response = market_watchdog.check_market(data)
+    data = request.get_json(silent=True)
+    try:
+        response = market_watchdog.check_market(data)
+    except (KeyError, ValueError, TypeError) as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
     return jsonify(response)
 
 # @app.route('/investment-assistant', methods=['POST'])
@@ -43,17 +48,31 @@ def market_watchdog_route():
 #     response = budget_planner.plan_budget(data)
 #     return jsonify(response)
 
-# @app.route('/glossary', methods=['GET'])
-# def glossary_route():
-#     term = request.args.get('term', '')
-#     response = glossary_explainer.explain(term)
-#     return jsonify(response)
+@app.route('/glossary', methods=['GET'])
+def glossary_route():
+    term = request.args.get('term', '')
+    response = glossary_explainer.explain(term)
+    return jsonify(response)
 
-# @app.route('/scenario-simulator', methods=['POST'])
-# def scenario_simulator_route():
-#     data = request.json
-#     response = scenario_simulator.simulate(data)
-#     return jsonify(response)
+@app.route('/glossary/autocomplete', methods=['GET'])
+def glossary_autocomplete_route():
+    prefix = request.args.get('prefix', '')
+    limit = min(request.args.get('limit', 10, type=int), 100)
+    return jsonify(glossary_explainer.autocomplete(prefix, limit))
+
+@app.route('/glossary/batch', methods=['POST'])
+def glossary_batch_route():
+    terms = (request.json or {}).get('terms', [])
+    return jsonify(glossary_explainer.explain_many(terms))
+
+@app.route('/scenario-simulator', methods=['POST'])
+def scenario_simulator_route():
+    data = request.json
+    try:
+        response = scenario_simulator.simulate(data)
+    except (ValueError, TypeError) as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+    return jsonify(response)
 
 @app.route('/api/retirement/plan', methods=['POST'])
 def retirement_planner_route():
@@ -65,6 +84,8 @@ def retirement_planner_route():
         response = retirement_planner.calculate_retirement(data)
         
         return jsonify(response)
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
     except Exception as e:
         logger.error(f"Error in retirement planner route: {e}")
         return jsonify({"status": "error", "message": str(e)}), 500
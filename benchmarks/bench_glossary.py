@@ -0,0 +1,63 @@
+"""Glossary lookup latency on a large synthetic glossary.
+
+    python -m benchmarks.bench_glossary --terms 100000
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+
+from modules.glossary_explainer import GlossaryIndex
+
+CONSONANTS = "bcdfghjklmnprstvwz"
+VOWELS = "aeiou"
+
+def make_word(rng):
+    return "".join(rng.choice(CONSONANTS) + rng.choice(VOWELS) + (rng.choice("nrstl") if rng.random() < 0.3 else "")
+                   for _ in range(rng.randint(2, 4)))
+
+def make_term(rng):
+    return "_".join(make_word(rng) for _ in range(rng.randint(1, 3)))
+
+def typo(rng, term):
+    i = rng.randrange(len(term))
+    return term[:i] + rng.choice("abcdefghijklmnopqrstuvwxyz") + term[i + 1:]
+
+def per_call_us(fn, args):
+    start = time.perf_counter()
+    for arg in args:
+        fn(arg)
+    return (time.perf_counter() - start) / len(args) * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--terms", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=2000)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    glossary = {}
+    while len(glossary) < args.terms:
+        glossary[make_term(rng)] = "definition"
+    path = os.path.join(tempfile.mkdtemp(), "glossary.json")
+    with open(path, "w") as f:
+        json.dump(glossary, f)
+
+    index = GlossaryIndex(path)
+    start = time.perf_counter()
+    index.autocomplete("")
+    print(f"{args.terms} terms, index built in {time.perf_counter() - start:.2f}s")
+
+    terms = rng.sample(list(glossary), args.queries)
+    exact = [t.replace("_", " ").title() for t in terms]
+    typos = [typo(rng, t.replace("_", " ")) for t in terms]
+    prefixes = [t[:3] for t in terms]
+    found = sum(index.lookup(t) is not None for t in typos)
+    print(f"  exact (normalized) lookup: {per_call_us(index.lookup, exact):8.1f} us")
+    print(f"  prefix autocomplete (10):  {per_call_us(index.autocomplete, prefixes):8.1f} us")
+    print(f"  fuzzy lookup (1 typo):     {per_call_us(index.lookup, typos):8.1f} us  ({found / len(typos):.0%} matched)")
+
+if __name__ == "__main__":
+    main()
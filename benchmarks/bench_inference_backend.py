@@ -0,0 +1,120 @@
+"""Latency, memory and parity of the torch / ONNX / int8 ONNX model backends.
+
+    python -m benchmarks.bench_inference_backend --backends torch onnx onnx-int8 --threads 4
+
+Each backend runs in its own process so resident memory is comparable. The
+embedding and cross-encoder outputs are compared with the torch (fp32)
+backend: cosine drift for embeddings, absolute score difference and top-1
+agreement for the reranker.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from modules import inference_backend
+
+QUERIES = list(inference_backend.PARITY_PROBES)
+
+def rss_mb():
+    """Current and peak resident set size in MB (Linux /proc)."""
+    values = {}
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith(("VmRSS:", "VmHWM:")):
+                name, value = line.split(":")
+                values[name] = int(value.split()[0]) / 1024
+    return values.get("VmRSS", 0.0), values.get("VmHWM", 0.0)
+
+def percentiles(samples):
+    samples = np.array(samples) * 1000
+    return float(np.percentile(samples, 50)), float(np.percentile(samples, 99))
+
+def worker(backend, threads, repeat, out_path):
+    from modules import retirement_planner
+
+    # The parity check stays on (INFERENCE_PARITY_CHECK) so its cost is part of load_seconds.
+    settings = {**inference_backend.settings_from_env(), "backend": backend, "threads": threads}
+    with open(retirement_planner.RAG_SOURCE_PATH, encoding="utf-8-sig") as f:
+        passages = [p.strip() for p in f.read().split("\n\n") if p.strip()][:32]
+    base_rss, _ = rss_mb()
+    start = time.perf_counter()
+    embedder = inference_backend.load_embedding_model(retirement_planner.EMBEDDING_MODEL_NAME, settings)
+    reranker = inference_backend.load_cross_encoder(retirement_planner.CROSS_ENCODER_MODEL_NAME, settings)
+    load_seconds = time.perf_counter() - start
+
+    pairs = [(QUERIES[0], passage) for passage in passages[:8]]
+    embedder.encode(QUERIES[:1])
+    reranker.predict(pairs)
+    single, batch, rerank = [], [], []
+    for i in range(repeat):
+        t = time.perf_counter()
+        embedder.encode([QUERIES[i % len(QUERIES)]])
+        single.append(time.perf_counter() - t)
+        t = time.perf_counter()
+        reranker.predict(pairs)
+        rerank.append(time.perf_counter() - t)
+    for _ in range(max(1, repeat // 10)):
+        t = time.perf_counter()
+        embedder.encode(passages)
+        batch.append(time.perf_counter() - t)
+    rss, peak = rss_mb()
+
+    np.savez(out_path + ".npz", embeddings=embedder.encode(QUERIES + passages, convert_to_numpy=True),
+             scores=np.asarray(reranker.predict([(q, p) for q in QUERIES for p in passages[:8]]), dtype=np.float64))
+    with open(out_path, "w") as f:
+        json.dump({"load_seconds": load_seconds, "rss_mb": rss - base_rss, "peak_rss_mb": peak,
+                   "embed_1": percentiles(single), "embed_batch": percentiles(batch), "rerank_8": percentiles(rerank),
+                   "batch_size": len(passages), "loaded": sorted(set(inference_backend.loaded_backends.values()))}, f)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--backends", nargs="+", default=list(inference_backend.BACKENDS))
+    parser.add_argument("--threads", type=int, default=None, help="intra-op threads (default: library default)")
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--worker", default=None, help=argparse.SUPPRESS)
+    parser.add_argument("--out", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        worker(args.worker, args.threads, args.repeat, args.out)
+        return
+
+    workdir = tempfile.mkdtemp()
+    backends = ["torch"] + [b for b in args.backends if b != "torch"]
+    results = {}
+    for backend in backends:
+        out = os.path.join(workdir, f"{backend}.json")
+        command = [sys.executable, "-m", "benchmarks.bench_inference_backend", "--worker", backend,
+                   "--repeat", str(args.repeat), "--out", out]
+        if args.threads:
+            command += ["--threads", str(args.threads)]
+        subprocess.run(command, check=True)
+        with open(out) as f:
+            results[backend] = json.load(f)
+        with np.load(out + ".npz") as data:
+            results[backend].update(embeddings=data["embeddings"], scores=data["scores"])
+
+    reference = results["torch"]
+    n_queries = len(QUERIES)
+    print(f"threads={args.threads or 'default'}, {args.repeat} timed calls; latencies are p50/p99 ms")
+    print(f"  {'backend':10s} {'load s':>7} {'RSS MB':>7} {'embed 1':>15} {'embed ' + str(reference['batch_size']):>15} "
+          f"{'rerank 8':>15} {'max cos drift':>14} {'max score diff':>15} {'top-1 agree':>12}")
+    for backend in backends:
+        r = results[backend]
+        drift = inference_backend.cosine_drift(reference["embeddings"], r["embeddings"])
+        score_diff = np.abs(reference["scores"] - r["scores"]).max()
+        agree = np.mean(reference["scores"].reshape(n_queries, -1).argmax(1) == r["scores"].reshape(n_queries, -1).argmax(1))
+        if r["loaded"] != [backend]:
+            print(f"  {backend}: fell back, models ran on {', '.join(r['loaded'])}")
+        print(f"  {backend:10s} {r['load_seconds']:7.1f} {r['rss_mb']:7.0f} "
+              f"{r['embed_1'][0]:7.2f}/{r['embed_1'][1]:<7.2f} {r['embed_batch'][0]:7.1f}/{r['embed_batch'][1]:<7.1f} "
+              f"{r['rerank_8'][0]:7.2f}/{r['rerank_8'][1]:<7.2f} {drift.max():14.5f} {score_diff:15.4f} {agree:12.0%}")
+
+if __name__ == "__main__":
+    main()
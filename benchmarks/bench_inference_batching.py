@@ -0,0 +1,69 @@
+"""Concurrent retrieval throughput with and without micro-batched inference.
+
+    python -m benchmarks.bench_inference_batching --threads 16 --requests 400
+
+Each thread issues distinct queries through retrieve_with_rerank (score and
+query-embedding caches off, adaptive reranking off) so every request pays
+for one embedding and k cross-encoder pairs. With batching on, concurrent
+requests share forward passes; the added latency is bounded by
+INFERENCE_MAX_WAIT_MS.
+"""
+import argparse
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from benchmarks.eval_retrieval import LABELED_QUERIES
+from modules import retirement_planner
+from modules.batching import LRUCache, MicroBatcher
+from modules.rerank import Reranker
+
+def run(queries, threads, k, top_n):
+    def one(query):
+        start = time.perf_counter()
+        retirement_planner.retrieve_with_rerank(query, k=k, top_n=top_n)
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        latencies = np.array(list(pool.map(one, queries))) * 1000
+    return len(queries) / (time.perf_counter() - start), latencies
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--k", type=int, default=retirement_planner.RAG_RERANK_K)
+    parser.add_argument("--top-n", type=int, default=3)
+    parser.add_argument("--max-batch-size", type=int, default=retirement_planner.INFERENCE_MAX_BATCH_SIZE)
+    parser.add_argument("--max-wait-ms", type=float, default=retirement_planner.INFERENCE_MAX_WAIT_MS)
+    args = parser.parse_args()
+
+    print(retirement_planner.process_retirement_text(index_dir=tempfile.mkdtemp())["message"])
+    retirement_planner.get_cross_encoder()
+    retirement_planner.reranker = Reranker(cache_size=0, adaptive=False)
+    retirement_planner.query_embeddings = LRUCache(0)
+    queries = [f"{LABELED_QUERIES[i % len(LABELED_QUERIES)][0]} (#{i})" for i in range(args.requests)]
+
+    print(f"{args.requests} requests on {args.threads} threads, k={args.k}; "
+          f"batches of up to {args.max_batch_size}, {args.max_wait_ms:g} ms wait")
+    print(f"  {'mode':10s} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'embed batch':>12} {'rerank batch':>13}")
+    for batching in (False, True):
+        retirement_planner.INFERENCE_BATCHING = batching
+        retirement_planner.embedding_batcher = MicroBatcher(
+            retirement_planner.encode_texts, args.max_batch_size, args.max_wait_ms, name="embedding")
+        retirement_planner.rerank_batcher = MicroBatcher(
+            retirement_planner.predict_pairs, args.max_batch_size, args.max_wait_ms, name="rerank")
+        run(queries[:args.threads], args.threads, args.k, args.top_n)  # warm up
+        rps, latencies = run(queries, args.threads, args.k, args.top_n)
+        embed = retirement_planner.embedding_batcher.stats()["mean_batch_size"]
+        rerank = retirement_planner.rerank_batcher.stats()["mean_batch_size"]
+        print(f"  {'batched' if batching else 'unbatched':10s} {rps:8.1f} {np.percentile(latencies, 50):8.2f} "
+              f"{np.percentile(latencies, 99):8.2f} {embed:12.1f} {rerank:13.1f}")
+        retirement_planner.embedding_batcher.close()
+        retirement_planner.rerank_batcher.close()
+
+if __name__ == "__main__":
+    main()
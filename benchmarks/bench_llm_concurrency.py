@@ -0,0 +1,60 @@
+"""Compare blocking vs. async plan generation against the stub Ollama server.
+
+    python -m benchmarks.bench_llm_concurrency --requests 16 --latency 0.5
+
+The blocking path (`create_retirement_plan`) serializes generations; the async
+path (`create_retirement_plan_async`) overlaps them up to the client's
+concurrency limit.
+"""
+import argparse
+import asyncio
+import time
+
+from benchmarks.stub_ollama import StubOllamaServer
+
+SAMPLE_PROFILE = {
+    "age": 35, "currentSavings": 50000, "income": 85000, "retirementAge": 65,
+    "retirementSavingsGoal": 1500000, "gender": "female", "currentJob": "engineer",
+    "hasMortgage": "no", "mortgageAmount": 0, "hasInvestment": "yes", "investmentAmount": 20000,
+}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=16)
+    parser.add_argument("--latency", type=float, default=0.5)
+    parser.add_argument("--concurrency", type=int, default=4)
+    args = parser.parse_args()
+
+    server = StubOllamaServer(latency=args.latency).start_in_thread()
+
+    import ollama
+    from modules import llm_client, retirement_planner
+
+    retirement_planner.ollama = ollama.Client(host=server.url)
+    llm_client.default_client = llm_client.AsyncOllamaClient(server.url, max_concurrency=args.concurrency)
+    profiles = [{**SAMPLE_PROFILE, "income": SAMPLE_PROFILE["income"] + i} for i in range(args.requests)]
+
+    start = time.perf_counter()
+    for profile in profiles:
+        retirement_planner.create_retirement_plan(profile)
+    blocking = time.perf_counter() - start
+    # Same profiles again: start cold so the async run reaches the LLM too.
+    retirement_planner.plan_cache.clear()
+
+    async def run_async():
+        started = time.perf_counter()
+        await asyncio.gather(*(retirement_planner.create_retirement_plan_async(p) for p in profiles))
+        elapsed = time.perf_counter() - started
+        await llm_client.default_client.aclose()
+        return elapsed
+
+    concurrent = asyncio.run(run_async())
+    server.shutdown()
+
+    print(f"{args.requests} plans, {args.latency:.2f}s stub latency, concurrency {args.concurrency}")
+    print(f"  blocking: {blocking:.2f}s ({args.requests / blocking:.1f} plans/s)")
+    print(f"  async:    {concurrent:.2f}s ({args.requests / concurrent:.1f} plans/s)")
+    print(f"  client metrics: {llm_client.default_client.metrics()}")
+
+if __name__ == "__main__":
+    main()
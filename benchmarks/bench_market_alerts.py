@@ -0,0 +1,53 @@
+"""Per-tick latency of the vectorized alert engine.
+
+    python -m benchmarks.bench_market_alerts --symbols 500 --rules 10000 --ticks 2000
+
+Registers random threshold, crossing and percent-move rules, then replays a
+random-walk feed where a fraction of the symbols change on every tick.
+"""
+import argparse
+import time
+
+import numpy as np
+
+from modules.market_alerts import RULE_KINDS, AlertEngine
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--symbols", type=int, default=500)
+    parser.add_argument("--rules", type=int, default=10000)
+    parser.add_argument("--ticks", type=int, default=2000)
+    parser.add_argument("--changed", type=float, default=0.2, help="fraction of symbols updated per tick")
+    parser.add_argument("--users", type=int, default=1000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    symbols = [f"SYM{i}" for i in range(args.symbols)]
+    prices = 100 * np.ones(args.symbols)
+    engine = AlertEngine(default_cooldown=60)
+    for _ in range(args.rules):
+        kind = RULE_KINDS[rng.integers(len(RULE_KINDS))]
+        threshold = rng.uniform(1, 5) if kind == "pct_move" else 100 * rng.uniform(0.9, 1.1)
+        engine.add_rule(symbols[rng.integers(args.symbols)], kind, round(threshold, 1),
+                        user=f"user{rng.integers(args.users)}")
+
+    engine.update(dict(zip(symbols, prices)), now=0.0)
+    per_tick = np.empty(args.ticks)
+    notifications = 0
+    n_changed = max(1, int(args.symbols * args.changed))
+    for tick in range(args.ticks):
+        changed = rng.choice(args.symbols, n_changed, replace=False)
+        prices[changed] *= np.exp(rng.normal(0, 0.01, n_changed))
+        update = {symbols[i]: prices[i] for i in changed}
+        start = time.perf_counter()
+        notifications += len(engine.update(update, now=float(tick)))
+        per_tick[tick] = time.perf_counter() - start
+
+    p50, p99 = np.percentile(per_tick * 1000, [50, 99])
+    print(f"{args.rules} rules on {args.symbols} symbols, {n_changed} symbols changed per tick, {args.ticks} ticks")
+    print(f"  per tick: p50 {p50:.3f} ms  p99 {p99:.3f} ms  max {per_tick.max() * 1000:.3f} ms")
+    print(f"  rules evaluated/tick: {engine.stats['rules_evaluated'] / engine.stats['updates']:.0f}  "
+          f"notifications: {notifications}  throttled: {engine.stats['throttled']}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Market history queries: whole-file JSON vs. the columnar series store.
+
+    python -m benchmarks.bench_market_series --symbols 50 --points 20000
+
+The JSON path is what /api/getMarketData does today: load market_data.json
+and ship every point of every ticker. The columnar path memory-maps one
+symbol, cuts a time window with a binary search and LTTB-downsamples it to the
+chart resolution.
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from modules import market_series
+
+def synthetic_market(symbols, points, seed=0):
+    rng = np.random.default_rng(seed)
+    market = []
+    for i in range(symbols):
+        values = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, points)))
+        market.append({
+            "id": i + 1, "name": f"SYM{i}", "performance": 0.0, "up": True, "overview": "",
+            "data": [{"date": f"Day {d + 1}", "value": round(float(v), 4)} for d, v in enumerate(values)],
+        })
+    return market
+
+def timed(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--symbols", type=int, default=50)
+    parser.add_argument("--points", type=int, default=20000, help="history length per symbol")
+    parser.add_argument("--window", type=float, default=0.25, help="fraction of the history queried")
+    parser.add_argument("--chart-points", type=int, default=market_series.DEFAULT_POINTS)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    market = synthetic_market(args.symbols, args.points)
+    json_path = os.path.join(workdir, "market_data.json")
+    with open(json_path, "w") as f:
+        json.dump(market, f, indent=2)
+
+    store = market_series.SeriesStore(os.path.join(workdir, "series"))
+    start = time.perf_counter()
+    market_series.import_market_data(market, store)
+    import_seconds = time.perf_counter() - start
+
+    symbol = f"SYM{args.symbols // 2}"
+    first_day = int(args.points * (1 - args.window))
+    window = (first_day * market_series.SECONDS_PER_DAY, args.points * market_series.SECONDS_PER_DAY)
+
+    def json_full():
+        with open(json_path) as f:
+            return json.dumps(json.load(f))
+
+    def json_window():
+        with open(json_path) as f:
+            data = json.load(f)
+        ticker = next(t for t in data if t["name"] == symbol)
+        return json.dumps(ticker["data"][first_day - 1:])
+
+    def columnar_window():
+        return json.dumps(store.query(symbol, *window, points=args.chart_points))
+
+    def columnar_window_raw():
+        return json.dumps(store.query(symbol, *window))
+
+    print(f"{args.symbols} symbols x {args.points} points ({os.path.getsize(json_path) / 1e6:.1f} MB JSON), "
+          f"querying the last {args.window:.0%} of {symbol}")
+    print(f"  import into columnar store: {import_seconds:.2f}s")
+    for label, fn in (("JSON, whole file (current API)", json_full),
+                      ("JSON, one symbol window", json_window),
+                      ("columnar window, full resolution", columnar_window_raw),
+                      (f"columnar window, LTTB {args.chart_points} points", columnar_window)):
+        seconds, payload = timed(fn, args.repeat)
+        print(f"  {label:40s} {seconds * 1000:9.2f} ms  {len(payload) / 1e3:10.1f} KB")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""LLM summarization calls with and without near-duplicate clustering.
+
+    python -m benchmarks.bench_news_dedup --stories 200 --rewrites 4
+
+Builds a synthetic wire feed where every story is republished several times
+with light edits (changed words, dropped sentence, outlet dateline), streams
+it into the summary queue in batches, and counts the calls that reach the
+stub Ollama server.
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from benchmarks.stub_ollama import StubOllamaServer
+
+WORDS = ("market rates inflation bank growth shares investors quarter earnings policy bond yield "
+         "central economy jobs report oil prices trade tariffs consumer spending housing credit "
+         "lenders deal talks revenue profit outlook forecast demand supply chain federal reserve").split()
+OUTLETS = ("NEW YORK (Reuters) -", "LONDON (AP) -", "TOKYO (Bloomberg) -", "FRANKFURT (AFP) -")
+
+def make_story(rng, sentences=8, words_per_sentence=14):
+    return [" ".join(rng.choice(WORDS) for _ in range(words_per_sentence)) + "." for _ in range(sentences)]
+
+def rewrite(rng, sentences, edit_rate=0.03):
+    edited = [" ".join(rng.choice(WORDS) if rng.random() < edit_rate else w for w in s.split()) for s in sentences]
+    if len(edited) > 3:
+        del edited[rng.randrange(len(edited))]
+    return " ".join([rng.choice(OUTLETS)] + edited)
+
+def synthetic_feed(stories, rewrites, seed=0):
+    """Shuffled articles; `story` records the ground-truth story each one came from."""
+    rng = random.Random(seed)
+    feed = []
+    for story in range(stories):
+        base = make_story(rng)
+        for _ in range(1 + rewrites):
+            feed.append({"title": f"Story {story}", "originalSummary": rewrite(rng, base),
+                         "source": rng.choice(OUTLETS).split()[0], "story": story})
+    rng.shuffle(feed)
+    for i, article in enumerate(feed, 1):
+        article["id"] = i
+    return feed
+
+def run(feed, dedup, batch_size, server, news_digest):
+    from modules.news_dedup import NearDuplicateIndex
+
+    server.request_count = 0
+    articles = []
+    path = os.path.join(tempfile.mkdtemp(), "news.json")
+    queue = news_digest.SummaryQueue(articles, path, workers=4, dedup=NearDuplicateIndex() if dedup else None)
+    start = time.perf_counter()
+    for i in range(0, len(feed), batch_size):
+        articles.extend(dict(a, aiSummary="") for a in feed[i:i + batch_size])
+        queue.schedule()
+    while queue.status()["pending"]:
+        time.sleep(0.01)
+    queue.schedule()
+    elapsed = time.perf_counter() - start
+    missing = sum(news_digest.needs_summary(a) for a in articles)
+    return server.request_count, elapsed, missing, queue
+
+def cluster_quality(feed, index):
+    clusters = {}
+    for article in feed:
+        clusters.setdefault(index.cluster_of(str(article["id"])), set()).add(article["story"])
+    stories = {}
+    for cluster, members in clusters.items():
+        for story in members:
+            stories.setdefault(story, set()).add(cluster)
+    merged = sum(len(members) > 1 for members in clusters.values())
+    split = sum(len(c) > 1 for c in stories.values())
+    return len(clusters), merged, split
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--stories", type=int, default=200)
+    parser.add_argument("--rewrites", type=int, default=4, help="extra copies of each story")
+    parser.add_argument("--batch-size", type=int, default=50, help="articles arriving per schedule() call")
+    parser.add_argument("--latency", type=float, default=0.02, help="stub LLM latency per call")
+    args = parser.parse_args()
+
+    server = StubOllamaServer(latency=args.latency).start_in_thread()
+    from modules import news_digest
+    news_digest.OLLAMA_API_URL = server.url + "/api/generate"
+
+    feed = synthetic_feed(args.stories, args.rewrites)
+    print(f"{len(feed)} articles from {args.stories} stories ({args.rewrites} rewrites each), "
+          f"batches of {args.batch_size}")
+    calls, elapsed, missing, _ = run(feed, False, args.batch_size, server, news_digest)
+    print(f"  no dedup:   {calls:5d} LLM calls  {elapsed:6.2f}s  unsummarized={missing}")
+    calls_dedup, elapsed, missing, queue = run(feed, True, args.batch_size, server, news_digest)
+    print(f"  with dedup: {calls_dedup:5d} LLM calls  {elapsed:6.2f}s  unsummarized={missing}")
+    print(f"  saved {calls - calls_dedup} calls ({1 - calls_dedup / calls:.0%})")
+
+    clusters, merged, split = cluster_quality(feed, queue.dedup)
+    print(f"  clusters={clusters} (true stories {args.stories}), mixed clusters={merged}, split stories={split}")
+
+    from modules.news_dedup import NearDuplicateIndex
+    index = NearDuplicateIndex()
+    start = time.perf_counter()
+    for article in feed:
+        index.add(str(article["id"]), article["originalSummary"])
+    per_article = (time.perf_counter() - start) / len(feed)
+    print(f"  incremental add: {per_article * 1e6:.0f} us/article")
+    server.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""Per-profile Python loop vs. the vectorized projection engine.
+
+    python -m benchmarks.bench_projection --profiles 1000000
+"""
+import argparse
+import time
+
+import numpy as np
+
+from modules import projection
+
+def loop_projection(current_savings, income, years, savings_rate=0.15, annual_return=0.065):
+    """The original per-year loop from create_retirement_plan, for comparison."""
+    out = np.empty(len(years))
+    for i in range(len(years)):
+        n = int(years[i])
+        balance = current_savings[i] * (1 + annual_return) ** n
+        contribution = income[i] * savings_rate
+        for year in range(n):
+            balance += contribution * (1 + annual_return) ** (n - year - 1)
+        out[i] = balance
+    return out
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--profiles", type=int, default=1_000_000)
+    parser.add_argument("--loop-sample", type=int, default=100_000,
+                        help="profiles timed with the Python loop (extrapolated to --profiles)")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    age = rng.integers(22, 64, args.profiles)
+    columns = {
+        "age": age,
+        "retirement_age": np.minimum(age + rng.integers(1, 40, args.profiles), 75),
+        "current_savings": rng.uniform(0, 500_000, args.profiles),
+        "income": rng.uniform(20_000, 250_000, args.profiles),
+        "goal": rng.uniform(250_000, 3_000_000, args.profiles),
+    }
+
+    start = time.perf_counter()
+    scores = projection.score_profiles(columns)
+    vectorized = time.perf_counter() - start
+
+    sample = min(args.loop_sample, args.profiles)
+    years = (columns["retirement_age"] - columns["age"])[:sample]
+    start = time.perf_counter()
+    expected = loop_projection(columns["current_savings"][:sample], columns["income"][:sample], years)
+    loop = (time.perf_counter() - start) * args.profiles / sample
+
+    max_rel_err = float(np.max(np.abs(scores["projected_savings"][:sample] - expected) / expected))
+    print(f"{args.profiles:,} profiles")
+    print(f"  vectorized score_profiles: {vectorized:.3f}s ({args.profiles / vectorized:,.0f} profiles/s)")
+    print(f"  python loop (projection only, extrapolated): {loop:.1f}s")
+    print(f"  speedup: {loop / vectorized:,.0f}x, max relative error vs loop: {max_rel_err:.2e}")
+
+if __name__ == "__main__":
+    main()
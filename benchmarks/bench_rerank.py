@@ -0,0 +1,67 @@
+"""Retrieval latency with plain vs. cached / adaptive cross-encoder reranking.
+
+    python -m benchmarks.bench_rerank --queries 500 --k 5 --top-n 3
+
+Queries are drawn with a Zipf skew from the labeled fact-sheet questions in
+benchmarks.eval_retrieval, so popular questions repeat as they would in
+production. "agreement" is the share of queries whose top_n context matches
+the always-rerank baseline (as a set; skipped reranks keep retrieval order).
+"""
+import argparse
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.eval_retrieval import LABELED_QUERIES
+from modules import retirement_planner
+from modules.rerank import Reranker
+
+MODES = {
+    "baseline (always rerank)": dict(cache_size=0, adaptive=False),
+    "score cache": dict(adaptive=False),
+    "adaptive, no cache": dict(cache_size=0),
+    "adaptive + score cache": dict(),
+}
+
+def workload(n, skew, seed=0):
+    rng = np.random.default_rng(seed)
+    ranks = np.minimum(rng.zipf(skew, n), len(LABELED_QUERIES)) - 1
+    return [LABELED_QUERIES[r][0] for r in ranks]
+
+def run(queries, reranker, k, top_n):
+    retirement_planner.reranker = reranker
+    latencies, results = [], []
+    for query in queries:
+        start = time.perf_counter()
+        results.append(retirement_planner.retrieve_with_rerank(query, k=k, top_n=top_n))
+        latencies.append(time.perf_counter() - start)
+    return np.array(latencies) * 1000, results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--skew", type=float, default=1.3, help="Zipf exponent of the query mix")
+    parser.add_argument("--k", type=int, default=retirement_planner.RAG_RERANK_K)
+    parser.add_argument("--top-n", type=int, default=3)
+    args = parser.parse_args()
+
+    print(retirement_planner.process_retirement_text(index_dir=tempfile.mkdtemp())["message"])
+    retirement_planner.get_cross_encoder()
+    queries = workload(args.queries, args.skew)
+    run(queries[:10], Reranker(cache_size=0, adaptive=False), args.k, args.top_n)  # warm the models
+
+    baseline = None
+    print(f"{len(queries)} queries ({len(set(queries))} distinct), k={args.k}, top_n={args.top_n}")
+    print(f"  {'mode':28s} {'p50 ms':>8} {'p99 ms':>8} {'pairs scored':>13} {'calls avoided':>14} {'agreement':>10}")
+    for label, settings in MODES.items():
+        reranker = Reranker(**settings)
+        latencies, results = run(queries, reranker, args.k, args.top_n)
+        baseline = baseline or results
+        agreement = np.mean([set(a.split("\n\n")) == set(b.split("\n\n")) for a, b in zip(results, baseline)])
+        stats = reranker.stats()
+        print(f"  {label:28s} {np.percentile(latencies, 50):8.2f} {np.percentile(latencies, 99):8.2f} "
+              f"{stats['pairs_scored']:13d} {stats['rerank_calls_avoided']:14d} {agreement:10.1%}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Recall@k, query throughput and memory of the RAG index types against exact search.
+
+    python -m benchmarks.eval_ann --vectors 200000 --queries 1000 --k 10
+
+Vectors are synthetic clustered 384-d unit vectors by default; pass
+--embeddings with a .npy array or an embeddings.npz cache from an index
+directory to evaluate a real corpus. Recall@k is the overlap of each index's
+top-k with the exact flat_ip top-k. QPS is measured on one query at a time
+(the serving pattern), memory as serialized bytes per vector.
+"""
+import argparse
+import time
+
+import faiss
+import numpy as np
+
+from modules import ann_index
+
+CONFIGS = [
+    ("flat_ip", {}, {}),
+    ("ivf_flat", {}, {"nprobe": 8}),
+    ("ivf_flat", {}, {"nprobe": 32}),
+    ("ivf_pq", {}, {"nprobe": 16}),
+    ("ivf_pq", {}, {"nprobe": 64}),
+    ("hnsw", {}, {"ef_search": 32}),
+    ("hnsw", {}, {"ef_search": 128}),
+]
+
+def synthetic_vectors(n, dim, clusters, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dim)).astype(np.float32)
+    vectors = centers[rng.integers(0, clusters, n)] + 0.6 * rng.standard_normal((n, dim)).astype(np.float32)
+    return ann_index.normalize(vectors)
+
+def load_vectors(path):
+    if path.endswith(".npz"):
+        with np.load(path, allow_pickle=False) as data:
+            return ann_index.normalize(data["vectors"])
+    return ann_index.normalize(np.load(path))
+
+def recall(found, truth, k):
+    return np.mean([len(set(f[:k]) & set(t[:k])) / k for f, t in zip(found, truth)])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--vectors", type=int, default=200000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--clusters", type=int, default=500)
+    parser.add_argument("--embeddings", default=None, help=".npy array or embeddings.npz to evaluate instead")
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--nlist", type=int, default=None, help="IVF clusters (default: 4 * sqrt(n))")
+    args = parser.parse_args()
+
+    if args.embeddings:
+        vectors = load_vectors(args.embeddings)
+    else:
+        vectors = synthetic_vectors(args.vectors + args.queries, args.dim, args.clusters)
+    rng = np.random.default_rng(1)
+    query_rows = rng.choice(len(vectors), min(args.queries, len(vectors) // 10 or 1), replace=False)
+    queries = ann_index.normalize(vectors[query_rows] + 0.05 * rng.standard_normal(vectors[query_rows].shape))
+    corpus = np.delete(vectors, query_rows, axis=0) if not args.embeddings else vectors
+    nlist = args.nlist or int(4 * np.sqrt(len(corpus)))
+
+    exact = faiss.IndexFlatIP(corpus.shape[1])
+    exact.add(corpus)
+    _, truth = exact.search(queries, args.k)
+
+    print(f"{len(corpus)} vectors x {corpus.shape[1]} dims, {len(queries)} queries, recall@{args.k} vs exact, "
+          f"nlist={nlist}")
+    print(f"  {'index':10s} {'search setting':16s} {'build s':>8} {'recall':>8} {'QPS':>9} {'bytes/vec':>10}")
+    built = {}
+    for kind, build_settings, search_settings in CONFIGS:
+        settings = {**ann_index.DEFAULT_SETTINGS, "index_type": kind, "nlist": nlist, **build_settings}
+        key = (kind, tuple(sorted(build_settings.items())))
+        if key not in built:
+            start = time.perf_counter()
+            built[key] = (ann_index.build_index(corpus, settings), time.perf_counter() - start)
+        index, build_seconds = built[key]
+        ann_index.configure(index, {**settings, **search_settings})
+
+        start = time.perf_counter()
+        found = np.vstack([index.search(queries[i:i + 1], args.k)[1] for i in range(len(queries))])
+        qps = len(queries) / (time.perf_counter() - start)
+        setting = ", ".join(f"{name}={value}" for name, value in search_settings.items()) or "exact"
+        print(f"  {kind:10s} {setting:16s} {build_seconds:8.2f} {recall(found, truth, args.k):8.1%} "
+              f"{qps:9.0f} {ann_index.bytes_per_vector(index):10.1f}")
+
+if __name__ == "__main__":
+    main()
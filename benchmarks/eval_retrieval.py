@@ -0,0 +1,102 @@
+"""Offline recall@k of BM25-only, dense-only and hybrid (BM25 + dense, RRF) retrieval.
+
+    python -m benchmarks.eval_retrieval --ks 1 2 3 5 8
+
+Each labeled query names a phrase from the fact sheet; a query is a hit at k
+when any of the first k candidates (before reranking) contains that phrase.
+Use it to pick the smallest `k` handed to the cross-encoder (RAG_RERANK_K)
+that keeps recall at the dense-only level. The BM25 column needs no model. Pass --queries to evaluate a JSON list of
+{"query": ..., "answer": ...} objects against another --source.
+"""
+import argparse
+import json
+import tempfile
+
+from modules import retirement_planner
+
+LABELED_QUERIES = [
+    ("How much of my income should I save for retirement?", "10-15% of your annual income"),
+    ("What share of pre-retirement income does Social Security replace?", "approximately 40% of pre-retirement income"),
+    ("What is the 4% rule?", "the 4% rule"),
+    ("How much do couples spend on health care in retirement?", "$300,000 for couples"),
+    ("How much do benefits grow if I delay claiming Social Security?", "about 8% annually until age 70"),
+    ("Do 401(k) accounts grow tax-deferred?", "401(k)s, can grow tax-deferred"),
+    ("How often should I rebalance my portfolio?", "rebalancing your retirement portfolio annually"),
+    ("How many months of expenses should my emergency fund cover?", "6-12 months of living expenses"),
+    ("What is the 28% mortgage rule?", "28% or less of your monthly gross income"),
+    ("What is the inflation rate in 2025?", "inflation rate in 2025 is 3%"),
+    ("How much did American lifespan grow in the 20th century?", "grew by about 30 years"),
+    ("How many workplace savers worry about outliving their savings?", "60% of workplace savers"),
+    ("How much more can retirees spend with a target date strategy?", "22% average increase"),
+    ("What are the median retirement savings of employed workers?", "$82,000"),
+    ("How many workers have taken loans or early withdrawals from retirement accounts?", "about 37% have taken loans"),
+    ("How many workers expect to retire at 70 or later?", "36% of employed workers expect to retire"),
+    ("What are median retirement savings for self-employed people?", "$87,000"),
+    ("What fraction of self-employed people have a written retirement plan?", "22% have a formally documented"),
+    ("How much have unemployed workers saved for retirement?", "only about $700"),
+    ("What lifespan do workers plan for?", "median lifespan of 88 years"),
+    ("How many workers worry Social Security will not be available?", "About 72% of U.S. workers"),
+    ("What is the median emergency fund?", "approximately $5,000"),
+    ("How much should I have saved by age 35?", "By age 35"),
+    ("What savings benchmark applies at age 50?", "three-and-a-half to five-and-a-half times"),
+    ("How much should someone earning $60,000 have saved by 60?", "$360,000 and $660,000"),
+    ("What savings rate does T. Rowe Price recommend?", "approximately 15% of your annual income"),
+]
+
+def load_queries(path):
+    if path is None:
+        return LABELED_QUERIES
+    with open(path) as f:
+        return [(item["query"], item["answer"]) for item in json.load(f)]
+
+def sparse_candidates(query, k):
+    return retirement_planner.bm25_index.search(query, k)[0].tolist()
+
+def recall_at_k(queries, ks, hybrid, pool, retrieve=None):
+    documents = retirement_planner.document_store
+    max_k = max(ks)
+    hits = dict.fromkeys(ks, 0)
+    unanswerable = 0
+    for query, answer in queries:
+        relevant = {i for i, doc in enumerate(documents) if answer in doc}
+        if not relevant:
+            unanswerable += 1
+            continue
+        if retrieve is not None:
+            ranked = retrieve(query, max_k)
+        else:
+            ranked = retirement_planner.retrieve_candidates(query, max_k, hybrid=hybrid, pool=pool)
+        for k in ks:
+            hits[k] += bool(relevant.intersection(ranked[:k]))
+    answerable = len(queries) - unanswerable
+    return {k: hits[k] / answerable if answerable else 0.0 for k in ks}, unanswerable
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--source", default=retirement_planner.RAG_SOURCE_PATH)
+    parser.add_argument("--queries", default=None, help="JSON list of {query, answer}")
+    parser.add_argument("--ks", type=int, nargs="+", default=[1, 2, 3, 5, 8])
+    parser.add_argument("--pool", type=int, default=retirement_planner.RAG_RETRIEVAL_POOL,
+                        help="candidates read from each retriever before fusion")
+    args = parser.parse_args()
+
+    ks = sorted(set(args.ks))
+    queries = load_queries(args.queries)
+    print(retirement_planner.process_retirement_text(args.source, index_dir=tempfile.mkdtemp())["message"])
+
+    sparse, skipped = recall_at_k(queries, ks, hybrid=False, pool=args.pool, retrieve=sparse_candidates)
+    dense, _ = recall_at_k(queries, ks, hybrid=False, pool=args.pool)
+    hybrid, _ = recall_at_k(queries, ks, hybrid=True, pool=args.pool)
+    print(f"{len(queries) - skipped} labeled queries ({skipped} with no chunk containing the answer skipped), "
+          f"{len(retirement_planner.document_store)} chunks")
+    print(f"  {'k':>4} {'bm25':>8} {'dense':>8} {'hybrid':>8}")
+    for k in ks:
+        print(f"  {k:>4} {sparse[k]:>8.1%} {dense[k]:>8.1%} {hybrid[k]:>8.1%}")
+
+    target = dense[ks[-1]]
+    smallest = next((k for k in ks if hybrid[k] >= target), None)
+    if smallest is not None:
+        print(f"hybrid reaches dense recall@{ks[-1]} ({target:.1%}) at k={smallest}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""Deterministic stand-in for the Ollama HTTP API, for tests and benchmarks.
+
+Implements /api/chat and /api/generate (streaming and non-streaming) and
+/api/tags. Every request sleeps `latency` seconds before the first token and
+`token_delay` seconds between tokens, so concurrency behaviour can be measured
+without a GPU. Usage:
+
+    python -m benchmarks.stub_ollama --port 11435 --latency 0.5
+    OLLAMA_HOST=http://127.0.0.1:11435 uvicorn main:app
+"""
+import argparse
+import hashlib
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_REPLY = (
+    "## 🎯 Your Personalized Retirement Plan\n\n"
+    "This is a deterministic stub response used for testing and benchmarking. "
+    "Keep saving consistently, diversify, and review your plan every year."
+)
+
+class StubOllamaHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "StubOllama/1.0"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == "/api/tags":
+            self._send_json(200, {"models": [{"name": "mistral:7b"}, {"name": "phi4"}]})
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+        config = self.server.config
+        with self.server.lock:
+            self.server.request_count += 1
+            fail = config["fail_every"] and self.server.request_count % config["fail_every"] == 0
+
+        if self.path not in ("/api/chat", "/api/generate"):
+            self._send_json(404, {"error": "not found"})
+            return
+        if fail:
+            self._send_json(500, {"error": "stub failure"})
+            return
+
+        reply = self.server.reply_for(request)
+        time.sleep(config["latency"])
+        chat = self.path == "/api/chat"
+        if not request.get("stream", True):
+            time.sleep(config["token_delay"] * len(reply.split(" ")))
+            payload = {"model": request.get("model"), "done": True}
+            payload.update({"message": {"role": "assistant", "content": reply}} if chat else {"response": reply})
+            self._send_json(200, payload)
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        words = reply.split(" ")
+        for i, word in enumerate(words):
+            token = word if i == len(words) - 1 else word + " "
+            chunk = {"model": request.get("model"), "done": False}
+            chunk.update({"message": {"role": "assistant", "content": token}} if chat else {"response": token})
+            self._write_chunk(json.dumps(chunk) + "\n")
+            time.sleep(config["token_delay"])
+        self._write_chunk(json.dumps({"model": request.get("model"), "done": True}) + "\n")
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _write_chunk(self, text):
+        data = text.encode("utf-8")
+        self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+class StubOllamaServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address=("127.0.0.1", 0), latency=0.0, token_delay=0.0, fail_every=0, reply=None):
+        super().__init__(address, StubOllamaHandler)
+        self.config = {"latency": latency, "token_delay": token_delay, "fail_every": fail_every}
+        self.reply = reply
+        self.lock = threading.Lock()
+        self.request_count = 0
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def reply_for(self, request):
+        if self.reply is not None:
+            return self.reply
+        # Deterministic per prompt so cached and uncached runs can be compared.
+        prompt = json.dumps(request.get("messages") or request.get("prompt"), sort_keys=True)
+        digest = hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:12]
+        return f"{DEFAULT_REPLY} (ref {digest})"
+
+    def start_in_thread(self):
+        thread = threading.Thread(target=self.serve_forever, daemon=True)
+        thread.start()
+        return self
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--latency", type=float, default=0.5, help="seconds before the first token")
+    parser.add_argument("--token-delay", type=float, default=0.0, help="seconds between streamed tokens")
+    parser.add_argument("--fail-every", type=int, default=0, help="return HTTP 500 on every Nth request")
+    args = parser.parse_args()
+
+    server = StubOllamaServer((args.host, args.port), args.latency, args.token_delay, args.fail_every)
+    print(f"Stub Ollama listening on {server.url}")
+    server.serve_forever()
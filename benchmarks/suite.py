@@ -0,0 +1,279 @@
+"""End-to-end benchmark suite: RAG, projection, prompts, API endpoints; JSON results vs. a baseline.
+
+    python -m benchmarks.suite --out results.json --baseline benchmarks/baseline.json
+    python -m benchmarks.suite --save-baseline benchmarks/baseline.json
+
+Every case reports p50/p95/p99/mean latency (ms) and throughput (ops/s).
+LLM calls go to the deterministic stub Ollama server (benchmarks.stub_ollama)
+with --llm-latency seconds per generation. The suite runs in a scratch copy of
+data/ so profile writes, news summaries and the market series store never
+touch the real data files. With --baseline, a case whose p50 or p95 is more
+than --tolerance slower is reported as a regression (exit status 1 with
+--fail-on-regression).
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.stub_ollama import StubOllamaServer
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SAMPLE_PROFILE = {
+    "age": 35, "currentSavings": 50000, "income": 85000, "retirementAge": 65,
+    "retirementSavingsGoal": 1500000, "gender": "female", "currentJob": "engineer",
+    "hasMortgage": "yes", "mortgageAmount": 250000, "mortgageTerm": 30,
+    "hasInvestment": "yes", "investmentAmount": 20000,
+}
+
+# ────────────────────────────────────────────────────────────────────────────────
+# 1. Measurement
+# ────────────────────────────────────────────────────────────────────────────────
+
+def measure(fn, iterations, warmup=1) -> dict:
+    """Call fn(i) `iterations` times after `warmup` untimed calls; latency stats in ms."""
+    for i in range(warmup):
+        fn(-1 - i)
+    latencies = []
+    start = time.perf_counter()
+    for i in range(iterations):
+        t = time.perf_counter()
+        fn(i)
+        latencies.append(time.perf_counter() - t)
+    total = time.perf_counter() - start
+    ms = np.array(latencies) * 1000
+    return {
+        "iterations": iterations,
+        "p50_ms": float(np.percentile(ms, 50)),
+        "p95_ms": float(np.percentile(ms, 95)),
+        "p99_ms": float(np.percentile(ms, 99)),
+        "mean_ms": float(ms.mean()),
+        "throughput_per_s": iterations / total if total > 0 else 0.0,
+    }
+
+def expect_status(response, *statuses):
+    status = getattr(response, "status_code", None)
+    if status not in statuses:
+        raise RuntimeError(f"Unexpected HTTP {status}: {response.text if hasattr(response, 'text') else response.data[:200]}")
+    return response
+
+# ────────────────────────────────────────────────────────────────────────────────
+# 2. Cases
+# ────────────────────────────────────────────────────────────────────────────────
+
+def rag_cases(scale):
+    from benchmarks.eval_retrieval import LABELED_QUERIES
+    from modules import retirement_planner
+    from modules.batching import LRUCache
+    from modules.rerank import Reranker
+
+    index_root = tempfile.mkdtemp(prefix="rag-")
+    results = {
+        "rag.ingest_cold": measure(
+            lambda i: retirement_planner.process_retirement_text(index_dir=os.path.join(index_root, f"cold{i}")),
+            iterations=max(2, scale // 10)),
+        "rag.ingest_warm": measure(
+            lambda i: retirement_planner.process_retirement_text(index_dir=os.path.join(index_root, "warm")),
+            iterations=scale),
+    }
+    # Compute path: score and query-embedding caches off so every call embeds and reranks.
+    retirement_planner.reranker = Reranker(cache_size=0)
+    retirement_planner.query_embeddings = LRUCache(0)
+    queries = [q for q, _ in LABELED_QUERIES]
+    results["rag.retrieve_with_rerank"] = measure(
+        lambda i: retirement_planner.retrieve_with_rerank(queries[i % len(queries)]), iterations=scale * 2)
+    retirement_planner.reranker = Reranker.from_env()
+    retirement_planner.query_embeddings = LRUCache(retirement_planner.QUERY_EMBEDDING_CACHE_SIZE)
+    return results
+
+def planning_cases(scale):
+    from modules import projection, retirement_planner
+
+    profiles = [{**SAMPLE_PROFILE, "income": 40000 + 97 * i, "age": 25 + i % 30} for i in range(1000)]
+    facts = retirement_planner.flatten_facts(retirement_planner.load_retirement_facts())
+    rag_context = "\n\n".join(retirement_planner.document_store[:3]) or "No documents indexed."
+    plan_data = retirement_planner.build_plan_data(SAMPLE_PROFILE)
+    return {
+        "projection.build_plan_data": measure(
+            lambda i: retirement_planner.build_plan_data(profiles[i % len(profiles)]), iterations=scale),
+        "projection.score_profiles_1000": measure(lambda i: projection.score_profiles(profiles), iterations=scale),
+        "prompt.create_prompt": measure(
+            lambda i: retirement_planner.create_prompt(
+                retirement_planner.format_user_data(profiles[i % len(profiles)]), facts, rag_context),
+            iterations=scale * 5),
+        "prompt.build_plan_prompts": measure(
+            lambda i: retirement_planner.build_plan_prompts(plan_data), iterations=scale * 5),
+    }
+
+def plan_endpoint_cases(scale, stub_url):
+    import ollama
+    from fastapi.testclient import TestClient
+
+    import main
+    from modules import llm_client, retirement_planner
+
+    retirement_planner.ollama = ollama.Client(host=stub_url)
+    llm_client.default_client = llm_client.AsyncOllamaClient(stub_url)
+    retirement_planner.plan_cache.clear()
+    with TestClient(main.app) as client:
+        # Distinct incomes so every request misses the plan cache and reaches the LLM.
+        return {
+            "api.retirement_plan": measure(
+                lambda i: expect_status(client.post("/api/retirement/plan", json={
+                    **SAMPLE_PROFILE, "income": SAMPLE_PROFILE["income"] + 1000 * (i + 10)}), 200),
+                iterations=scale),
+            "api.retirement_plan_cached": measure(
+                lambda i: expect_status(client.post("/api/retirement/plan", json=SAMPLE_PROFILE), 200),
+                iterations=scale),
+        }
+
+def news_cases(scale, stub_url, workdir):
+    from modules import news_digest
+
+    news_digest.OLLAMA_API_URL = f"{stub_url}/api/generate"
+    news_digest.summary_queue.path = os.path.join(workdir, "news_data.json")
+    client = news_digest.app.test_client()
+    expect_status(client.get("/api/news-digest"), 200)
+    # The first GET queues missing summaries; wait for them so the ETag stays stable.
+    deadline = time.time() + 60
+    while news_digest.summary_queue.status()["pending"] and time.time() < deadline:
+        time.sleep(0.05)
+    etag = expect_status(client.get("/api/news-digest"), 200).headers["ETag"]
+    article_id = news_digest.news_data[0]["id"] if news_digest.news_data else 1
+    return {
+        "api.news_digest_full": measure(lambda i: expect_status(client.get("/api/news-digest"), 200, 304),
+                                        iterations=scale * 5),
+        "api.news_digest_page": measure(
+            lambda i: expect_status(client.get("/api/news-digest?limit=20&fields=id,title,aiSummary"), 200),
+            iterations=scale * 5),
+        "api.news_digest_304": measure(
+            lambda i: expect_status(client.get("/api/news-digest", headers={"If-None-Match": etag}), 304),
+            iterations=scale * 5),
+        "api.news_article": measure(lambda i: expect_status(client.get(f"/api/news-digest/{article_id}"), 200, 404),
+                                    iterations=scale * 5),
+    }
+
+def market_cases(scale, workdir):
+    from modules import market_series, market_watchdog
+
+    market_watchdog.series_store = market_series.SeriesStore(os.path.join(workdir, "market_series"))
+    client = market_watchdog.app.test_client()
+    response = expect_status(client.get("/api/getMarketData"), 200)
+    etag = response.headers["ETag"]
+    symbol = market_watchdog.market_data_cache.get()["data"][0]["name"]
+    gzip = {"Accept-Encoding": "gzip"}
+    return {
+        "api.market_data": measure(lambda i: expect_status(client.get("/api/getMarketData"), 200), iterations=scale * 5),
+        "api.market_data_gzip": measure(lambda i: expect_status(client.get("/api/getMarketData", headers=gzip), 200),
+                                        iterations=scale * 5),
+        "api.market_data_304": measure(
+            lambda i: expect_status(client.get("/api/getMarketData", headers={"If-None-Match": etag}), 304),
+            iterations=scale * 5),
+        "api.market_series": measure(
+            lambda i: expect_status(client.get(f"/api/market/{symbol}/series?points=200"), 200), iterations=scale * 5),
+        "api.market_indicators": measure(
+            lambda i: expect_status(client.get("/api/market/indicators"), 200), iterations=scale * 5),
+    }
+
+GROUPS = ("rag", "planning", "plan_endpoint", "news", "market")
+
+# ────────────────────────────────────────────────────────────────────────────────
+# 3. Baseline Comparison
+# ────────────────────────────────────────────────────────────────────────────────
+
+def compare(results: dict, baseline: dict, tolerance: float) -> dict:
+    """{case: {"p50_ratio", "p95_ratio", "regression"}} for cases present in both runs."""
+    comparison = {}
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if not previous:
+            continue
+        ratios = {f"{p}_ratio": current[f"{p}_ms"] / previous[f"{p}_ms"] if previous[f"{p}_ms"] > 0 else 1.0
+                  for p in ("p50", "p95")}
+        comparison[name] = {**ratios, "regression": any(r > 1 + tolerance for r in ratios.values())}
+    return comparison
+
+def print_table(results: dict, comparison: dict):
+    print(f"  {'case':32s} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'ops/s':>9} {'p50 vs base':>12}")
+    for name, r in results.items():
+        delta = comparison.get(name)
+        vs = f"{delta['p50_ratio']:.2f}x{' !' if delta['regression'] else ''}" if delta else "-"
+        print(f"  {name:32s} {r['p50_ms']:9.3f} {r['p95_ms']:9.3f} {r['p99_ms']:9.3f} {r['throughput_per_s']:9.1f} {vs:>12}")
+
+# ────────────────────────────────────────────────────────────────────────────────
+# 4. Entry Point
+# ────────────────────────────────────────────────────────────────────────────────
+
+def prepare_workdir() -> str:
+    """Scratch directory with a copy of data/; the retirement planner resolves data/ relative to the cwd."""
+    workdir = tempfile.mkdtemp(prefix="bench-suite-")
+    shutil.copytree(os.path.join(REPO_DIR, "data"), os.path.join(workdir, "data"),
+                    ignore=shutil.ignore_patterns(".*", "*.db*", "market_series"))
+    return workdir
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--groups", nargs="+", choices=GROUPS, default=list(GROUPS))
+    parser.add_argument("--scale", type=int, default=20, help="base iteration count per case")
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="stub Ollama seconds per generation")
+    parser.add_argument("--out", default=None, help="write JSON results here")
+    parser.add_argument("--baseline", default=None, help="JSON results of an earlier run to compare against")
+    parser.add_argument("--save-baseline", default=None, help="also write the results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed p50/p95 slowdown (0.2 = 20%%)")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    args = parser.parse_args()
+
+    args.out, args.baseline, args.save_baseline = (
+        os.path.abspath(p) if p else None for p in (args.out, args.baseline, args.save_baseline))
+    os.environ.setdefault("RETIREMENT_WARMUP_ON_STARTUP", "0")
+    workdir = prepare_workdir()
+    os.chdir(workdir)
+    server = StubOllamaServer(latency=args.llm_latency).start_in_thread()
+
+    results = {}
+    started = time.time()
+    try:
+        if "rag" in args.groups:
+            results.update(rag_cases(args.scale))
+        if "planning" in args.groups:
+            results.update(planning_cases(args.scale))
+        if "plan_endpoint" in args.groups:
+            results.update(plan_endpoint_cases(args.scale, server.url))
+        if "news" in args.groups:
+            results.update(news_cases(args.scale, server.url, workdir))
+        if "market" in args.groups:
+            results.update(market_cases(args.scale, workdir))
+    finally:
+        server.shutdown()
+
+    report = {
+        "meta": {
+            "timestamp": started, "python": platform.python_version(), "platform": platform.platform(),
+            "cpu_count": os.cpu_count(), "scale": args.scale, "llm_latency": args.llm_latency,
+        },
+        "results": results,
+    }
+    comparison = {}
+    if args.baseline:
+        with open(args.baseline) as f:
+            comparison = compare(results, json.load(f)["results"], args.tolerance)
+        report["comparison"] = comparison
+    print_table(results, comparison)
+
+    for path in filter(None, (args.out, args.save_baseline)):
+        with open(path, "w") as f:
+            json.dump(report, f, indent=2)
+    regressions = [name for name, c in comparison.items() if c["regression"]]
+    if regressions:
+        print(f"{len(regressions)} regression(s) beyond {args.tolerance:.0%}: {', '.join(regressions)}")
+        if args.fail_on_regression:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
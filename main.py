@@ -1,13 +1,31 @@
 # main.py
 
+import asyncio
+import os
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from modules import retirement_planner
+from fastapi.responses import JSONResponse
+from modules import llm_client, metrics, retirement_planner
+
+# Set RETIREMENT_WARMUP_ON_STARTUP=0 to skip the background warm-up (e.g. to measure cold starts).
+WARMUP_ON_STARTUP = os.getenv("RETIREMENT_WARMUP_ON_STARTUP", "1") != "0"
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Load models and the RAG index in the background so the server starts
+    # accepting connections immediately; /ready reports when it is done.
+    if WARMUP_ON_STARTUP:
+        app.state.warmup_task = asyncio.get_running_loop().run_in_executor(None, retirement_planner.warm_up)
+    yield
+    await llm_client.default_client.aclose()
 
 app = FastAPI(
     title="AI Retirement Planner",
     description="Backend API for generating personalized retirement plans using RAG and structured data",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
 )
 
 # Enable CORS for your React frontend (default: http://localhost:3000)
@@ -19,11 +37,23 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
-retirement_planner.process_retirement_text("data/retirement_facts.txt")
 # Include your planner route
 app.include_router(retirement_planner.router)
+# Per-request latency, per-stage spans (Server-Timing) and GET /metrics in Prometheus format
+metrics.instrument_fastapi(app, "retirement_api")
+
+@app.get("/health")
+def health_check():
+    return {"status": "ok"}
+
+@app.get("/ready")
+def readiness_check():
+    state = retirement_planner.readiness()
+    return JSONResponse(state, status_code=200 if state["ready"] else 503)
 
-# # Optional health check
-# @app.get("/health")
-# def health_check():
-#     return {"status": "ok"}
+@app.post("/warmup")
+def warmup():
+    try:
+        return retirement_planner.warm_up()
+    except Exception as e:
+        return JSONResponse({**retirement_planner.readiness(), "error": str(e)}, status_code=500)
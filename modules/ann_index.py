@@ -0,0 +1,146 @@
+import os
+
+import faiss
+import numpy as np
+
+# flat_l2 / flat_ip are exact; ivf_flat, ivf_pq and hnsw are approximate.
+# Every type indexes L2-normalized vectors, so all of them rank by cosine
+# similarity and the (inner-product) scores are comparable across types.
+INDEX_TYPES = ("flat_l2", "flat_ip", "ivf_flat", "ivf_pq", "hnsw")
+DEFAULT_INDEX_TYPE = "flat_ip"
+DEFAULT_SETTINGS = {
+    "nlist": 1024,          # IVF coarse clusters; capped at n // MIN_POINTS_PER_CENTROID
+    "nprobe": 16,           # IVF clusters scanned per query
+    "pq_m": 48,             # PQ sub-quantizers (must divide the dimension): 384 / 48 = 8 dims, 1 byte each
+    "pq_nbits": 8,
+    "hnsw_m": 32,           # HNSW graph degree
+    "ef_construction": 80,
+    "ef_search": 64,
+}
+# Build-time settings go into the index manifest (changing them rebuilds);
+# nprobe / ef_search only affect search and are applied after loading.
+BUILD_SETTINGS = {
+    "flat_l2": (), "flat_ip": (),
+    "ivf_flat": ("nlist",), "ivf_pq": ("nlist", "pq_m", "pq_nbits"), "hnsw": ("hnsw_m", "ef_construction"),
+}
+# k-means needs about this many training points per centroid (FAISS warns below 39).
+MIN_POINTS_PER_CENTROID = 39
+
+def settings_from_env() -> dict:
+    """RAG_INDEX_TYPE plus RAG_IVF_NLIST, RAG_IVF_NPROBE, RAG_PQ_M, RAG_PQ_NBITS, RAG_HNSW_M,
+    RAG_HNSW_EF_CONSTRUCTION and RAG_HNSW_EF_SEARCH overrides."""
+    kind = os.getenv("RAG_INDEX_TYPE", DEFAULT_INDEX_TYPE)
+    if kind not in INDEX_TYPES:
+        raise ValueError(f"RAG_INDEX_TYPE must be one of {', '.join(INDEX_TYPES)}, got {kind!r}")
+    names = {"nlist": "RAG_IVF_NLIST", "nprobe": "RAG_IVF_NPROBE", "pq_m": "RAG_PQ_M", "pq_nbits": "RAG_PQ_NBITS",
+             "hnsw_m": "RAG_HNSW_M", "ef_construction": "RAG_HNSW_EF_CONSTRUCTION", "ef_search": "RAG_HNSW_EF_SEARCH"}
+    settings = {key: int(os.getenv(env, str(DEFAULT_SETTINGS[key]))) for key, env in names.items()}
+    return {"index_type": kind, **settings}
+
+def manifest_settings(settings: dict) -> dict:
+    kind = settings["index_type"]
+    return {"index_type": kind, **{key: settings[key] for key in BUILD_SETTINGS[kind]}}
+
+def normalize(vectors) -> np.ndarray:
+    """Unit-length float32 copy, one row per vector."""
+    vectors = np.array(vectors, dtype=np.float32, ndmin=2)
+    if vectors.size:
+        faiss.normalize_L2(vectors)
+    return vectors
+
+def _training_size(settings: dict) -> int:
+    size = MIN_POINTS_PER_CENTROID * settings["nlist"]
+    if settings["index_type"] == "ivf_pq":
+        size = max(size, MIN_POINTS_PER_CENTROID * (1 << settings["pq_nbits"]))
+    return size
+
+def _create(settings: dict, dim: int, n_train: int = None):
+    kind = settings["index_type"]
+    if kind == "flat_l2":
+        return faiss.IndexFlatL2(dim)
+    if kind == "flat_ip":
+        return faiss.IndexFlatIP(dim)
+    if kind == "hnsw":
+        index = faiss.IndexHNSWFlat(dim, settings["hnsw_m"], faiss.METRIC_INNER_PRODUCT)
+        index.hnsw.efConstruction = settings["ef_construction"]
+        return index
+    nlist = settings["nlist"]
+    if n_train is not None:
+        nlist = max(1, min(nlist, n_train // MIN_POINTS_PER_CENTROID))
+    quantizer = faiss.IndexFlatIP(dim)
+    if kind == "ivf_flat":
+        return faiss.IndexIVFFlat(quantizer, dim, nlist, faiss.METRIC_INNER_PRODUCT)
+    return faiss.IndexIVFPQ(quantizer, dim, nlist, settings["pq_m"], settings["pq_nbits"], faiss.METRIC_INNER_PRODUCT)
+
+def configure(index, settings: dict):
+    """Apply search-time settings (IVF nprobe, HNSW efSearch) to a built or loaded index."""
+    if isinstance(index, faiss.IndexHNSW):
+        index.hnsw.efSearch = settings["ef_search"]
+    elif isinstance(index, faiss.IndexIVF):
+        index.nprobe = min(settings["nprobe"], index.nlist)
+    return index
+
+class IndexBuilder:
+    """Builds the configured FAISS index from embedding batches as they stream in.
+
+    Exact and HNSW indexes take vectors immediately. IVF types buffer vectors
+    until there are enough to train the coarse quantizer (and PQ codebooks),
+    train once, then add the buffer and every later batch directly. A corpus
+    too small for the requested `nlist` gets proportionally fewer clusters,
+    and one too small to train PQ codebooks falls back to an exact index.
+    """
+
+    def __init__(self, settings: dict = None):
+        self.settings = {**DEFAULT_SETTINGS, "index_type": DEFAULT_INDEX_TYPE, **(settings or {})}
+        if self.settings["index_type"] not in INDEX_TYPES:
+            raise ValueError(f"Unknown index type {self.settings['index_type']!r}")
+        self.index = None
+        self._pending = []
+        self._pending_rows = 0
+
+    @property
+    def needs_training(self) -> bool:
+        return self.settings["index_type"] in ("ivf_flat", "ivf_pq")
+
+    def add(self, embeddings):
+        vectors = normalize(embeddings)
+        if not vectors.size:
+            return
+        if self.index is not None:
+            self.index.add(vectors)
+        elif not self.needs_training:
+            self.index = _create(self.settings, vectors.shape[1])
+            self.index.add(vectors)
+        else:
+            self._pending.append(vectors)
+            self._pending_rows += len(vectors)
+            if self._pending_rows >= _training_size(self.settings):
+                self._train()
+
+    def _train(self):
+        vectors = np.concatenate(self._pending)
+        self._pending, self._pending_rows = [], 0
+        settings = self.settings
+        if settings["index_type"] == "ivf_pq" and len(vectors) < (1 << settings["pq_nbits"]):
+            print(f"Only {len(vectors)} vectors: too few to train PQ codebooks, using an exact flat_ip index")
+            settings = {**settings, "index_type": "flat_ip"}
+        self.index = _create(settings, vectors.shape[1], n_train=len(vectors))
+        if not self.index.is_trained:
+            self.index.train(vectors)
+        self.index.add(vectors)
+
+    def finish(self, dim: int = 384):
+        """The built index, configured for search (an empty exact index if nothing was added)."""
+        if self.index is None and self._pending:
+            self._train()
+        if self.index is None:
+            self.index = faiss.IndexFlatIP(dim)
+        return configure(self.index, self.settings)
+
+def build_index(embeddings, settings: dict = None, dim: int = 384):
+    builder = IndexBuilder(settings)
+    builder.add(embeddings)
+    return builder.finish(dim)
+
+def bytes_per_vector(index) -> float:
+    return len(faiss.serialize_index(index)) / index.ntotal if index.ntotal else 0.0
@@ -0,0 +1,155 @@
+import queue
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+DEFAULT_MAX_BATCH_SIZE = 32
+DEFAULT_MAX_WAIT_MS = 3.0
+
+# ────────────────────────────────────────────────────────────────────────────────
+# 1. Micro-Batcher
+# ────────────────────────────────────────────────────────────────────────────────
+
+class MicroBatcher:
+    """Coalesces concurrent model calls into shared forward passes.
+
+    Callers hand in items (query strings, (query, passage) pairs, ...) and
+    block on the results. A worker thread takes the first waiting item, keeps
+    collecting for up to `max_wait_ms` or until `max_batch_size` items, runs
+    `fn(items)` once and scatters the outputs back, so N concurrent batch-of-one
+    requests cost one batched forward pass plus a few milliseconds.
+    """
+
+    def __init__(self, fn, max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+                 max_wait_ms: float = DEFAULT_MAX_WAIT_MS, name: str = "batcher"):
+        self.fn = fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.name = name
+        self._queue = queue.SimpleQueue()  # (item, future, enqueued_at); None stops the worker
+        self._lock = threading.Lock()
+        self._worker = None
+        self._stats = {"requests": 0, "items": 0, "batches": 0, "largest_batch": 0, "errors": 0,
+                       "queue_wait_seconds": 0.0, "compute_seconds": 0.0}
+
+    def _ensure_worker(self):
+        if self._worker is None or not self._worker.is_alive():
+            with self._lock:
+                if self._worker is None or not self._worker.is_alive():
+                    self._worker = threading.Thread(target=self._run, name=f"{self.name}-batcher", daemon=True)
+                    self._worker.start()
+
+    def submit(self, items: list) -> list:
+        """Queue `items` and return one Future per item."""
+        self._ensure_worker()
+        now = time.perf_counter()
+        futures = [Future() for _ in items]
+        for item, future in zip(items, futures):
+            self._queue.put((item, future, now))
+        with self._lock:
+            self._stats["requests"] += 1
+        return futures
+
+    def map(self, items: list) -> list:
+        """Blocking: results of `fn` for `items`, computed alongside other callers' items."""
+        return [future.result() for future in self.submit(list(items))]
+
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            batch = [first]
+            deadline = time.perf_counter() + self.max_wait
+            stop = False
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.perf_counter()
+                try:
+                    entry = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if entry is None:
+                    stop = True
+                    break
+                batch.append(entry)
+            self._process(batch)
+            if stop:
+                return
+
+    def _process(self, batch):
+        start = time.perf_counter()
+        try:
+            outputs = self.fn([item for item, _, _ in batch])
+        except Exception as e:
+            for _, future, _ in batch:
+                future.set_exception(e)
+            with self._lock:
+                self._stats["errors"] += 1
+            return
+        elapsed = time.perf_counter() - start
+        for (_, future, _), output in zip(batch, outputs):
+            future.set_result(output)
+        with self._lock:
+            self._stats["items"] += len(batch)
+            self._stats["batches"] += 1
+            self._stats["largest_batch"] = max(self._stats["largest_batch"], len(batch))
+            self._stats["queue_wait_seconds"] += sum(start - enqueued for _, _, enqueued in batch)
+            self._stats["compute_seconds"] += elapsed
+
+    def close(self):
+        if self._worker is not None and self._worker.is_alive():
+            self._queue.put(None)
+            self._worker.join()
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+        stats.update(max_batch_size=self.max_batch_size, max_wait_ms=self.max_wait * 1000.0)
+        stats["mean_batch_size"] = stats["items"] / stats["batches"] if stats["batches"] else 0.0
+        stats["mean_queue_wait_ms"] = 1000.0 * stats["queue_wait_seconds"] / stats["items"] if stats["items"] else 0.0
+        return stats
+
+# ────────────────────────────────────────────────────────────────────────────────
+# 2. LRU Cache
+# ────────────────────────────────────────────────────────────────────────────────
+
+class LRUCache:
+    """Thread-safe LRU map bounded by entry count (0 disables it)."""
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            return value
+
+    def put(self, key, value):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats, entries=len(self._entries), max_entries=self.max_entries)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
@@ -0,0 +1,108 @@
+import io
+import json
+import re
+
+import numpy as np
+
+K1 = 1.5
+B = 0.75
+# Standard constant for reciprocal-rank fusion: score = sum 1 / (RRF_K + rank).
+RRF_K = 60
+
+_STOPWORDS = frozenset(
+    "a an and are as at be by can for from has have if in into is it its of on or such that the their "
+    "then there these they this to was were will with you your".split()
+)
+_PAREN_SUFFIX = re.compile(r"(\d+)\(([a-z])\)s?")  # 401(k), 401(k)s -> 401k; 403(b) -> 403b
+_THOUSANDS = re.compile(r"(?<=\d),(?=\d{3})")      # $23,000 -> $23000
+_TOKEN = re.compile(r"[a-z0-9]+(?:\.\d+)?")
+
+def tokenize(text: str) -> list:
+    """Lower-cased terms that keep finance tokens intact ("401(k)" -> "401k", "$7,000" -> "7000")."""
+    text = _THOUSANDS.sub("", _PAREN_SUFFIX.sub(r"\1\2", text.lower()))
+    return [t for t in _TOKEN.findall(text) if t not in _STOPWORDS]
+
+class BM25Index:
+    """Okapi BM25 over a fixed list of documents, stored as CSR postings.
+
+    Each posting already holds its BM25 term weight (idf x saturated tf with
+    length normalization), so a query is a single weighted bincount over the
+    postings of its terms.
+    """
+
+    def __init__(self, vocabulary: dict, offsets: np.ndarray, doc_ids: np.ndarray, weights: np.ndarray, n_docs: int):
+        self.vocabulary = vocabulary
+        self.offsets = offsets
+        self.doc_ids = doc_ids
+        self.weights = weights
+        self.n_docs = n_docs
+
+    @classmethod
+    def build(cls, documents: list, k1: float = K1, b: float = B) -> "BM25Index":
+        term_freqs = []
+        vocabulary = {}
+        for doc in documents:
+            counts = {}
+            for token in tokenize(doc):
+                counts[token] = counts.get(token, 0) + 1
+            term_freqs.append(counts)
+            for token in counts:
+                vocabulary.setdefault(token, len(vocabulary))
+
+        n_docs = len(documents)
+        lengths = np.array([sum(tf.values()) for tf in term_freqs], dtype=np.float64)
+        avg_length = lengths.mean() if n_docs and lengths.mean() > 0 else 1.0
+        postings = [[] for _ in vocabulary]
+        for doc_id, counts in enumerate(term_freqs):
+            for token, tf in counts.items():
+                postings[vocabulary[token]].append((doc_id, tf))
+
+        offsets = np.zeros(len(vocabulary) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(p) for p in postings])
+        doc_ids = np.fromiter((d for p in postings for d, _ in p), dtype=np.int32, count=offsets[-1])
+        tfs = np.fromiter((tf for p in postings for _, tf in p), dtype=np.float64, count=offsets[-1])
+        df = np.diff(offsets).astype(np.float64)
+        idf = np.log1p((n_docs - df + 0.5) / (df + 0.5))
+        norm = k1 * (1 - b + b * lengths[doc_ids] / avg_length)
+        weights = np.repeat(idf, np.diff(offsets)) * tfs * (k1 + 1) / (tfs + norm)
+        return cls(vocabulary, offsets, doc_ids, weights.astype(np.float32), n_docs)
+
+    def scores(self, query: str) -> np.ndarray:
+        ids = [self.vocabulary[t] for t in set(tokenize(query)) if t in self.vocabulary]
+        if not ids:
+            return np.zeros(self.n_docs, dtype=np.float64)
+        docs = np.concatenate([self.doc_ids[self.offsets[i]:self.offsets[i + 1]] for i in ids])
+        weights = np.concatenate([self.weights[self.offsets[i]:self.offsets[i + 1]] for i in ids])
+        return np.bincount(docs, weights=weights, minlength=self.n_docs)
+
+    def search(self, query: str, k: int) -> tuple:
+        """(doc ids, scores) of the top `k` documents with a non-zero score, best first."""
+        scores = self.scores(query)
+        k = min(k, int(np.count_nonzero(scores)))
+        if k <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return top, scores[top]
+
+    def to_bytes(self) -> bytes:
+        buffer = io.BytesIO()
+        terms = sorted(self.vocabulary, key=self.vocabulary.get)
+        np.savez(buffer, terms=np.array(json.dumps(terms)), offsets=self.offsets, doc_ids=self.doc_ids,
+                 weights=self.weights, n_docs=np.array(self.n_docs))
+        return buffer.getvalue()
+
+    @classmethod
+    def from_file(cls, path: str) -> "BM25Index":
+        with np.load(path) as data:
+            terms = json.loads(str(data["terms"]))
+            return cls({t: i for i, t in enumerate(terms)}, data["offsets"], data["doc_ids"], data["weights"],
+                       int(data["n_docs"]))
+
+def reciprocal_rank_fusion(rankings, k: int = RRF_K) -> list:
+    """Fuse several ranked lists of doc ids into one, best first (Cormack et al., 2009)."""
+    fused = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking):
+            fused[doc_id] = fused.get(doc_id, 0.0) + 1.0 / (k + rank + 1)
+    return sorted(fused, key=lambda d: (-fused[d], d))
@@ -1,9 +1,168 @@
+import bisect
 import json
+import math
+import os
+import re
+import threading
+import time
+
+import numpy as np
+
+GLOSSARY_FILE = os.path.join(os.path.dirname(__file__), '../data/glossary_data.json')
+NOT_FOUND = "Definition not found."
+# How often (seconds) to stat the glossary file for changes.
+RELOAD_CHECK_SECONDS = 1.0
+# Minimum Dice similarity over character trigrams for a fuzzy match.
+FUZZY_THRESHOLD = 0.5
+# First, cheaper pass: close matches (a typo or two) are found from very few postings.
+FUZZY_FAST_THRESHOLD = 0.75
+
+_NON_ALNUM = re.compile(r"[^0-9a-z]+")
+
+def normalize(term: str) -> str:
+    """"Interest Rate", "interest_rate" and " interest-rate " all become "interest rate"."""
+    return _NON_ALNUM.sub(" ", str(term).lower()).strip()
+
+def trigrams(term: str) -> frozenset:
+    padded = f"  {term} "
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+class GlossaryIndex:
+    """
+    Glossary loaded once into normalized lookup structures:
+    a dict for exact matches, a sorted key array for prefix autocomplete
+    (binary search) and a trigram inverted index for typo-tolerant lookups.
+    The file is re-read when its mtime changes.
+    """
+
+    def __init__(self, path=GLOSSARY_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self._mtime = None
+        self._checked_at = 0.0
+        self._build({})
+
+    def _build(self, glossary):
+        entries = {}
+        for key, definition in glossary.items():
+            entries.setdefault(normalize(key), (key, definition))
+        keys = sorted(entries)
+        postings = {}
+        gram_counts = np.empty(len(keys), dtype=np.float64)
+        for i, key in enumerate(keys):
+            key_grams = trigrams(key)
+            gram_counts[i] = len(key_grams)
+            for gram in key_grams:
+                postings.setdefault(gram, []).append(i)
+        postings = {gram: np.array(ids, dtype=np.int32) for gram, ids in postings.items()}
+        # Swapped in as one object so concurrent readers never mix two versions.
+        self._data = {"entries": entries, "keys": keys, "gram_counts": gram_counts, "postings": postings}
+
+    def _maybe_reload(self):
+        now = time.monotonic()
+        if now - self._checked_at < RELOAD_CHECK_SECONDS:
+            return
+        with self._lock:
+            if now - self._checked_at < RELOAD_CHECK_SECONDS:
+                return
+            self._checked_at = now
+            try:
+                mtime = os.stat(self.path).st_mtime_ns
+            except FileNotFoundError:
+                return
+            if mtime == self._mtime:
+                return
+            with open(self.path) as file:
+                self._build(json.load(file))
+            self._mtime = mtime
+
+    def lookup(self, term: str):
+        """Exact (normalized) match, else the closest fuzzy match. Returns (key, definition, score) or None."""
+        self._maybe_reload()
+        data = self._data
+        normalized = normalize(term)
+        entry = data["entries"].get(normalized)
+        if entry is not None:
+            return entry[0], entry[1], 1.0
+        match = self._fuzzy(data, normalized, FUZZY_THRESHOLD)
+        if match is None:
+            return None
+        original, definition = data["entries"][match[0]]
+        return original, definition, match[1]
+
+    def fuzzy(self, term: str, threshold: float = FUZZY_THRESHOLD):
+        self._maybe_reload()
+        return self._fuzzy(self._data, normalize(term), threshold)
+
+    @staticmethod
+    def _fuzzy(data, term: str, threshold: float):
+        """Best (normalized key, Dice score) over character trigrams, or None below `threshold`.
+
+        A key scoring >= t against a query of m trigrams shares at least
+        k = ceil(t m / (2 - t)) of them, so it must appear in one of the
+        m - k + 1 rarest query postings (prefix filtering). Candidates from
+        those postings are then scored exactly by binary search in the other
+        postings. A strict first pass (FUZZY_FAST_THRESHOLD) keeps the candidate
+        set tiny for ordinary typos; the full threshold is only tried if it misses.
+        """
+        query = trigrams(term)
+        m = len(query)
+        postings = sorted((data["postings"][g] for g in query if g in data["postings"]), key=len)
+        if not postings:
+            return None
+        absent = m - len(postings)
+        for t in sorted({max(threshold, FUZZY_FAST_THRESHOLD), threshold}, reverse=True):
+            needed = math.ceil(t * m / (2 - t))
+            prefix = m - needed + 1 - absent
+            if prefix <= 0:
+                continue
+            # Count matches over a few postings past the prefix too: a key then needs
+            # `extra + 1` hits there, which prunes most candidates before the
+            # (more expensive) binary searches in the remaining common postings.
+            extra = min((needed - 1) // 2, len(postings) - prefix)
+            candidates, hits = np.unique(np.concatenate(postings[:prefix + extra]), return_counts=True)
+            # Dice >= t also bounds the key's trigram count to [t m / (2 - t), m (2 - t) / t].
+            counts = data["gram_counts"][candidates]
+            keep = (hits > extra) & (counts >= t * m / (2 - t)) & (counts <= m * (2 - t) / t)
+            candidates, shared = candidates[keep], hits[keep]
+            if not len(candidates):
+                continue
+            for posting in postings[prefix + extra:]:
+                found = np.minimum(np.searchsorted(posting, candidates), len(posting) - 1)
+                shared += posting[found] == candidates
+            scores = 2 * shared / (m + data["gram_counts"][candidates])
+            best = int(scores.argmax())
+            if scores[best] >= t:
+                return data["keys"][candidates[best]], float(scores[best])
+        return None
+
+    def autocomplete(self, prefix: str, limit: int = 10) -> list:
+        """Up to `limit` glossary terms starting with `prefix`, alphabetically."""
+        self._maybe_reload()
+        data = self._data
+        prefix = normalize(prefix)
+        start = bisect.bisect_left(data["keys"], prefix)
+        matches = []
+        for key in data["keys"][start:start + limit]:
+            if not key.startswith(prefix):
+                break
+            matches.append(data["entries"][key][0])
+        return matches
+
+glossary_index = GlossaryIndex()
 
 def explain(term):
-    with open('data/glossary.json') as file:
-        glossary = json.load(file)
-    return {
-        "term": term,
-        "definition": glossary.get(term.lower(), "Definition not found.")
-    }
+    match = glossary_index.lookup(term)
+    if match is None:
+        return {"term": term, "definition": NOT_FOUND}
+    key, definition, score = match
+    result = {"term": term, "definition": definition}
+    if score < 1.0:
+        result.update(matched_term=key, similarity=round(score, 3))
+    return result
+
+def explain_many(terms):
+    return [explain(term) for term in terms]
+
+def autocomplete(prefix, limit=10):
+    return {"prefix": prefix, "suggestions": glossary_index.autocomplete(prefix, limit)}
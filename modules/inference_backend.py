@@ -0,0 +1,159 @@
+import argparse
+import os
+import platform
+import re
+
+import numpy as np
+
+# "torch" is the stock sentence-transformers path (fp32). "onnx" runs the same
+# weights on ONNX Runtime; "onnx-int8" uses the dynamically quantized ONNX
+# export published with both models. ONNX needs `sentence-transformers[onnx]`
+# (optimum + onnxruntime); without it, or if loading fails, torch is used.
+BACKENDS = ("torch", "onnx", "onnx-int8")
+DEFAULT_BACKEND = "torch"
+# A quantized embedding model is only used if every probe sentence keeps at
+# least 1 - MAX_COSINE_DRIFT cosine similarity to the fp32 embedding, so new
+# query vectors stay comparable with the persisted index. Without a saved
+# reference, onnx-int8 falls back to torch.
+DEFAULT_MAX_COSINE_DRIFT = 0.02
+# fp32 embeddings of PARITY_PROBES, one file per model, written once with
+# `python -m modules.inference_backend <model>`. The check compares against
+# them, so workers never load a second (fp32) copy of the model.
+PARITY_DIR = os.getenv("INFERENCE_PARITY_DIR", "data/inference_parity")
+
+PARITY_PROBES = [
+    "How much should I save for retirement each year?",
+    "Social Security benefits replace about 40% of pre-retirement income.",
+    "Tax-advantaged accounts such as IRAs and 401(k)s grow tax-deferred.",
+    "The 4% rule sets a sustainable withdrawal rate.",
+    "Health care costs in retirement average $300,000 for a couple.",
+    "Emergency savings should cover 6-12 months of living expenses.",
+    "What is the 28% mortgage rule?",
+    "Delaying benefits past full retirement age raises them about 8% a year until 70.",
+]
+
+def settings_from_env() -> dict:
+    backend = os.getenv("INFERENCE_BACKEND", DEFAULT_BACKEND)
+    if backend not in BACKENDS:
+        raise ValueError(f"INFERENCE_BACKEND must be one of {', '.join(BACKENDS)}, got {backend!r}")
+    threads = os.getenv("INFERENCE_THREADS")
+    return {
+        "backend": backend,
+        "threads": int(threads) if threads else None,
+        "onnx_file": os.getenv("INFERENCE_ONNX_FILE") or None,
+        "parity_check": os.getenv("INFERENCE_PARITY_CHECK", "1") != "0",
+        "max_cosine_drift": float(os.getenv("INFERENCE_MAX_COSINE_DRIFT", str(DEFAULT_MAX_COSINE_DRIFT))),
+    }
+
+def quantized_onnx_file() -> str:
+    """The int8 export matching this CPU (files shipped in the models' onnx/ folders on the Hub)."""
+    if platform.machine().lower() in ("arm64", "aarch64"):
+        return "onnx/model_qint8_arm64.onnx"
+    return "onnx/model_quint8_avx2.onnx"
+
+def _model_kwargs(settings: dict) -> dict:
+    kwargs = {"provider": "CPUExecutionProvider"}
+    if settings["backend"] == "onnx-int8":
+        kwargs["file_name"] = settings["onnx_file"] or quantized_onnx_file()
+    if settings["threads"]:
+        import onnxruntime
+
+        session_options = onnxruntime.SessionOptions()
+        session_options.intra_op_num_threads = settings["threads"]
+        session_options.inter_op_num_threads = 1
+        kwargs["session_options"] = session_options
+    return kwargs
+
+def _set_torch_threads(settings: dict):
+    if settings["threads"]:
+        import torch
+
+        torch.set_num_threads(settings["threads"])
+
+# Backend each model actually runs on (after any fallback to torch), by model name.
+loaded_backends = {}
+
+def _load_torch(cls, model_name: str, settings: dict):
+    _set_torch_threads(settings)
+    loaded_backends[model_name] = "torch"
+    return cls(model_name)
+
+def _load(cls, model_name: str, settings: dict):
+    if settings["backend"] == "torch":
+        return _load_torch(cls, model_name, settings)
+    try:
+        model = cls(model_name, backend="onnx", model_kwargs=_model_kwargs(settings))
+    except Exception as e:
+        print(f"Could not load {model_name} with the {settings['backend']} backend, using torch: {e}")
+        return _load_torch(cls, model_name, settings)
+    loaded_backends[model_name] = settings["backend"]
+    return model
+
+def cosine_drift(reference: np.ndarray, candidate: np.ndarray) -> np.ndarray:
+    """1 - cosine similarity, row by row."""
+    reference = np.asarray(reference, dtype=np.float64)
+    candidate = np.asarray(candidate, dtype=np.float64)
+    dots = (reference * candidate).sum(axis=1)
+    norms = np.linalg.norm(reference, axis=1) * np.linalg.norm(candidate, axis=1)
+    return 1.0 - dots / np.maximum(norms, 1e-12)
+
+def reference_path(model_name: str, directory: str = PARITY_DIR) -> str:
+    return os.path.join(directory, re.sub(r"[^A-Za-z0-9_.-]+", "_", model_name) + ".npz")
+
+def write_reference(model_name: str, directory: str = PARITY_DIR) -> str:
+    """Encode PARITY_PROBES with the fp32 torch model and save them for `load_reference`."""
+    from sentence_transformers import SentenceTransformer
+
+    embeddings = SentenceTransformer(model_name).encode(PARITY_PROBES, convert_to_numpy=True)
+    path = reference_path(model_name, directory)
+    os.makedirs(directory, exist_ok=True)
+    np.savez(path, probes=np.array(PARITY_PROBES), embeddings=embeddings.astype(np.float32))
+    return path
+
+def load_reference(model_name: str, directory: str = PARITY_DIR):
+    """Saved fp32 probe embeddings, or None if missing or written for other probes."""
+    path = reference_path(model_name, directory)
+    if not os.path.exists(path):
+        return None
+    with np.load(path) as data:
+        if data["probes"].tolist() != PARITY_PROBES:
+            return None
+        return data["embeddings"]
+
+def load_embedding_model(model_name: str, settings: dict = None):
+    """SentenceTransformer on the configured backend, parity-checked against saved fp32 embeddings."""
+    from sentence_transformers import SentenceTransformer
+
+    settings = settings or settings_from_env()
+    hint = f"write it with `python -m modules.inference_backend {model_name}`"
+    if settings["backend"] == "onnx-int8" and settings["parity_check"] and load_reference(model_name) is None:
+        # Quantized weights are never used unchecked: fail closed to fp32.
+        print(f"No fp32 reference at {reference_path(model_name)}, using torch instead of onnx-int8 ({hint})")
+        return _load_torch(SentenceTransformer, model_name, settings)
+    model = _load(SentenceTransformer, model_name, settings)
+    backend = loaded_backends[model_name]
+    if backend != "torch" and settings["parity_check"]:
+        reference = load_reference(model_name)
+        if reference is None:
+            print(f"No fp32 reference at {reference_path(model_name)}, skipping the {backend} parity check ({hint})")
+            return model
+        drift = cosine_drift(reference, model.encode(PARITY_PROBES, convert_to_numpy=True))
+        if drift.max() > settings["max_cosine_drift"]:
+            print(f"{backend} embeddings drift {drift.max():.4f} from fp32 "
+                  f"(limit {settings['max_cosine_drift']}), using torch")
+            return _load_torch(SentenceTransformer, model_name, settings)
+        print(f"{backend} embedding backend: max cosine drift {drift.max():.5f}")
+    return model
+
+def load_cross_encoder(model_name: str, settings: dict = None):
+    from sentence_transformers import CrossEncoder
+
+    return _load(CrossEncoder, model_name, settings or settings_from_env())
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write fp32 probe embeddings for the embedding parity check.")
+    parser.add_argument("models", nargs="+")
+    parser.add_argument("--dir", default=PARITY_DIR)
+    args = parser.parse_args()
+    for name in args.models:
+        print(f"Wrote {write_reference(name, args.dir)}")
@@ -0,0 +1,176 @@
+import asyncio
+import json
+import os
+import time
+from contextlib import asynccontextmanager
+
+import httpx
+
+OLLAMA_HOST = os.getenv("OLLAMA_HOST", "http://localhost:11434")
+DEFAULT_MODEL = "mistral:7b"
+# Ollama serves a limited number of generations in parallel (OLLAMA_NUM_PARALLEL);
+# anything above that just queues on the server, so queue here where we can see it.
+MAX_CONCURRENCY = int(os.getenv("OLLAMA_MAX_CONCURRENCY", "4"))
+REQUEST_TIMEOUT = float(os.getenv("OLLAMA_TIMEOUT", "120"))
+
+class LLMError(Exception):
+    """Raised when the Ollama server fails, times out or returns an unusable response."""
+
+class AsyncOllamaClient:
+    """Non-blocking Ollama client with a pooled connection and bounded concurrency.
+
+    At most `max_concurrency` requests hit the server at once; the rest wait on
+    a semaphore, and the queue depth is reported by `metrics()`. `timeout` is a
+    per-request deadline covering both the queue wait and the generation.
+    The connection pool and semaphore belong to one event loop, so each loop
+    that uses the client gets its own pair; pairs of closed loops are closed
+    and dropped when a new loop shows up.
+    """
+
+    def __init__(self, base_url: str = OLLAMA_HOST, max_concurrency: int = MAX_CONCURRENCY,
+                 timeout: float = REQUEST_TIMEOUT):
+        self.base_url = base_url.rstrip("/")
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self._loops = {}  # event loop -> (httpx.AsyncClient, asyncio.Semaphore)
+        self._stats = {
+            "in_flight": 0,
+            "queued": 0,
+            "max_queued": 0,
+            "completed": 0,
+            "failed": 0,
+            "timeouts": 0,
+            "queue_wait_seconds": 0.0,
+            "generation_seconds": 0.0,
+        }
+
+    def _new_client(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(
+            base_url=self.base_url,
+            limits=httpx.Limits(max_connections=self.max_concurrency,
+                                max_keepalive_connections=self.max_concurrency),
+            timeout=httpx.Timeout(self.timeout, connect=5.0),
+        )
+
+    @staticmethod
+    async def _close_client(client: httpx.AsyncClient):
+        try:
+            await client.aclose()
+        except RuntimeError:
+            pass  # its event loop is already closed; nothing left to await on
+
+    async def _resources(self) -> tuple:
+        """(client, semaphore) for the running event loop."""
+        loop = asyncio.get_running_loop()
+        resources = self._loops.get(loop)
+        if resources is None:
+            for stale in [l for l in self._loops if l.is_closed()]:
+                await self._close_client(self._loops.pop(stale)[0])
+            resources = self._loops[loop] = (self._new_client(), asyncio.Semaphore(self.max_concurrency))
+        return resources
+
+    @asynccontextmanager
+    async def _slot(self, semaphore: asyncio.Semaphore):
+        stats = self._stats
+        stats["queued"] += 1
+        stats["max_queued"] = max(stats["max_queued"], stats["queued"])
+        queued_at = time.perf_counter()
+        try:
+            await semaphore.acquire()
+        finally:
+            stats["queued"] -= 1
+        started_at = time.perf_counter()
+        stats["queue_wait_seconds"] += started_at - queued_at
+        stats["in_flight"] += 1
+        try:
+            yield
+        finally:
+            stats["in_flight"] -= 1
+            stats["generation_seconds"] += time.perf_counter() - started_at
+            semaphore.release()
+
+    async def chat(self, messages: list, model: str = DEFAULT_MODEL, options: dict = None,
+                   timeout: float = None) -> str:
+        """Send a non-streaming /api/chat request and return the message content."""
+        payload = {"model": model, "messages": messages, "stream": False}
+        if options:
+            payload["options"] = options
+
+        async def request():
+            client, semaphore = await self._resources()
+            async with self._slot(semaphore):
+                response = await client.post("/api/chat", json=payload)
+                response.raise_for_status()
+                return response.json()["message"]["content"]
+
+        try:
+            content = await asyncio.wait_for(request(), timeout or self.timeout)
+        except asyncio.TimeoutError as e:
+            self._stats["timeouts"] += 1
+            self._stats["failed"] += 1
+            raise LLMError(f"Ollama request timed out after {timeout or self.timeout}s") from e
+        except (httpx.HTTPError, KeyError, ValueError) as e:
+            self._stats["failed"] += 1
+            raise LLMError(f"Ollama request failed: {e}") from e
+        self._stats["completed"] += 1
+        return content
+
+    async def stream_chat(self, messages: list, model: str = DEFAULT_MODEL, options: dict = None,
+                          timeout: float = None):
+        """Yield content fragments from a streaming /api/chat request as they arrive."""
+        payload = {"model": model, "messages": messages, "stream": True}
+        if options:
+            payload["options"] = options
+        deadline = time.monotonic() + (timeout or self.timeout)
+
+        try:
+            client, semaphore = await self._resources()
+            async with self._slot(semaphore):
+                async with client.stream("POST", "/api/chat", json=payload) as response:
+                    response.raise_for_status()
+                    lines = response.aiter_lines()
+                    while True:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            raise asyncio.TimeoutError
+                        try:
+                            line = await asyncio.wait_for(lines.__anext__(), remaining)
+                        except StopAsyncIteration:
+                            break
+                        if not line:
+                            continue
+                        chunk = json.loads(line)
+                        if chunk.get("error"):
+                            raise LLMError(f"Ollama stream error: {chunk['error']}")
+                        token = chunk.get("message", {}).get("content", "")
+                        if token:
+                            yield token
+                        if chunk.get("done"):
+                            break
+        except asyncio.TimeoutError as e:
+            self._stats["timeouts"] += 1
+            self._stats["failed"] += 1
+            raise LLMError(f"Ollama stream timed out after {timeout or self.timeout}s") from e
+        except (httpx.HTTPError, ValueError) as e:
+            self._stats["failed"] += 1
+            raise LLMError(f"Ollama stream failed: {e}") from e
+        except LLMError:
+            self._stats["failed"] += 1
+            raise
+        self._stats["completed"] += 1
+
+    def metrics(self) -> dict:
+        stats = dict(self._stats)
+        finished = stats["completed"] + stats["failed"]
+        stats["max_concurrency"] = self.max_concurrency
+        stats["avg_queue_wait_seconds"] = stats["queue_wait_seconds"] / finished if finished else 0.0
+        stats["avg_generation_seconds"] = stats["generation_seconds"] / finished if finished else 0.0
+        return stats
+
+    async def aclose(self):
+        """Close the running loop's client and any left over from closed loops."""
+        loop = asyncio.get_running_loop()
+        for owner in [l for l in self._loops if l is loop or l.is_closed()]:
+            await self._close_client(self._loops.pop(owner)[0])
+
+default_client = AsyncOllamaClient()
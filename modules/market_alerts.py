@@ -0,0 +1,196 @@
+import itertools
+import math
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+# Rule kinds. Threshold rules fire when the condition becomes true; crossings
+# fire on the update that crosses the level; pct_move fires when one update
+# moves the price by at least `threshold` percent.
+RULE_KINDS = ("above", "below", "cross_above", "cross_below", "pct_move")
+DEFAULT_COOLDOWN_SECONDS = 300.0
+MAX_RECENT_ALERTS = 1000
+
+_KIND_CODES = {kind: code for code, kind in enumerate(RULE_KINDS)}
+
+class AlertEngine:
+    """Evaluates many alert rules against the latest ticker values.
+
+    Rules live in parallel NumPy arrays, so each update is a handful of array
+    operations however many rules exist, and only rules on symbols whose value
+    actually changed are looked at. Notifications are de-duplicated (one per
+    user/symbol/kind/threshold per update, and level rules only fire on the
+    transition into the alert state) and throttled by a per-rule cooldown.
+    """
+
+    def __init__(self, default_cooldown: float = DEFAULT_COOLDOWN_SECONDS):
+        self.default_cooldown = default_cooldown
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._rules = {}          # rule id -> rule dict
+        self._symbols = {}        # symbol -> index
+        self._dedup_keys = {}     # (user, symbol, kind, threshold) -> int
+        self._last = np.full(0, np.nan)
+        self._previous = np.full(0, np.nan)
+        self._dirty = True
+        self._rule_ids = []
+        self._rule_fired_at = np.empty(0)
+        self._rule_active = np.empty(0, dtype=bool)
+        self.recent = deque(maxlen=MAX_RECENT_ALERTS)
+        self.stats = {"updates": 0, "rules_evaluated": 0, "notifications": 0, "throttled": 0}
+
+    # ── rules ────────────────────────────────────────────────────────────────
+
+    def _symbol_index(self, symbol):
+        index = self._symbols.get(symbol)
+        if index is None:
+            index = self._symbols[symbol] = len(self._symbols)
+            self._last = np.append(self._last, np.nan)
+            self._previous = np.append(self._previous, np.nan)
+        return index
+
+    def _normalize_rule(self, symbol, kind, threshold, user=None, cooldown=None, rule_id=None) -> dict:
+        """Validated rule fields (ValueError on bad input), so a bad rule never reaches `_compile`."""
+        if kind not in _KIND_CODES:
+            raise ValueError(f"Unknown rule type {kind!r}; expected one of {', '.join(RULE_KINDS)}")
+        if not isinstance(symbol, str) or not symbol:
+            raise ValueError(f"Rule symbol must be a non-empty string, got {symbol!r}")
+        if user is not None and not isinstance(user, (str, int, float)):
+            raise ValueError(f"Rule user must be a string, got {user!r}")
+        try:
+            threshold = float(threshold)
+            cooldown = self.default_cooldown if cooldown is None else float(cooldown)
+        except (TypeError, ValueError):
+            raise ValueError(f"Rule threshold and cooldown must be numbers, got {threshold!r} / {cooldown!r}")
+        if not math.isfinite(threshold) or not cooldown >= 0:
+            raise ValueError("Rule threshold must be finite and cooldown non-negative")
+        return {
+            "id": str(rule_id) if rule_id is not None else None, "symbol": symbol, "type": kind,
+            "threshold": threshold, "user": None if user is None else str(user), "cooldown": cooldown,
+        }
+
+    def add_rules(self, rules: list) -> list:
+        """Validate every rule ({symbol, type, threshold, user?, cooldown?, id?}) first, then add them all."""
+        if not isinstance(rules, list):
+            raise ValueError("rules must be a list")
+        normalized = []
+        for rule in rules:
+            if not isinstance(rule, dict) or not {"symbol", "type", "threshold"} <= rule.keys():
+                raise ValueError(f"Each rule needs symbol, type and threshold, got {rule!r}")
+            normalized.append(self._normalize_rule(rule["symbol"], rule["type"], rule["threshold"],
+                                                   rule.get("user"), rule.get("cooldown"), rule.get("id")))
+        with self._lock:
+            for rule in normalized:
+                if rule["id"] is None:
+                    rule["id"] = f"rule-{next(self._ids)}"
+                self._symbol_index(rule["symbol"])
+                self._rules[rule["id"]] = rule
+            self._dirty |= bool(normalized)
+        return [rule["id"] for rule in normalized]
+
+    def add_rule(self, symbol, kind, threshold, user=None, cooldown=None, rule_id=None) -> str:
+        return self.add_rules([{"symbol": symbol, "type": kind, "threshold": threshold, "user": user,
+                                "cooldown": cooldown, "id": rule_id}])[0]
+
+    def remove_rule(self, rule_id) -> bool:
+        with self._lock:
+            removed = self._rules.pop(str(rule_id), None) is not None
+            self._dirty |= removed
+            return removed
+
+    def rules(self) -> list:
+        with self._lock:
+            return list(self._rules.values())
+
+    def _compile(self):
+        """Rebuild the rule arrays after rules were added or removed, keeping per-rule state.
+
+        Everything is built into locals first, so a failure leaves the previous arrays in place.
+        """
+        state = dict(zip(self._rule_ids, zip(self._rule_fired_at.tolist(), self._rule_active.tolist())))
+        rules = list(self._rules.values())
+        rule_ids = [r["id"] for r in rules]
+        dedup_keys = dict(self._dedup_keys)
+        rule_symbol = np.array([self._symbols[r["symbol"]] for r in rules], dtype=np.int64)
+        rule_kind = np.array([_KIND_CODES[r["type"]] for r in rules], dtype=np.int64)
+        rule_threshold = np.array([r["threshold"] for r in rules], dtype=np.float64)
+        rule_cooldown = np.array([r["cooldown"] for r in rules], dtype=np.float64)
+        rule_dedup = np.array([
+            dedup_keys.setdefault((r["user"], r["symbol"], r["type"], r["threshold"]), len(dedup_keys))
+            for r in rules
+        ], dtype=np.int64)
+        rule_fired_at = np.array([state.get(i, (-np.inf, False))[0] for i in rule_ids], dtype=np.float64)
+        rule_active = np.array([state.get(i, (-np.inf, False))[1] for i in rule_ids], dtype=bool)
+
+        self._rule_ids, self._dedup_keys = rule_ids, dedup_keys
+        self._rule_symbol, self._rule_kind = rule_symbol, rule_kind
+        self._rule_threshold, self._rule_cooldown, self._rule_dedup = rule_threshold, rule_cooldown, rule_dedup
+        self._rule_fired_at, self._rule_active = rule_fired_at, rule_active
+        self._dirty = False
+
+    # ── evaluation ───────────────────────────────────────────────────────────
+
+    def update(self, ticks: dict, now: float = None) -> list:
+        """Apply {symbol: latest value} and return the notifications it triggers."""
+        now = time.time() if now is None else now
+        with self._lock:
+            if self._dirty:
+                self._compile()
+            index = np.fromiter((self._symbol_index(s) for s in ticks), dtype=np.int64, count=len(ticks))
+            values = np.fromiter((float(v) for v in ticks.values()), dtype=np.float64, count=len(ticks))
+            changed = values != self._last[index]
+            index, values = index[changed], values[changed]
+            self._previous[index] = self._last[index]
+            self._last[index] = values
+            self.stats["updates"] += 1
+
+            changed_mask = np.zeros(len(self._last), dtype=bool)
+            changed_mask[index] = True
+            rules = np.flatnonzero(changed_mask[self._rule_symbol]) if len(self._rule_symbol) else np.empty(0, np.int64)
+            if not len(rules):
+                return []
+            self.stats["rules_evaluated"] += len(rules)
+
+            symbol = self._rule_symbol[rules]
+            kind = self._rule_kind[rules]
+            threshold = self._rule_threshold[rules]
+            current, previous = self._last[symbol], self._previous[symbol]
+            with np.errstate(divide="ignore", invalid="ignore"):
+                move = np.abs(current / previous - 1) * 100
+            condition = np.select(
+                [kind == 0, kind == 1, kind == 2, kind == 3, kind == 4],
+                [current > threshold,
+                 current < threshold,
+                 (previous < threshold) & (current >= threshold),
+                 (previous > threshold) & (current <= threshold),
+                 np.nan_to_num(move) >= threshold],
+                default=False,
+            )
+            # Level rules (above/below) only notify on entering the alert state;
+            # crossings and moves are events in themselves.
+            rising = condition & (~self._rule_active[rules] | (kind >= _KIND_CODES["cross_above"]))
+            self._rule_active[rules] = condition
+            ready = now - self._rule_fired_at[rules] >= self._rule_cooldown[rules]
+            self.stats["throttled"] += int(np.count_nonzero(rising & ~ready))
+            fired = rules[rising & ready]
+            if not len(fired):
+                return []
+            _, first = np.unique(self._rule_dedup[fired], return_index=True)
+            fired = fired[np.sort(first)]
+            self._rule_fired_at[fired] = now
+
+            notifications = []
+            for i in fired.tolist():
+                rule = self._rules[self._rule_ids[i]]
+                sym = self._rule_symbol[i]
+                notifications.append({
+                    "rule_id": rule["id"], "user": rule["user"], "symbol": rule["symbol"], "type": rule["type"],
+                    "threshold": rule["threshold"], "value": float(self._last[sym]),
+                    "previous": None if np.isnan(self._previous[sym]) else float(self._previous[sym]),
+                    "timestamp": now,
+                })
+            self.stats["notifications"] += len(notifications)
+            self.recent.extend(notifications)
+            return notifications
@@ -0,0 +1,185 @@
+import math
+import threading
+from collections import deque
+
+import numpy as np
+
+DEFAULT_WINDOW = 20
+DEFAULT_EMA_SPAN = 12
+
+# ────────────────────────────────────────────────────────────────────────────────
+# 1. Streaming Indicators
+# ────────────────────────────────────────────────────────────────────────────────
+
+class _RollingMoments:
+    """Mean and variance over the last `window` samples (windowed Welford update)."""
+
+    def __init__(self, window):
+        self.window = window
+        self.values = deque()
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def push(self, x):
+        self.values.append(x)
+        if len(self.values) > self.window:
+            old = self.values.popleft()
+            new_mean = self.mean + (x - old) / self.window
+            self.m2 += (x - old) * (x - new_mean + old - self.mean)
+            self.mean = new_mean
+        else:
+            delta = x - self.mean
+            self.mean += delta / len(self.values)
+            self.m2 += delta * (x - self.mean)
+        self.m2 = max(self.m2, 0.0)
+
+    def reset(self, values):
+        self.values = deque(values[-self.window:].tolist())
+        tail = np.asarray(self.values, dtype=np.float64)
+        self.mean = float(tail.mean()) if len(tail) else 0.0
+        self.m2 = float(((tail - self.mean) ** 2).sum()) if len(tail) else 0.0
+
+    def std(self):
+        n = len(self.values)
+        return math.sqrt(self.m2 / (n - 1)) if n > 1 else 0.0
+
+class RollingIndicators:
+    """SMA, EMA, rolling std, return volatility, rolling min/max and drawdown for one series.
+
+    `append` updates everything in O(1) (amortized for min/max, via monotonic
+    deques); `backfill` loads a whole history with array operations and leaves
+    the same state as appending it value by value.
+    """
+
+    def __init__(self, window: int = DEFAULT_WINDOW, ema_span: int = DEFAULT_EMA_SPAN):
+        self.window = window
+        self.alpha = 2.0 / (ema_span + 1)
+        self.ema_span = ema_span
+        self._reset()
+
+    def _reset(self):
+        self.count = 0
+        self.last = None
+        self.ema = None
+        self.peak = -math.inf
+        self.max_drawdown = 0.0
+        self._values = _RollingMoments(self.window)
+        self._returns = _RollingMoments(self.window)
+        self._min = deque()  # (position, value), increasing values
+        self._max = deque()  # (position, value), decreasing values
+
+    def append(self, value):
+        value = float(value)
+        if self.last is not None and self.last > 0 and value > 0:
+            self._returns.push(math.log(value / self.last))
+        self._values.push(value)
+        self.ema = value if self.ema is None else self.ema + self.alpha * (value - self.ema)
+
+        position = self.count
+        while self._min and self._min[-1][1] >= value:
+            self._min.pop()
+        self._min.append((position, value))
+        while self._max and self._max[-1][1] <= value:
+            self._max.pop()
+        self._max.append((position, value))
+        for extremes in (self._min, self._max):
+            if extremes[0][0] <= position - self.window:
+                extremes.popleft()
+
+        self.peak = max(self.peak, value)
+        if self.peak > 0:
+            self.max_drawdown = min(self.max_drawdown, value / self.peak - 1)
+        self.last = value
+        self.count += 1
+
+    def backfill(self, values):
+        """Replace the state with a full history, computed with vectorized NumPy."""
+        values = np.asarray(values, dtype=np.float64)
+        self._reset()
+        if not len(values):
+            return
+        n = len(values)
+        # EMA seeded with the first value: weights (1 - alpha)^(n-1-k) underflow harmlessly to 0.
+        decay = (1 - self.alpha) ** np.arange(n - 1, -1, -1, dtype=np.float64)
+        weights = self.alpha * decay
+        weights[0] = decay[0]
+        self.ema = float(weights @ values)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            log_returns = np.log(values[1:] / values[:-1])
+        valid = (values[1:] > 0) & (values[:-1] > 0)
+        self._values.reset(values)
+        self._returns.reset(log_returns[valid])
+
+        tail_start = max(0, n - self.window)
+        for position in range(tail_start, n):
+            value = values[position]
+            while self._min and self._min[-1][1] >= value:
+                self._min.pop()
+            self._min.append((position, float(value)))
+            while self._max and self._max[-1][1] <= value:
+                self._max.pop()
+            self._max.append((position, float(value)))
+
+        peaks = np.maximum.accumulate(values)
+        self.peak = float(peaks[-1])
+        with np.errstate(divide="ignore", invalid="ignore"):
+            drawdowns = np.where(peaks > 0, values / peaks - 1, 0.0)
+        self.max_drawdown = float(min(drawdowns.min(), 0.0))
+        self.last = float(values[-1])
+        self.count = n
+
+    def snapshot(self) -> dict:
+        if not self.count:
+            return {"count": 0}
+        return {
+            "count": self.count,
+            "last": self.last,
+            "sma": self._values.mean,
+            "ema": self.ema,
+            "std": self._values.std(),
+            "volatility": self._returns.std(),
+            "min": self._min[0][1],
+            "max": self._max[0][1],
+            "peak": self.peak,
+            "drawdown": self.last / self.peak - 1 if self.peak > 0 else 0.0,
+            "max_drawdown": self.max_drawdown,
+            "window": self.window,
+            "ema_span": self.ema_span,
+        }
+
+# ────────────────────────────────────────────────────────────────────────────────
+# 2. Per-Symbol Bank
+# ────────────────────────────────────────────────────────────────────────────────
+
+class IndicatorBank:
+    """Thread-safe map of symbol -> RollingIndicators."""
+
+    def __init__(self, window: int = DEFAULT_WINDOW, ema_span: int = DEFAULT_EMA_SPAN):
+        self.window = window
+        self.ema_span = ema_span
+        self._indicators = {}
+        self._lock = threading.Lock()
+
+    def _get(self, symbol):
+        indicators = self._indicators.get(symbol)
+        if indicators is None:
+            indicators = self._indicators[symbol] = RollingIndicators(self.window, self.ema_span)
+        return indicators
+
+    def backfill(self, symbol, values):
+        with self._lock:
+            self._get(symbol).backfill(values)
+
+    def append(self, symbol, value):
+        with self._lock:
+            self._get(symbol).append(value)
+
+    def snapshot(self, symbol):
+        with self._lock:
+            indicators = self._indicators.get(symbol)
+            return indicators.snapshot() if indicators is not None else None
+
+    def snapshots(self) -> dict:
+        with self._lock:
+            return {symbol: indicators.snapshot() for symbol, indicators in self._indicators.items()}
@@ -0,0 +1,224 @@
+import contextlib
+import hashlib
+import json
+import os
+import re
+import threading
+from datetime import datetime, timezone
+
+import numpy as np
+
+from modules.utils import atomic_write_bytes, atomic_write_json
+
+DEFAULT_SERIES_DIR = os.path.join(os.path.dirname(__file__), '../data/market_series')
+# Column files carry the version named in meta.json ("timestamps.3.i8").
+TIMESTAMPS_FILE = "timestamps.{version}.i8"
+VALUES_FILE = "values.{version}.f8"
+META_FILE = "meta.json"
+SECONDS_PER_DAY = 86400
+DEFAULT_POINTS = 500
+
+_SYMBOL_RE = re.compile(r"[^A-Za-z0-9._-]+")
+_DAY_RE = re.compile(r"^\s*day\s+(\d+)\s*$", re.IGNORECASE)
+
+# ────────────────────────────────────────────────────────────────────────────────
+# 1. Timestamps
+# ────────────────────────────────────────────────────────────────────────────────
+
+def parse_timestamp(date, position: int = 0) -> int:
+    """Epoch seconds for an ISO date/datetime or a "Day N" label (N days after the epoch).
+
+    Anything else falls back to `position` days, which keeps the input order.
+    """
+    if isinstance(date, (int, float)):
+        return int(date)
+    match = _DAY_RE.match(str(date or ""))
+    if match:
+        return int(match.group(1)) * SECONDS_PER_DAY
+    try:
+        parsed = datetime.fromisoformat(str(date))
+    except ValueError:
+        return position * SECONDS_PER_DAY
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return int(parsed.timestamp())
+
+# ────────────────────────────────────────────────────────────────────────────────
+# 2. Downsampling
+# ────────────────────────────────────────────────────────────────────────────────
+
+def lttb(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """Indices of the points kept by Largest-Triangle-Three-Buckets downsampling.
+
+    Keeps the first and last points and, per bucket, the point forming the
+    largest triangle with the previously kept point and the next bucket's mean,
+    so peaks and dips survive. Each bucket is scored with array operations.
+    """
+    n = len(x)
+    if n_out < 2:
+        raise ValueError(f"LTTB needs at least 2 output points, got {n_out}")
+    if n_out >= n:
+        return np.arange(n)
+    if n_out == 2:
+        return np.array([0, n - 1], dtype=np.int64)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    # Bucket i covers [edges[i], edges[i + 1]); the last point is its own final bucket.
+    edges = np.unique(np.linspace(1, n - 1, n_out - 1).astype(np.int64))
+    bounds = np.append(edges, n)
+    sizes = np.diff(bounds)
+    mean_x = np.add.reduceat(x, edges) / sizes
+    mean_y = np.add.reduceat(y, edges) / sizes
+    kept = np.empty(len(edges) + 1, dtype=np.int64)
+    kept[0], kept[-1] = 0, n - 1
+    previous = 0
+    for i in range(len(edges) - 1):
+        start, end = bounds[i], bounds[i + 1]
+        px, py = x[previous], y[previous]
+        area = np.abs((px - mean_x[i + 1]) * (y[start:end] - py) - (px - x[start:end]) * (mean_y[i + 1] - py))
+        previous = start + int(area.argmax())
+        kept[i + 1] = previous
+    return kept
+
+# ────────────────────────────────────────────────────────────────────────────────
+# 3. Columnar Store
+# ────────────────────────────────────────────────────────────────────────────────
+
+class SeriesStore:
+    """Per-symbol columnar time series on disk.
+
+    Each symbol is a directory holding two raw little-endian columns (int64
+    epoch seconds and float64 values) plus a small metadata file naming the
+    column version and point count. Reads memory-map the columns, so a range
+    query only touches the pages it needs. Appends only write the new tail;
+    `replace` writes a new version of both columns and then swaps the
+    metadata, so a reader always sees a matching pair. Timestamps must not
+    decrease.
+    """
+
+    def __init__(self, root: str = DEFAULT_SERIES_DIR):
+        self.root = root
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+
+    def _dir(self, symbol: str) -> str:
+        # Readable prefix plus a hash, so distinct symbols never share a directory
+        # and names such as "." or ".." cannot escape the root.
+        digest = hashlib.sha1(symbol.encode("utf-8")).hexdigest()[:12]
+        return os.path.join(self.root, f"{_SYMBOL_RE.sub('_', symbol)[:40]}-{digest}")
+
+    @staticmethod
+    def _paths(directory: str, version: int) -> tuple:
+        return (os.path.join(directory, TIMESTAMPS_FILE.format(version=version)),
+                os.path.join(directory, VALUES_FILE.format(version=version)))
+
+    @staticmethod
+    def _read_meta(directory: str):
+        try:
+            with open(os.path.join(directory, META_FILE)) as f:
+                meta = json.load(f)
+        except FileNotFoundError:
+            return None
+        return meta if "version" in meta else None  # pre-versioned layout: re-imported on sync
+
+    def symbols(self) -> list:
+        names = []
+        for entry in sorted(os.listdir(self.root)):
+            meta = self._read_meta(os.path.join(self.root, entry))
+            if meta is not None and os.path.basename(self._dir(meta["symbol"])) == entry:
+                names.append(meta["symbol"])
+        return names
+
+    def columns(self, symbol: str):
+        """(timestamps, values) as read-only memory maps (empty arrays for unknown symbols)."""
+        directory = self._dir(symbol)
+        for _ in range(3):
+            meta = self._read_meta(directory)
+            if meta is None or meta["points"] == 0:
+                break
+            ts_path, values_path = self._paths(directory, meta["version"])
+            try:
+                return (np.memmap(ts_path, dtype="<i8", mode="r", shape=(meta["points"],)),
+                        np.memmap(values_path, dtype="<f8", mode="r", shape=(meta["points"],)))
+            except FileNotFoundError:
+                continue  # a concurrent `replace` retired this version; read the new metadata
+        return np.empty(0, dtype="<i8"), np.empty(0, dtype="<f8")
+
+    def append(self, symbol: str, timestamps, values):
+        """Append points to the end of a symbol's series."""
+        timestamps = np.ascontiguousarray(timestamps, dtype="<i8")
+        values = np.ascontiguousarray(values, dtype="<f8")
+        if timestamps.shape != values.shape:
+            raise ValueError("timestamps and values must have the same length")
+        if len(timestamps) and np.any(np.diff(timestamps) < 0):
+            raise ValueError("timestamps must be non-decreasing")
+        with self._lock:
+            directory = self._dir(symbol)
+            meta = self._read_meta(directory)
+            if meta is None:
+                self._write_version(symbol, directory, 0, timestamps, values)
+                return
+            existing_ts, _ = self.columns(symbol)
+            if len(existing_ts) and len(timestamps) and timestamps[0] < existing_ts[-1]:
+                raise ValueError(f"{symbol}: appended timestamps start before the last stored one")
+            # Readers stop at meta["points"], so the tail is invisible until the metadata is swapped.
+            length = meta["points"]
+            for path, column in zip(self._paths(directory, meta["version"]), (timestamps, values)):
+                with open(path, "r+b") as f:
+                    f.truncate(length * 8)  # drop any torn tail first
+                    f.seek(length * 8)
+                    f.write(column.tobytes())
+            atomic_write_json(os.path.join(directory, META_FILE),
+                              {"symbol": symbol, "version": meta["version"], "points": length + len(values)})
+
+    def replace(self, symbol: str, timestamps, values):
+        """Rewrite a symbol's whole series as a new column version."""
+        order = np.argsort(np.asarray(timestamps, dtype="<i8"), kind="stable")
+        timestamps = np.ascontiguousarray(np.asarray(timestamps, dtype="<i8")[order])
+        values = np.ascontiguousarray(np.asarray(values, dtype="<f8")[order])
+        with self._lock:
+            directory = self._dir(symbol)
+            meta = self._read_meta(directory)
+            self._write_version(symbol, directory, meta["version"] + 1 if meta else 0, timestamps, values)
+
+    def _write_version(self, symbol, directory, version, timestamps, values):
+        os.makedirs(directory, exist_ok=True)
+        for path, column in zip(self._paths(directory, version), (timestamps, values)):
+            atomic_write_bytes(path, column.tobytes())
+        atomic_write_json(os.path.join(directory, META_FILE), {"symbol": symbol, "version": version, "points": len(values)})
+        # Retire older columns; open memory maps stay valid on POSIX.
+        current = {os.path.basename(p) for p in self._paths(directory, version)}
+        for name in os.listdir(directory):
+            if name not in current and name.endswith((".i8", ".f8")) and not name.startswith(".tmp-"):
+                with contextlib.suppress(OSError):
+                    os.unlink(os.path.join(directory, name))
+
+    def query(self, symbol: str, start=None, end=None, points: int = None) -> dict:
+        """Points with start <= timestamp <= end, downsampled with LTTB to at most `points` (>= 2)."""
+        if points is not None and points < 2:
+            raise ValueError(f"points must be at least 2, got {points}")
+        timestamps, values = self.columns(symbol)
+        lo = 0 if start is None else int(np.searchsorted(timestamps, start, side="left"))
+        hi = len(timestamps) if end is None else int(np.searchsorted(timestamps, end, side="right"))
+        window_ts, window_values = timestamps[lo:hi], values[lo:hi]
+        total = len(window_ts)
+        if points is not None and total > points:
+            kept = lttb(window_ts, window_values, points)
+            window_ts, window_values = window_ts[kept], window_values[kept]
+        return {
+            "symbol": symbol,
+            "total_points": total,
+            "timestamps": np.asarray(window_ts).tolist(),
+            "values": np.asarray(window_values).tolist(),
+        }
+
+def import_market_data(market_data: list, store: SeriesStore) -> int:
+    """Load every ticker of a market_data.json-style list into the store. Returns the symbols written."""
+    written = 0
+    for ticker in market_data:
+        points = ticker.get("data") or []
+        timestamps = [parse_timestamp(p.get("date"), i) for i, p in enumerate(points)]
+        values = [float(p.get("value") or 0) for p in points]
+        store.replace(ticker.get("name", str(ticker.get("id"))), timestamps, values)
+        written += 1
+    return written
@@ -1,14 +1,92 @@
 from flask import Flask, request, jsonify
 from flask_cors import CORS
+import gzip
+import hashlib
 import json
 import os
+import threading
+from modules import market_alerts, market_indicators, market_series, metrics
+from modules.utils import atomic_write_bytes
 
 # Initialize the Flask app
 app = Flask(__name__)
-CORS(app)  # Enable CORS to allow frontend-backend communication
+CORS(app, expose_headers=["ETag", "Server-Timing"])  # Enable CORS to allow frontend-backend communication
+metrics.instrument_flask(app, "market_watchdog")  # Request/stage histograms on GET /metrics
 
 # Path to your market data file
 DATA_FILE = os.path.join(os.path.dirname(__file__), '../data/market_data.json')
+# Responses smaller than this are not worth compressing
+GZIP_MIN_BYTES = 1024
+
+class MarketDataCache:
+    """
+    Parsed and pre-serialized copy of the market data file.
+    The copy is reloaded only when the file's mtime/size/inode change (e.g. an
+    external edit) and is replaced directly by `save`, which writes atomically
+    under a lock so readers never see a half-written file.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._stat_key = None
+        self._snapshot = None
+
+    def _stat(self):
+        st = os.stat(self.path)
+        return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+    def _make_snapshot(self, data):
+        body = json.dumps(data, separators=(",", ":")).encode("utf-8")
+        return {"data": data, "body": body, "etag": hashlib.sha1(body).hexdigest()[:20], "gzip": None}
+
+    def get(self):
+        """Current snapshot dict: data, body (JSON bytes), etag and a lazily built gzip body."""
+        stat_key = self._stat()
+        snapshot = self._snapshot
+        if snapshot is not None and stat_key == self._stat_key:
+            return snapshot
+        with self._lock:
+            stat_key = self._stat()
+            if self._snapshot is None or stat_key != self._stat_key:
+                with metrics.span("market", "load"), open(self.path, 'rb') as file:
+                    self._snapshot = self._make_snapshot(json.load(file))
+                self._stat_key = stat_key
+            return self._snapshot
+
+    def gzip_body(self, snapshot):
+        if snapshot["gzip"] is None:
+            snapshot["gzip"] = gzip.compress(snapshot["body"], compresslevel=6)
+        return snapshot["gzip"]
+
+    def save(self, data):
+        """Atomically replace the file (temp file + rename) and the cached copy."""
+        with self._lock:
+            with metrics.span("market", "save"):
+                atomic_write_bytes(self.path, json.dumps(data, indent=2).encode("utf-8"))
+            self._snapshot = self._make_snapshot(data)
+            self._stat_key = self._stat()
+            return self._snapshot
+
+market_data_cache = MarketDataCache(DATA_FILE)
+series_store = market_series.SeriesStore()
+indicator_bank = market_indicators.IndicatorBank()
+series_lock = threading.Lock()
+series_synced_etag = None
+
+def sync_series_store():
+    """Re-import the tickers into the columnar store (and re-backfill indicators) whenever the JSON file changed."""
+    global series_synced_etag
+    snapshot = market_data_cache.get()
+    if snapshot["etag"] == series_synced_etag:
+        return
+    with series_lock:
+        if snapshot["etag"] != series_synced_etag:
+            with metrics.span("market", "series_sync"):
+                market_series.import_market_data(snapshot["data"], series_store)
+                for symbol in latest_values(snapshot["data"]):
+                    indicator_bank.backfill(symbol, series_store.columns(symbol)[1])
+            series_synced_etag = snapshot["etag"]
 
 # Serve a basic response for the root route
 @app.route('/')
@@ -24,19 +102,151 @@ def favicon():
 @app.route('/api/getMarketData', methods=['GET'])
 def get_market_data():
     try:
-        with open(DATA_FILE, 'r') as file:
-            data = json.load(file)
-        return jsonify(data), 200
+        snapshot = market_data_cache.get()
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+    etag = snapshot["etag"]
+    if request.if_none_match.contains_weak(etag):
+        response = app.response_class(status=304)
+    elif len(snapshot["body"]) >= GZIP_MIN_BYTES and 'gzip' in request.accept_encodings:
+        response = app.response_class(market_data_cache.gzip_body(snapshot), mimetype='application/json')
+        response.headers['Content-Encoding'] = 'gzip'
+    else:
+        response = app.response_class(snapshot["body"], mimetype='application/json')
+    response.set_etag(etag, weak=True)
+    response.headers['Cache-Control'] = 'no-cache'
+    response.vary.add('Accept-Encoding')
+    return response
+
+# Alert engine shared by check_market and the alert endpoints
+alert_engine = market_alerts.AlertEngine()
+
+def validate_market_data(market_data):
+    """Raise ValueError unless the payload is a market_data.json-style list of
+    {name, data: [{date, value}, ...]} tickers."""
+    if not isinstance(market_data, list):
+        raise ValueError("Market data must be a list of tickers")
+    for ticker in market_data:
+        if not isinstance(ticker, dict) or not isinstance(ticker.get('name'), str) or not ticker['name']:
+            raise ValueError("Each ticker needs a non-empty name")
+        points = ticker.get('data')
+        if not isinstance(points, list):
+            raise ValueError(f"Ticker {ticker['name']!r} needs a data list")
+        for point in points:
+            if not isinstance(point, dict) or 'date' not in point:
+                raise ValueError(f"Ticker {ticker['name']!r} has a data point without a date")
+            value = point.get('value')
+            if value is not None and (isinstance(value, bool) or not isinstance(value, (int, float))):
+                raise ValueError(f"Ticker {ticker['name']!r} has a non-numeric value")
+
+def latest_values(market_data):
+    """{ticker name: most recent value} for a market_data.json-style list."""
+    return {t['name']: float(t['data'][-1].get('value') or 0)
+            for t in market_data if t.get('name') and t.get('data')}
+
+@metrics.span("market", "check_market")
+def check_market(data):
+    """
+    Registers alert rules and evaluates them against ticker updates.
+    Payload keys (all optional):
+      rules:   [{symbol, type, threshold, user?, cooldown?, id?}], type is one of
+               above, below, cross_above, cross_below, pct_move
+      remove:  [rule id, ...]
+      ticks:   {symbol: value}; without ticks the latest saved market data is used
+    Returns the alerts fired by this update plus the ids of added rules.
+    """
+    data = data or {}
+    if not isinstance(data, dict):
+        raise ValueError("Payload must be a JSON object")
+    # Validated as a batch: either every rule is added or none is.
+    added = alert_engine.add_rules(data.get('rules', []))
+    removed = [rule_id for rule_id in data.get('remove', []) if alert_engine.remove_rule(rule_id)]
+    ticks = data.get('ticks')
+    if ticks is None:
+        ticks = latest_values(market_data_cache.get()["data"])
+    else:
+        sync_series_store()
+        for symbol, value in ticks.items():
+            indicator_bank.append(symbol, value)
+    alerts = alert_engine.update(ticks)
+    return {"added": added, "removed": removed, "alerts": alerts, "rules": len(alert_engine.rules())}
+
+# Endpoint to register rules / push ticks and get the resulting alerts
+@app.route('/api/alerts', methods=['POST'])
+def post_alerts():
+    try:
+        return jsonify(check_market(request.get_json(silent=True))), 200
+    except (KeyError, ValueError, TypeError) as e:
+        return jsonify({'error': str(e)}), 400
+
+# Endpoint to list rules and recently fired alerts
+@app.route('/api/alerts', methods=['GET'])
+def get_alerts():
+    limit = max(0, request.args.get('limit', 100, type=int))
+    recent = list(alert_engine.recent)
+    return jsonify({
+        'rules': alert_engine.rules(),
+        'recent': recent[len(recent) - min(limit, len(recent)):],
+        'stats': alert_engine.stats,
+    }), 200
+
+# Endpoint to fetch one ticker's history as columns, optionally windowed and downsampled
+@app.route('/api/market/<symbol>/series', methods=['GET'])
+def get_market_series(symbol):
+    """
+    Query parameters: `start`/`end` (epoch seconds, ISO dates or "Day N") and
+    `points`, the maximum number of points to return (LTTB downsampling).
+    """
+    try:
+        sync_series_store()
+        start, end = request.args.get('start'), request.args.get('end')
+        with metrics.span("market", "series_query"):
+            result = series_store.query(
+                symbol,
+                start=market_series.parse_timestamp(int(start) if start.isdigit() else start) if start else None,
+                end=market_series.parse_timestamp(int(end) if end.isdigit() else end) if end else None,
+                points=request.args.get('points', market_series.DEFAULT_POINTS, type=int),
+            )
+    except ValueError as e:  # bad start/end or points < 2
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
+    if not result["total_points"] and symbol not in series_store.symbols():
+        return jsonify({'error': f'Unknown symbol: {symbol}'}), 404
+    return jsonify(result), 200
+
+# Endpoints for streaming indicators (SMA, EMA, std, volatility, min/max, drawdown)
+@app.route('/api/market/indicators', methods=['GET'])
+def get_all_indicators():
+    try:
+        sync_series_store()
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+    return jsonify(indicator_bank.snapshots()), 200
+
+@app.route('/api/market/<symbol>/indicators', methods=['GET'])
+def get_indicators(symbol):
+    try:
+        sync_series_store()
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+    snapshot = indicator_bank.snapshot(symbol)
+    if snapshot is None:
+        return jsonify({'error': f'Unknown symbol: {symbol}'}), 404
+    return jsonify({'symbol': symbol, **snapshot}), 200
 
 # Endpoint to save updated market data
 @app.route('/api/saveMarketData', methods=['POST'])
 def save_market_data():
+    updated_data = request.get_json(silent=True)  # Get the JSON data from the request
+    try:
+        validate_market_data(updated_data)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     try:
-        updated_data = request.get_json()  # Get the JSON data from the request
-        with open(DATA_FILE, 'w') as file:
-            json.dump(updated_data, file, indent=2)  # Save to file
+        market_data_cache.save(updated_data)  # Atomic save, also refreshes the cached copy
+        alert_engine.update(latest_values(updated_data))  # Fired alerts show up in GET /api/alerts
         return jsonify({'message': 'Data saved successfully'}), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -0,0 +1,310 @@
+import contextvars
+import functools
+import inspect
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+
+# Latency buckets (seconds) shared by every histogram: sub-millisecond cache
+# hits up to minute-long LLM generations.
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Per-request sampling profiler: off unless PROFILING_ENABLED=1. A request is
+# profiled when it sends `X-Profile: 1` (or ?profile=1), or at random with
+# probability PROFILE_SAMPLE_RATE. Folded stacks are written to PROFILE_DIR.
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "0") == "1"
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "5"))
+PROFILE_DIR = os.getenv("PROFILE_DIR", "data/profiles")
+
+# ────────────────────────────────────────────────────────────────────────────────
+# 1. Histograms and Prometheus Exposition
+# ────────────────────────────────────────────────────────────────────────────────
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _labels(names, values, extra=()) -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in list(zip(names, values)) + list(extra)]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+class Histogram:
+    """Cumulative-bucket latency histogram keyed by a tuple of label values."""
+
+    def __init__(self, name: str, help_text: str, label_names: tuple, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+        self._series = {}  # label values -> [bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float, *label_values):
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [0] * (len(self.buckets) + 1) + [0.0]
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    series[i] += 1
+            series[len(self.buckets)] += 1
+            series[-1] += seconds
+
+    def summary(self) -> dict:
+        """{label values: (count, sum)} for quick inspection."""
+        with self._lock:
+            return {values: (series[len(self.buckets)], series[-1]) for values, series in self._series.items()}
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((values, list(series)) for values, series in self._series.items())
+        for values, series in items:
+            for bound, count in zip(self.buckets, series):
+                lines.append(f"{self.name}_bucket{_labels(self.label_names, values, [('le', repr(bound))])} {count}")
+            count = series[len(self.buckets)]
+            lines.append(f"{self.name}_bucket{_labels(self.label_names, values, [('le', '+Inf')])} {count}")
+            lines.append(f"{self.name}_sum{_labels(self.label_names, values)} {series[-1]!r}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, values)} {count}")
+        return lines
+
+stage_seconds = Histogram("app_stage_duration_seconds", "Time spent in one pipeline stage.", ("component", "stage"))
+request_seconds = Histogram("http_request_duration_seconds", "HTTP request latency.",
+                            ("app", "method", "route", "status"))
+_collectors = [stage_seconds, request_seconds]
+
+def render() -> str:
+    """All metrics in the Prometheus text exposition format."""
+    lines = []
+    for collector in _collectors:
+        lines.extend(collector.render())
+    return "\n".join(lines) + "\n"
+
+# ────────────────────────────────────────────────────────────────────────────────
+# 2. Timing Spans
+# ────────────────────────────────────────────────────────────────────────────────
+
+# Spans finished during the current request, as (component.stage, seconds); the
+# context var follows asyncio tasks and asyncio.to_thread calls.
+_request_spans = contextvars.ContextVar("request_spans", default=None)
+
+class span:
+    """Time a block (`with metrics.span("retirement", "embed"):`) or a function (as a decorator).
+
+    Every span feeds the stage histogram; spans inside an instrumented request
+    are also listed in that response's Server-Timing header.
+    """
+
+    def __init__(self, component: str, stage: str):
+        self.component = component
+        self.stage = stage
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self._start
+        stage_seconds.observe(elapsed, self.component, self.stage)
+        spans = _request_spans.get()
+        if spans is not None:
+            spans.append((f"{self.component}.{self.stage}", elapsed))
+        return False
+
+    def __call__(self, fn):
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                with span(self.component, self.stage):
+                    return await fn(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(self.component, self.stage):
+                return fn(*args, **kwargs)
+        return wrapper
+
+def start_request():
+    """Begin collecting spans for the current request; pass the token to `finish_request`."""
+    return _request_spans.set([])
+
+def finish_request(token) -> list:
+    spans = _request_spans.get() or []
+    _request_spans.reset(token)
+    return spans
+
+def server_timing(spans: list) -> str:
+    """Server-Timing header value, one entry per stage (durations summed, in ms)."""
+    totals = {}
+    for name, seconds in spans:
+        totals[name] = totals.get(name, 0.0) + seconds
+    return ", ".join(f"{re.sub(r'[^A-Za-z0-9_.-]', '_', name)};dur={seconds * 1000:.2f}" for name, seconds in totals.items())
+
+# ────────────────────────────────────────────────────────────────────────────────
+# 3. Sampling Profiler
+# ────────────────────────────────────────────────────────────────────────────────
+
+class SamplingProfiler:
+    """Samples every thread's Python stack every `interval_ms` from a background thread.
+
+    Stacks are aggregated in the folded format ("outer;inner;leaf count")
+    that flamegraph.pl and speedscope read. All threads are sampled because a
+    request's work may hop to worker threads (asyncio.to_thread, batchers).
+    """
+
+    def __init__(self, interval_ms: float = PROFILE_INTERVAL_MS):
+        self.interval = interval_ms / 1000.0
+        self.stacks = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _sample(self):
+        me = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == me:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                    frame = frame.f_back
+                # Idle threads park in wait/select; skip them so the profile shows work.
+                if stack and not stack[0].startswith(("wait ", "select ", "get ")):
+                    self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def start(self):
+        self._thread = threading.Thread(target=self._sample, name="sampling-profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        return self
+
+    def folded(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    @staticmethod
+    def path_for(label: str, directory: str = PROFILE_DIR) -> str:
+        name = re.sub(r"[^A-Za-z0-9_.-]+", "_", label).strip("_") or "request"
+        return os.path.join(directory, f"{time.strftime('%Y%m%d-%H%M%S')}-{name}-{os.getpid()}.folded")
+
+    def save(self, label: str = "request", directory: str = PROFILE_DIR, path: str = None) -> str:
+        path = path or self.path_for(label, directory)
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w") as f:
+            f.write(self.folded())
+        return path
+
+def should_profile(headers, args) -> bool:
+    if not PROFILING_ENABLED:
+        return False
+    if headers.get("X-Profile") == "1" or args.get("profile") == "1":
+        return True
+    return PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE
+
+# ────────────────────────────────────────────────────────────────────────────────
+# 4. Framework Hooks
+# ────────────────────────────────────────────────────────────────────────────────
+
+def instrument_flask(app, app_name: str):
+    """Request histogram, Server-Timing, optional profiling and GET /metrics for a Flask app."""
+    from flask import g, request
+
+    @app.before_request
+    def _start_timing():
+        g.metrics_start = time.perf_counter()
+        g.metrics_token = start_request()
+        g.metrics_profiler = SamplingProfiler().start() if should_profile(request.headers, request.args) else None
+
+    @app.after_request
+    def _finish_timing(response):
+        if "metrics_start" not in g:
+            return response
+        elapsed = time.perf_counter() - g.metrics_start
+        spans = finish_request(g.metrics_token)
+        route = request.url_rule.rule if request.url_rule else "unmatched"
+        request_seconds.observe(elapsed, app_name, request.method, route, response.status_code)
+        if spans:
+            response.headers["Server-Timing"] = server_timing(spans)
+        if g.metrics_profiler is not None:
+            response.headers["X-Profile-Path"] = g.metrics_profiler.stop().save(f"{app_name}-{route}")
+            g.metrics_profiler = None
+        g.pop("metrics_start")
+        return response
+
+    @app.teardown_request
+    def _stop_profiler(exc):
+        # after_request is skipped when the response itself fails; never leave the sampler running.
+        profiler = g.pop("metrics_profiler", None)
+        if profiler is not None:
+            profiler.stop()
+
+    @app.route("/metrics", methods=["GET"])
+    def metrics_endpoint():
+        return app.response_class(render(), content_type=CONTENT_TYPE)
+
+def instrument_fastapi(app, app_name: str):
+    """Same as `instrument_flask`, as HTTP middleware for a FastAPI app.
+
+    The middleware gets the response once its headers are ready, while
+    streamed bodies (SSE, NDJSON) keep running after that. The request is
+    therefore observed, and the profiler stopped and saved, only when the body
+    has been sent or the stream is closed. Server-Timing, being a header,
+    still lists only the stages that finished before the first byte.
+    """
+    import asyncio
+    import weakref
+
+    from fastapi.responses import Response
+
+    async def _finish_with_body(body, start, labels, profiler, profile_path):
+        try:
+            async for chunk in body:
+                yield chunk
+        finally:
+            request_seconds.observe(time.perf_counter() - start, *labels)
+            if profiler is not None:
+                profiler.stop()
+                await asyncio.to_thread(profiler.save, path=profile_path)
+
+    @app.middleware("http")
+    async def _timing_middleware(request, call_next):
+        start = time.perf_counter()
+        token = start_request()
+        profiler = SamplingProfiler().start() if should_profile(request.headers, request.query_params) else None
+        try:
+            response = await call_next(request)
+        except BaseException:
+            if profiler is not None:
+                profiler.stop()
+            raise
+        finally:
+            spans = finish_request(token)
+        route = getattr(request.scope.get("route"), "path", "unmatched")
+        if spans:
+            response.headers["Server-Timing"] = server_timing(spans)
+        profile_path = None
+        if profiler is not None:
+            profile_path = response.headers["X-Profile-Path"] = SamplingProfiler.path_for(f"{app_name}-{route}")
+        labels = (app_name, request.method, route, response.status_code)
+        response.body_iterator = _finish_with_body(response.body_iterator, start, labels, profiler, profile_path)
+        if profiler is not None:
+            # A body that is never iterated (client gone before the first byte) never runs the finally above.
+            weakref.finalize(response.body_iterator, profiler.stop)
+        return response
+
+    @app.get("/metrics", include_in_schema=False)
+    def metrics_endpoint():
+        return Response(render(), media_type=CONTENT_TYPE)
@@ -1,13 +1,24 @@
 from flask import Flask, jsonify, request
 from flask_cors import CORS
+import base64
+import hashlib
 import json
 import os
 import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 import requests
+from requests.adapters import HTTPAdapter
+from modules import metrics
+from modules.news_dedup import NearDuplicateIndex
+from modules.utils import atomic_write_json
 
 # Initialize Flask app
 app = Flask(__name__)
-CORS(app)
+CORS(app, expose_headers=["ETag", "X-Next-Cursor", "Server-Timing"])
+metrics.instrument_flask(app, "news_digest")
 logging.basicConfig(level=logging.ERROR)
 
 # Get the absolute path of the `news_data.json` file
@@ -15,16 +26,34 @@ file_path = os.path.join(os.path.dirname(__file__), '../data/news_data.json')
 
 # Load news data
 try:
-    with open(file_path, 'r') as file:
-        news_data = json.load(file)
+    with open(file_path, 'rb') as file:
+        news_bytes = file.read()
+    news_data = json.loads(news_bytes)
 except FileNotFoundError:
     logging.error(f"File not found: {file_path}")
+    news_bytes = b""
     news_data = []
 
 # Ollama API Base URL
 OLLAMA_API_URL = "http://localhost:11434/api/generate"
 OLLAMA_MODEL = "phi4"  # Using Phi-4 model
+SUMMARY_ERROR = "Error generating summary"
 
+# Background summarization settings
+SUMMARY_WORKERS = int(os.getenv("NEWS_SUMMARY_WORKERS", "2"))
+SUMMARY_TIMEOUT = float(os.getenv("NEWS_SUMMARY_TIMEOUT", "120"))
+SUMMARY_MAX_ATTEMPTS = int(os.getenv("NEWS_SUMMARY_MAX_ATTEMPTS", "3"))
+SUMMARY_BACKOFF_SECONDS = float(os.getenv("NEWS_SUMMARY_BACKOFF_SECONDS", "2"))
+# Articles that still failed after all attempts are not re-queued before this many seconds.
+SUMMARY_RETRY_INTERVAL = float(os.getenv("NEWS_SUMMARY_RETRY_INTERVAL", "300"))
+# Summarize one article per near-duplicate cluster (set to 0 to summarize every article).
+NEWS_DEDUP = os.getenv("NEWS_DEDUP", "1") != "0"
+
+# One pooled session shared by the workers (keep-alive instead of a new connection per call)
+session = requests.Session()
+session.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=SUMMARY_WORKERS))
+
+@metrics.span("news", "llm_summary")
 def generate_summary(text):
     """
     Calls the Ollama API to generate a summary.
@@ -36,41 +65,385 @@ def generate_summary(text):
             "prompt": f"Pretend you are an expert economist, using the text which were alredy provided, summarize the article in about 3 to 5 sentences. Make sure that summarized article is clear enough and easy to read. Here is the text to summarize:\n\n{text}",
             "stream": False
         }
-        response = requests.post(OLLAMA_API_URL, json=payload)
+        response = session.post(OLLAMA_API_URL, json=payload, timeout=SUMMARY_TIMEOUT)
         response.raise_for_status()
         summary = response.json().get("response", "").strip()
-        return summary if summary else "Error generating summary"
+        return summary if summary else SUMMARY_ERROR
     except requests.exceptions.RequestException as e:
         logging.error(f"Error generating summary: {e}")
-        return "Error generating summary"
+        return SUMMARY_ERROR
+
+def generate_summary_with_retry(text, attempts=SUMMARY_MAX_ATTEMPTS, backoff=SUMMARY_BACKOFF_SECONDS):
+    """`generate_summary` with exponential backoff (plus jitter) between failed attempts."""
+    for attempt in range(attempts):
+        summary = generate_summary(text)
+        if summary != SUMMARY_ERROR:
+            return summary
+        if attempt + 1 < attempts:
+            time.sleep(backoff * 2 ** attempt * random.uniform(0.5, 1.5))
+    return SUMMARY_ERROR
+
+def needs_summary(article):
+    return not article.get('aiSummary') or article['aiSummary'] == SUMMARY_ERROR
+
+class SummaryQueue:
+    """
+    Summarizes articles on a bounded background worker pool.
+    With a `dedup` index, near-duplicate articles (rewrites of the same wire
+    story) share one summary: only the cluster representative goes to the LLM
+    and the other members reuse its summary. Each job is queued at most once
+    at a time; the news file is rewritten (atomically) only when a summary
+    actually changed, once the queue drains.
+    """
+
+    def __init__(self, articles, path, workers=SUMMARY_WORKERS, on_change=None, dedup=None, lock=None):
+        self.articles = articles
+        self.path = path
+        self.on_change = on_change
+        self.dedup = dedup
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="news-summary")
+        self._lock = lock or threading.Lock()  # also held while articles are edited in place
+        self._by_key = {}
+        self._job_of = {}
+        self._indexed = 0  # articles[:_indexed] are in _by_key / the dedup index
+        self._waiting = set()  # keys of indexed articles that still need a summary
+        self._pending = set()
+        self._failed_at = {}
+        self._retry_at = 0.0  # earliest time a failed job may be queued again
+        self._dirty = False
+        self._stats = {"summarized": 0, "reused": 0}
+
+    def schedule(self):
+        """Queue every article that still needs a summary. Returns the number of LLM jobs queued.
+
+        New articles are indexed once; after that only the articles still
+        waiting for a summary are visited.
+        """
+        now = time.time()
+        queued = reused = 0
+        with self._lock:
+            for article in self.articles[self._indexed:]:
+                key = str(article.get('id'))
+                self._by_key[key] = article
+                job = key
+                if self.dedup is not None:
+                    job = self.dedup.add(key, article.get('originalSummary', ''))
+                self._job_of[key] = job
+                if needs_summary(article):
+                    self._waiting.add(key)
+            self._indexed = len(self.articles)
+
+            self._retry_at = float('inf')
+            for key in list(self._waiting):
+                article = self._by_key[key]
+                if not needs_summary(article):
+                    self._waiting.discard(key)
+                    continue
+                job = self._job_of[key]
+                representative = self._by_key.get(job)
+                if representative is not article and representative is not None and not needs_summary(representative):
+                    article['aiSummary'] = representative['aiSummary']
+                    self._stats["reused"] += 1
+                    self._dirty = True
+                    self._waiting.discard(key)
+                    reused += 1
+                    continue
+                if job in self._pending:
+                    continue
+                retry_at = self._failed_at.get(job, float('-inf')) + SUMMARY_RETRY_INTERVAL
+                if now < retry_at:
+                    self._retry_at = min(self._retry_at, retry_at)
+                    continue
+                self._pending.add(job)
+                self._executor.submit(self._summarize, job)
+                queued += 1
+        if reused and self.on_change:
+            self.on_change()
+        return queued
+
+    def schedule_if_due(self):
+        """`schedule` only when there are unindexed articles or a retry timer has expired (O(1) otherwise)."""
+        if self._indexed < len(self.articles) or time.time() >= self._retry_at:
+            return self.schedule()
+        return 0
+
+    def _summarize(self, job):
+        article = self._by_key[job]
+        try:
+            summary = generate_summary_with_retry(article.get('originalSummary', ''))
+        except Exception as e:
+            logging.error(f"Summary job for article {job} failed: {e}")
+            summary = SUMMARY_ERROR
+        members = self.dedup.members(job) if self.dedup is not None else [job]
+        with self._lock:
+            self._stats["summarized"] += 1
+            if summary == SUMMARY_ERROR:
+                self._failed_at[job] = time.time()
+                self._retry_at = min(self._retry_at, self._failed_at[job] + SUMMARY_RETRY_INTERVAL)
+            else:
+                self._failed_at.pop(job, None)
+            changed = False
+            for key in members or [job]:
+                member = self._by_key.get(key)
+                if member is None or (member is not article and (summary == SUMMARY_ERROR or not needs_summary(member))):
+                    continue
+                if member.get('aiSummary') != summary:
+                    member['aiSummary'] = summary
+                    changed = True
+                    if member is not article:
+                        self._stats["reused"] += 1
+                if summary != SUMMARY_ERROR:
+                    self._waiting.discard(key)
+            self._dirty |= changed
+            self._pending.discard(job)
+            drained = not self._pending
+        if changed and self.on_change:
+            self.on_change()
+        if drained:
+            self.flush()
+
+    def mark_dirty(self):
+        with self._lock:
+            self._dirty = True
+
+    @metrics.span("news", "flush")
+    def flush(self):
+        """Persist the articles if any summary changed since the last write."""
+        with self._lock:
+            if not self._dirty:
+                return False
+            snapshot = [dict(article) for article in self.articles]
+            self._dirty = False
+        try:
+            atomic_write_json(self.path, snapshot, indent=4)
+        except OSError as e:
+            logging.error(f"Error saving news data: {e}")
+            with self._lock:
+                self._dirty = True
+            return False
+        return True
+
+    def status(self):
+        with self._lock:
+            status = {"pending": len(self._pending), "failed": len(self._failed_at), "dirty": self._dirty, **self._stats}
+        if self.dedup is not None:
+            status["dedup"] = self.dedup.stats()
+        return status
+
+# Article fields that may hold a publication date, newest first in listings.
+DATE_FIELDS = ("publishedAt", "date")
+MAX_PAGE_SIZE = 500
+
+def article_sort_key(article):
+    date = next((str(article[f]) for f in DATE_FIELDS if article.get(f)), "")
+    return (date, str(article.get('source', '')), str(article.get('id')).zfill(20))
+
+def encode_cursor(article_id):
+    return base64.urlsafe_b64encode(str(article_id).encode("utf-8")).decode("ascii")
+
+def decode_cursor(cursor):
+    try:
+        return base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8")
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+class NewsStore:
+    """
+    In-memory indexes over the loaded articles.
+    `by_id` maps the article id (as a string) to the article; `order` lists ids
+    newest first (then by source), with one such list per source. Responses
+    carry a version-based ETag that changes whenever an article changes.
+    Articles are edited in place by the summary workers, so they are only
+    serialized while holding `article_lock`, the lock those workers use.
+    """
+
+    def __init__(self, articles, epoch="", article_lock=None):
+        self.articles = articles
+        self.article_lock = article_lock or threading.Lock()
+        self._lock = threading.Lock()
+        self._epoch = epoch
+        self.version = 0
+        self._payloads = {}
+        self.rebuild()
+
+    def rebuild(self):
+        ordered = sorted(self.articles, key=article_sort_key, reverse=True)
+        order = [str(a.get('id')) for a in ordered]
+        by_source = {}
+        for article, key in zip(ordered, order):
+            by_source.setdefault(str(article.get('source', '')), []).append(key)
+        with self._lock:
+            self.by_id = {str(a.get('id')): a for a in self.articles}
+            self.order = order
+            self.by_source = by_source
+            self._positions = {None: {k: i for i, k in enumerate(order)}}
+            self._positions.update({src: {k: i for i, k in enumerate(keys)} for src, keys in by_source.items()})
+            self.version += 1
+            self._payloads.clear()
+
+    def touch(self):
+        """Mark the articles as changed (new ETag, serialized pages dropped)."""
+        with self._lock:
+            self.version += 1
+            self._payloads.clear()
+
+    def etag(self, *parts):
+        raw = "|".join([self._epoch, str(self.version), *map(str, parts)])
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:20]
+
+    def get(self, article_id):
+        return self.by_id.get(str(article_id))
+
+    def page(self, limit=None, cursor=None, source=None, fields=None):
+        """
+        Returns (articles, next_cursor). Without `limit` every matching article
+        is returned; `cursor` is the value returned by the previous page.
+        """
+        keys = self.order if source is None else self.by_source.get(source, [])
+        start = 0
+        if cursor:
+            position = self._positions.get(source, {}).get(decode_cursor(cursor))
+            start = position + 1 if position is not None else len(keys)
+        end = len(keys) if limit is None else min(start + limit, len(keys))
+        articles = [self.by_id[k] for k in keys[start:end]]
+        if fields:
+            articles = [{f: a[f] for f in fields if f in a} for a in articles]
+        next_cursor = encode_cursor(keys[end - 1]) if end < len(keys) and end > start else None
+        return articles, next_cursor
+
+    def page_json(self, limit=None, cursor=None, source=None, fields=None):
+        """`page` serialized to JSON, memoized until the next change."""
+        key = (limit, cursor, source, fields)
+        with self._lock:
+            cached = self._payloads.get(key)
+            version = self.version
+        if cached is not None:
+            return cached
+        with self.article_lock:
+            articles, next_cursor = self.page(limit, cursor, source, fields)
+            payload = (json.dumps(articles), next_cursor)
+        with self._lock:
+            if self.version != version:  # changed while serializing; don't memoize a stale page
+                return payload
+            if len(self._payloads) >= 256:
+                self._payloads.clear()
+            self._payloads[key] = payload
+        return payload
+
+article_lock = threading.Lock()
+news_store = NewsStore(news_data, epoch=hashlib.sha1(news_bytes).hexdigest(), article_lock=article_lock)
+summary_queue = SummaryQueue(news_data, file_path, on_change=news_store.touch,
+                             dedup=NearDuplicateIndex() if NEWS_DEDUP else None, lock=article_lock)
+news_lock = threading.Lock()
+
+def ingest_articles(articles):
+    """
+    Adds new articles to the feed and queues their summaries.
+    Articles without an `id` get the next numeric id; ids already in the feed
+    (or repeated within this batch) are skipped.
+    Near-duplicates of known stories reuse the existing cluster summary.
+    """
+    added = []
+    with news_lock:
+        numeric_ids = [a['id'] for a in news_data if isinstance(a.get('id'), int)]
+        next_id = max(numeric_ids, default=0) + 1
+        seen = set()
+        for article in articles:
+            if 'id' not in article:
+                article = {**article, 'id': next_id}
+                next_id += 1
+            elif news_store.get(article['id']) is not None or str(article['id']) in seen:
+                continue
+            seen.add(str(article['id']))
+            if isinstance(article['id'], int):
+                next_id = max(next_id, article['id'] + 1)
+            news_data.append(article)
+            added.append(article)
+        if added:
+            news_store.rebuild()
+            summary_queue.mark_dirty()
+    if added:
+        summary_queue.schedule()
+        summary_queue.flush()
+    return added
+
+def parse_fields(value):
+    fields = tuple(f.strip() for f in (value or "").split(",") if f.strip())
+    return fields or None
+
+def not_modified(etag):
+    return request.if_none_match.contains_weak(etag)
 
 @app.route('/api/news-digest', methods=['GET'])
 def get_news_digest():
     """
-    Returns all news articles with AI-generated summaries.
-    Summaries are generated and cached in the `news_data.json` file.
+    Returns news articles from memory, newest first.
+    Optional query parameters: `limit` and `cursor` for pagination (the next
+    cursor comes back in the X-Next-Cursor header), `source` to filter, and
+    `fields` (e.g. "id,title,aiSummary") to return only some fields.
+    Missing summaries are queued for the background workers when articles are
+    ingested (failed ones again once their retry interval has passed); they
+    show up on a later request once generated.
     """
-    for article in news_data:
-        if not article.get('aiSummary') or article['aiSummary'] == "Error generating summary":
-            article['aiSummary'] = generate_summary(article['originalSummary'])
-
-    # **Fixed Indentation Here**
-    with open(file_path, 'w') as file:
-        json.dump(news_data, file, indent=4)
+    summary_queue.schedule_if_due()
+    limit = request.args.get('limit', type=int)
+    if limit is not None:
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+    cursor = request.args.get('cursor') or None
+    source = request.args.get('source')
+    fields = parse_fields(request.args.get('fields'))
 
-    return jsonify(news_data)
+    etag = news_store.etag(limit, cursor, source, fields)
+    if not_modified(etag):
+        response = app.response_class(status=304)
+    else:
+        with metrics.span("news", "page_render"):
+            body, next_cursor = news_store.page_json(limit, cursor, source, fields)
+        response = app.response_class(body, mimetype='application/json')
+        if next_cursor:
+            response.headers['X-Next-Cursor'] = next_cursor
+    response.set_etag(etag, weak=True)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
 
-@app.route('/api/news-digest/<int:article_id>', methods=['GET'])
+@app.route('/api/news-digest/<article_id>', methods=['GET'])
 def get_article_by_id(article_id):
     """
     Returns a specific article by its ID.
     """
-    article = next((item for item in news_data if item['id'] == article_id), None)
-    if article:
-        
-        return jsonify(article)
-    else:
+    article = news_store.get(article_id)
+    if not article:
         return jsonify({"error": "Article not found"}), 404
+    etag = news_store.etag('article', article_id)
+    if not_modified(etag):
+        response = app.response_class(status=304)
+    else:
+        with news_store.article_lock:
+            body = json.dumps(article)
+        response = app.response_class(body, mimetype='application/json')
+    response.set_etag(etag, weak=True)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+@app.route('/api/news-digest', methods=['POST'])
+def post_news_articles():
+    """
+    Ingests one article or a list of articles (id, title, originalSummary, category, source).
+    """
+    payload = request.get_json(silent=True)
+    articles = payload if isinstance(payload, list) else [payload]
+    if not all(isinstance(a, dict) and a.get('originalSummary') for a in articles):
+        return jsonify({"error": "Each article needs an originalSummary"}), 400
+    added = ingest_articles(articles)
+    return jsonify({"added": [a['id'] for a in added]}), 201
+
+@app.route('/api/news-digest/status', methods=['GET'])
+def get_summary_status():
+    """
+    Returns the background summarization queue state.
+    """
+    return jsonify(summary_queue.status())
 
 if __name__ == '__main__':
+    summary_queue.schedule()
     app.run(port=5001, debug=True)
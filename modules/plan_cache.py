@@ -0,0 +1,269 @@
+import asyncio
+import hashlib
+import json
+import math
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+# ────────────────────────────────────────────────────────────────────────────────
+# 1. Canonical Keys
+# ────────────────────────────────────────────────────────────────────────────────
+
+def round_significant(value: float, digits: int) -> float:
+    if value == 0 or not math.isfinite(value):
+        return value
+    return round(value, digits - 1 - int(math.floor(math.log10(abs(value)))))
+
+def canonicalize(value, significant_digits: int = None):
+    """Normalize a plan_data structure so trivially different profiles compare equal.
+
+    Floats are rounded to cents, or to `significant_digits` significant digits
+    when bucketing is enabled (e.g. 3 -> income 85,412 and 85,380 both become
+    85,400). Integral floats collapse to ints and strings are stripped.
+    """
+    if isinstance(value, dict):
+        return {str(k): canonicalize(v, significant_digits) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [canonicalize(v, significant_digits) for v in value]
+    if isinstance(value, bool) or value is None:
+        return value
+    if isinstance(value, (int, float)):
+        number = float(value)
+        if significant_digits:
+            number = round_significant(number, significant_digits)
+        number = round(number, 2)
+        return int(number) if number.is_integer() else number
+    if isinstance(value, str):
+        return value.strip()
+    return str(value)
+
+# plan_data fields that never reach the prompt. The Monte Carlo percentile
+# bands are large and would only make canonicalization slower.
+KEY_EXCLUDED_FIELDS = ("monte_carlo",)
+
+def make_key(plan_data: dict, significant_digits: int = None) -> str:
+    relevant = {k: v for k, v in plan_data.items() if k not in KEY_EXCLUDED_FIELDS}
+    canonical = canonicalize(relevant, significant_digits)
+    encoded = json.dumps(canonical, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+# ────────────────────────────────────────────────────────────────────────────────
+# 2. LRU + TTL Cache with Optional SQLite Backend
+# ────────────────────────────────────────────────────────────────────────────────
+
+class PlanCache:
+    """LRU + TTL cache for generated plan text, bounded by entry count and bytes.
+
+    With `path` set, entries are also written to a SQLite file so they survive
+    restarts; memory misses fall through to disk. The file is capped at
+    `disk_max_entries` rows and `disk_max_bytes` of keys and values, evicting
+    the oldest entries (by creation time) on write. Concurrent computations of
+    the same key are coalesced: the first caller generates, the others wait
+    for its result.
+    """
+
+    def __init__(self, max_entries: int = 1024, max_bytes: int = 32 * 1024 * 1024,
+                 ttl_seconds: float = 24 * 3600, path: str = None, significant_digits: int = None,
+                 disk_max_entries: int = 100_000, disk_max_bytes: int = 256 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.disk_max_entries = disk_max_entries
+        self.disk_max_bytes = disk_max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.significant_digits = significant_digits
+        self._entries = OrderedDict()  # key -> (expires_at, value, size)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._inflight = {}  # key -> concurrent.futures.Future
+        self._stats = {"hits": 0, "disk_hits": 0, "misses": 0, "coalesced": 0,
+                       "evictions": 0, "disk_evictions": 0, "expirations": 0, "stores": 0}
+        self._db = None
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS plan_cache (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            columns = {row[1] for row in self._db.execute("PRAGMA table_info(plan_cache)")}
+            if "created_at" not in columns:  # files written before the disk cap existed
+                self._db.execute("ALTER TABLE plan_cache ADD COLUMN created_at REAL NOT NULL DEFAULT 0")
+                self._db.execute("ALTER TABLE plan_cache ADD COLUMN size INTEGER NOT NULL DEFAULT 0")
+                self._db.execute("UPDATE plan_cache SET size = length(key) + length(CAST(value AS BLOB))")
+            self._db.execute("CREATE INDEX IF NOT EXISTS plan_cache_created_at ON plan_cache (created_at)")
+            self._db.execute("DELETE FROM plan_cache WHERE expires_at < ?", (time.time(),))
+
+    @classmethod
+    def from_env(cls) -> "PlanCache":
+        digits = os.getenv("PLAN_CACHE_SIGNIFICANT_DIGITS")
+        return cls(
+            max_entries=int(os.getenv("PLAN_CACHE_MAX_ENTRIES", "1024")),
+            max_bytes=int(os.getenv("PLAN_CACHE_MAX_BYTES", str(32 * 1024 * 1024))),
+            ttl_seconds=float(os.getenv("PLAN_CACHE_TTL_SECONDS", str(24 * 3600))),
+            path=os.getenv("PLAN_CACHE_PATH") or None,
+            significant_digits=int(digits) if digits else None,
+            disk_max_entries=int(os.getenv("PLAN_CACHE_DISK_MAX_ENTRIES", "100000")),
+            disk_max_bytes=int(os.getenv("PLAN_CACHE_DISK_MAX_BYTES", str(256 * 1024 * 1024))),
+        )
+
+    def make_key(self, plan_data: dict) -> str:
+        return make_key(plan_data, self.significant_digits)
+
+    def get(self, key: str):
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._entries.move_to_end(key)
+                    self._stats["hits"] += 1
+                    return entry[1]
+                self._remove(key)
+                self._stats["expirations"] += 1
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT value, expires_at FROM plan_cache WHERE key = ? AND expires_at > ?", (key, now)
+                ).fetchone()
+                if row is not None:
+                    self._store_in_memory(key, row[0], row[1])
+                    self._stats["disk_hits"] += 1
+                    return row[0]
+            self._stats["misses"] += 1
+            return None
+
+    def set(self, key: str, value: str):
+        now = time.time()
+        expires_at = now + self.ttl_seconds
+        with self._lock:
+            self._store_in_memory(key, value, expires_at)
+            self._stats["stores"] += 1
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO plan_cache (key, value, expires_at, created_at, size) VALUES (?, ?, ?, ?, ?)",
+                    (key, value, expires_at, now, len(key) + len(value.encode("utf-8"))),
+                )
+                self._trim_disk()
+
+    def _trim_disk(self):
+        """Delete the oldest rows until the file is within its row and byte caps."""
+        rows, size = self._db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM plan_cache").fetchone()
+        if rows <= self.disk_max_entries and size <= self.disk_max_bytes:
+            return
+        excess_rows, excess_bytes = rows - self.disk_max_entries, size - self.disk_max_bytes
+        doomed, freed = [], 0
+        for key, row_size in self._db.execute("SELECT key, size FROM plan_cache ORDER BY created_at"):
+            if len(doomed) >= excess_rows and freed >= excess_bytes:
+                break
+            doomed.append(key)
+            freed += row_size
+        self._db.executemany("DELETE FROM plan_cache WHERE key = ?", [(key,) for key in doomed])
+        self._stats["disk_evictions"] += len(doomed)
+
+    def _store_in_memory(self, key, value, expires_at):
+        size = len(key) + len(value.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (expires_at, value, size)
+        self._bytes += size
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self._stats["evictions"] += 1
+
+    def _remove(self, key):
+        _, _, size = self._entries.pop(key)
+        self._bytes -= size
+
+    def claim(self, key):
+        """Return (future, is_leader) for `key`, registering a new in-flight computation if needed.
+
+        For callers that produce the value themselves (e.g. while streaming it):
+        a leader must always call `finish`; followers wait on the future.
+        """
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is not None:
+                self._stats["coalesced"] += 1
+                return future, False
+            future = Future()
+            self._inflight[key] = future
+            return future, True
+
+    def finish(self, key, future, value=None, error=None, cacheable=True):
+        """Store `value` (if cacheable) and hand the value or error to everyone waiting on `future`."""
+        if error is None and cacheable:
+            self.set(key, value)
+        with self._lock:
+            self._inflight.pop(key, None)
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(value)
+
+    def get_or_compute(self, key: str, compute, cacheable=None):
+        """Return the cached value or `compute()`; concurrent callers share one computation."""
+        value = self.get(key)
+        if value is not None:
+            return value
+        future, leader = self.claim(key)
+        if not leader:
+            return future.result()
+        # A previous leader may have stored the value between our miss and the claim.
+        value = self.get(key)
+        if value is not None:
+            self.finish(key, future, value, cacheable=False)
+            return value
+        try:
+            value = compute()
+        except BaseException as e:
+            self.finish(key, future, error=e if isinstance(e, Exception) else RuntimeError("interrupted"))
+            raise
+        self.finish(key, future, value, cacheable=cacheable(value) if cacheable else True)
+        return value
+
+    async def get_or_compute_async(self, key: str, compute, cacheable=None):
+        """Async `get_or_compute`; `compute` is a coroutine function."""
+        value = self.get(key)
+        if value is not None:
+            return value
+        future, leader = self.claim(key)
+        if not leader:
+            return await asyncio.wrap_future(future)
+        value = self.get(key)
+        if value is not None:
+            self.finish(key, future, value, cacheable=False)
+            return value
+        try:
+            value = await compute()
+        except BaseException as e:
+            self.finish(key, future, error=e if isinstance(e, Exception) else RuntimeError("cancelled"))
+            raise
+        self.finish(key, future, value, cacheable=cacheable(value) if cacheable else True)
+        return value
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats.update(entries=len(self._entries), bytes=self._bytes, max_entries=self.max_entries,
+                         max_bytes=self.max_bytes, in_flight=len(self._inflight),
+                         persistent=self._db is not None)
+            if self._db is not None:
+                rows, size = self._db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM plan_cache").fetchone()
+                stats.update(disk_entries=rows, disk_bytes=size, disk_max_entries=self.disk_max_entries,
+                             disk_max_bytes=self.disk_max_bytes)
+        lookups = stats["hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_rate"] = (stats["hits"] + stats["disk_hits"]) / lookups if lookups else 0.0
+        return stats
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            if self._db is not None:
+                self._db.execute("DELETE FROM plan_cache")
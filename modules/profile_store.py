@@ -0,0 +1,166 @@
+import base64
+import json
+import os
+import sqlite3
+import threading
+import uuid
+from datetime import datetime
+
+DEFAULT_DB_PATH = "data/retirement_user_data.db"
+LEGACY_JSON_PATH = "data/retirement_user_data.json"
+MAX_PAGE_SIZE = 1000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS profiles (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    id TEXT NOT NULL UNIQUE,
+    timestamp TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS profiles_timestamp ON profiles (timestamp, seq);
+CREATE TABLE IF NOT EXISTS migrations (
+    source TEXT PRIMARY KEY,
+    migrated_at TEXT NOT NULL
+);
+"""
+
+def encode_cursor(seq: int) -> str:
+    return base64.urlsafe_b64encode(str(seq).encode("ascii")).decode("ascii")
+
+def decode_cursor(cursor: str) -> int:
+    try:
+        return int(base64.urlsafe_b64decode(cursor.encode("ascii")).decode("ascii"))
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor!r}") from e
+
+class ProfileStore:
+    """Append-only SQLite store for questionnaire submissions.
+
+    Every append is its own transaction, so a crash can never corrupt earlier
+    entries, and WAL mode lets readers in other workers run alongside a writer.
+    Entries keep the legacy JSON shape ({"id", "timestamp", "data"}) and are
+    indexed by id and by timestamp. Reads are paginated with an opaque cursor.
+    """
+
+    def __init__(self, path: str = DEFAULT_DB_PATH):
+        self.path = path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        # One connection per thread; sqlite3 connections are not safe to share.
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _row_to_entry(row) -> dict:
+        return {"id": row[0], "timestamp": row[1], "data": json.loads(row[2])}
+
+    def append_many(self, user_inputs: list) -> list:
+        timestamp = datetime.now().isoformat()
+        entries = [{"id": str(uuid.uuid4()), "timestamp": timestamp, "data": data} for data in user_inputs]
+        self._insert(entries)
+        return entries
+
+    def append(self, user_input: dict) -> dict:
+        return self.append_many([user_input])[0]
+
+    def _insert(self, entries: list):
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT INTO profiles (id, timestamp, data) VALUES (?, ?, ?)",
+                [(e["id"], e["timestamp"], json.dumps(e["data"])) for e in entries],
+            )
+
+    def get(self, profile_id: str):
+        row = self._connect().execute(
+            "SELECT id, timestamp, data FROM profiles WHERE id = ?", (profile_id,)
+        ).fetchone()
+        return self._row_to_entry(row) if row else None
+
+    def count(self) -> int:
+        return self._connect().execute("SELECT COUNT(*) FROM profiles").fetchone()[0]
+
+    def page(self, limit: int = 100, cursor: str = None, since: str = None, until: str = None) -> tuple:
+        """Return (entries, next_cursor) in insertion order; next_cursor is None on the last page.
+
+        `since`/`until` are ISO timestamps (inclusive / exclusive).
+        """
+        limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+        clauses, params = ["seq > ?"], [decode_cursor(cursor) if cursor else 0]
+        if since:
+            clauses.append("timestamp >= ?")
+            params.append(since)
+        if until:
+            clauses.append("timestamp < ?")
+            params.append(until)
+        rows = self._connect().execute(
+            f"SELECT seq, id, timestamp, data FROM profiles WHERE {' AND '.join(clauses)} ORDER BY seq LIMIT ?",
+            (*params, limit + 1),
+        ).fetchall()
+        next_cursor = encode_cursor(rows[limit - 1][0]) if len(rows) > limit else None
+        return [self._row_to_entry(row[1:]) for row in rows[:limit]], next_cursor
+
+    def iter_all(self, batch_size: int = 500, since: str = None, until: str = None):
+        """Stream every entry, one page at a time."""
+        cursor = None
+        while True:
+            entries, cursor = self.page(batch_size, cursor, since, until)
+            yield from entries
+            if cursor is None:
+                return
+
+    def is_migrated(self, json_path: str) -> bool:
+        return self._connect().execute(
+            "SELECT 1 FROM migrations WHERE source = ?", (os.path.abspath(json_path),)
+        ).fetchone() is not None
+
+    def migrate_json(self, json_path: str = LEGACY_JSON_PATH) -> int:
+        """Import the legacy whole-file JSON list once; completion is recorded in the `migrations` table.
+
+        The JSON file itself is left untouched. Safe to run from several
+        workers at once: rows are keyed by their original id and inserted with
+        INSERT OR IGNORE.
+        """
+        if not os.path.exists(json_path) or self.is_migrated(json_path):
+            return 0
+        with open(json_path, "r") as f:
+            content = f.read().strip()
+        entries = json.loads(content) if content else []
+        entries = [e for e in entries if isinstance(e, dict) and "id" in e]
+        before = self.count()
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT OR IGNORE INTO profiles (id, timestamp, data) VALUES (?, ?, ?)",
+                [(e["id"], e.get("timestamp", ""), json.dumps(e.get("data", {}))) for e in entries],
+            )
+            conn.execute(
+                "INSERT OR IGNORE INTO migrations (source, migrated_at) VALUES (?, ?)",
+                (os.path.abspath(json_path), datetime.now().isoformat()),
+            )
+        return self.count() - before
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+def get_store(path: str = DEFAULT_DB_PATH, legacy_json_path: str = LEGACY_JSON_PATH) -> ProfileStore:
+    """Shared store per path; the legacy JSON file is migrated on first use."""
+    with _stores_lock:
+        store = _stores.get(path)
+        if store is None:
+            store = ProfileStore(path)
+            try:
+                migrated = store.migrate_json(legacy_json_path)
+                if migrated:
+                    print(f"Migrated {migrated} profiles from {legacy_json_path} to {path}")
+            except (OSError, ValueError) as e:
+                print(f"Could not migrate {legacy_json_path}: {e}")
+            _stores[path] = store
+        return store
@@ -0,0 +1,129 @@
+import numpy as np
+
+# Planning assumptions shared by the plan generator, batch scoring and the simulator.
+DEFAULT_ASSUMPTIONS = {
+    "savings_rate": 0.15,
+    "return_rate": 0.065,
+    "inflation_rate": 0.03,
+    "contribution_growth": 0.0,
+    # Annual return standard deviation, used by the Monte Carlo simulator.
+    "return_volatility": 0.15,
+}
+MIN_SAVINGS_RATE = 0.15
+MAX_SAVINGS_RATE = 0.50
+
+# Savings-to-income multiples by age (nearest age wins; ties go to the younger age).
+AGE_BENCHMARKS = {30: 1.0, 35: 2.0, 40: 3.0, 45: 4.0, 50: 6.0, 55: 7.0, 60: 8.0, 65: 10.0}
+_BENCHMARK_AGES = np.array(list(AGE_BENCHMARKS), dtype=np.float64)
+_BENCHMARK_MULTIPLIERS = np.array(list(AGE_BENCHMARKS.values()), dtype=np.float64)
+
+# ────────────────────────────────────────────────────────────────────────────────
+# 1. Closed-Form Annuity Math
+# ────────────────────────────────────────────────────────────────────────────────
+
+def annuity_factor(annual_return, contribution_growth, years):
+    """Future value of contributions of 1 (growing by `contribution_growth`) paid at each year end.
+
+    sum_{k=0}^{n-1} (1+g)^k (1+r)^(n-1-k) = ((1+r)^n - (1+g)^n) / (r - g),
+    with the limit n (1+r)^(n-1) when r == g. Non-positive horizons give 0.
+    """
+    r = np.asarray(annual_return, dtype=np.float64)
+    g = np.asarray(contribution_growth, dtype=np.float64)
+    n = np.maximum(np.asarray(years, dtype=np.float64), 0.0)
+    diff = r - g
+    same = np.abs(diff) < 1e-12
+    with np.errstate(divide="ignore", invalid="ignore"):
+        general = ((1 + r) ** n - (1 + g) ** n) / np.where(same, 1.0, diff)
+    return np.where(same, n * (1 + r) ** np.maximum(n - 1, 0), general)
+
+def project_savings(current_savings, income, years,
+                    savings_rate=DEFAULT_ASSUMPTIONS["savings_rate"],
+                    annual_return=DEFAULT_ASSUMPTIONS["return_rate"],
+                    contribution_growth=DEFAULT_ASSUMPTIONS["contribution_growth"],
+                    inflation_rate=DEFAULT_ASSUMPTIONS["inflation_rate"],
+                    real=False):
+    """Projected balance at retirement for arrays (or scalars) of profiles.
+
+    Current savings compound for `years`; `income * savings_rate` is
+    contributed at the end of every year and grows by `contribution_growth`.
+    With `real=True` the result is deflated to today's dollars.
+    """
+    years = np.asarray(years, dtype=np.float64)
+    current_savings = np.asarray(current_savings, dtype=np.float64)
+    contribution = np.asarray(income, dtype=np.float64) * savings_rate
+    balance = current_savings * (1 + annual_return) ** years
+    balance = balance + contribution * annuity_factor(annual_return, contribution_growth, years)
+    if real:
+        balance = balance / (1 + inflation_rate) ** years
+    return balance
+
+def required_savings_rate(goal, current_savings, income, years,
+                          lower=MIN_SAVINGS_RATE, upper=MAX_SAVINGS_RATE):
+    """Share of income needed to close the goal gap (no growth), clipped to [lower, upper].
+
+    Profiles with no income or no years left get `upper` if they are short of
+    the goal and `lower` otherwise.
+    """
+    shortfall = np.asarray(goal, dtype=np.float64) - np.asarray(current_savings, dtype=np.float64)
+    denominator = np.asarray(income, dtype=np.float64) * np.asarray(years, dtype=np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rate = shortfall / denominator
+    rate = np.where(denominator > 0, rate, np.where(shortfall > 0, upper, lower))
+    return np.clip(rate, lower, upper)
+
+def benchmark_savings(age, income):
+    """Fidelity-style savings benchmark: income x multiple for the nearest benchmark age."""
+    age = np.asarray(age, dtype=np.float64)
+    nearest = np.abs(age[..., None] - _BENCHMARK_AGES).argmin(axis=-1)
+    return np.asarray(income, dtype=np.float64) * _BENCHMARK_MULTIPLIERS[nearest]
+
+# ────────────────────────────────────────────────────────────────────────────────
+# 2. Batch Scoring
+# ────────────────────────────────────────────────────────────────────────────────
+
+# RetirementInput field -> column name used by `score_profiles`.
+PROFILE_FIELDS = {
+    "age": "age",
+    "retirementAge": "retirement_age",
+    "currentSavings": "current_savings",
+    "income": "income",
+    "retirementSavingsGoal": "goal",
+}
+
+def profiles_to_columns(profiles: list) -> dict:
+    """Convert a list of questionnaire dicts into float64 column arrays (missing -> 0)."""
+    return {
+        column: np.fromiter((float(p.get(field) or 0) for p in profiles), dtype=np.float64, count=len(profiles))
+        for field, column in PROFILE_FIELDS.items()
+    }
+
+def score_profiles(profiles, assumptions: dict = None) -> dict:
+    """Compute plan metrics for many profiles at once.
+
+    `profiles` is either a list of questionnaire dicts or a dict of equally
+    sized columns (age, retirement_age, current_savings, income, goal).
+    Returns a dict of arrays, one entry per profile.
+    """
+    assumptions = {**DEFAULT_ASSUMPTIONS, **(assumptions or {})}
+    columns = profiles_to_columns(profiles) if isinstance(profiles, (list, tuple)) else {
+        k: np.asarray(v, dtype=np.float64) for k, v in profiles.items()
+    }
+    years_left = columns["retirement_age"] - columns["age"]
+    projected = project_savings(
+        columns["current_savings"], columns["income"], years_left,
+        savings_rate=assumptions["savings_rate"],
+        annual_return=assumptions["return_rate"],
+        contribution_growth=assumptions["contribution_growth"],
+    )
+    projected_real = projected / (1 + assumptions["inflation_rate"]) ** years_left
+    return {
+        "years_left": years_left,
+        "annual_contribution": columns["income"] * assumptions["savings_rate"],
+        "projected_savings": projected,
+        "projected_savings_real": projected_real,
+        "gap": columns["goal"] - projected,
+        "required_savings_rate": required_savings_rate(
+            columns["goal"], columns["current_savings"], columns["income"], years_left
+        ),
+        "benchmark_savings": benchmark_savings(columns["age"], columns["income"]),
+    }
@@ -0,0 +1,167 @@
+import argparse
+import fnmatch
+import hashlib
+import multiprocessing
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from modules import ann_index, rag_store
+from modules.bm25 import BM25Index
+
+DEFAULT_PATTERNS = ("*.txt", "*.md")
+DEFAULT_BATCH_SIZE = 256
+
+# ────────────────────────────────────────────────────────────────────────────────
+# 1. Source Discovery
+# ────────────────────────────────────────────────────────────────────────────────
+
+def iter_source_files(source_dir: str, patterns=DEFAULT_PATTERNS):
+    """Yield matching files under `source_dir` in a stable order (hidden dirs are skipped)."""
+    for root, dirs, files in os.walk(source_dir):
+        dirs[:] = sorted(d for d in dirs if not d.startswith("."))
+        for name in sorted(files):
+            if any(fnmatch.fnmatch(name, pattern) for pattern in patterns):
+                yield os.path.join(root, name)
+
+def corpus_fingerprint(source_dir: str, paths: list) -> str:
+    """Content fingerprint (relative path, SHA-256 of the bytes) so unchanged corpora skip
+    ingestion even when mtimes change (checkouts, copies), and edits are never missed."""
+    digest = hashlib.sha256()
+    for path in paths:
+        with open(path, "rb") as f:
+            content_hash = rag_store.sha256_bytes(f.read())
+        rel_path = os.path.relpath(path, source_dir)
+        digest.update(f"{rel_path}\0{content_hash}\n".encode("utf-8"))
+    return digest.hexdigest()
+
+# ────────────────────────────────────────────────────────────────────────────────
+# 2. Chunking (runs in worker processes)
+# ────────────────────────────────────────────────────────────────────────────────
+
+def _chunk_file(path: str, chunk_size: int, chunk_overlap: int) -> list:
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        text = f.read()
+    return rag_store.split_text(text, chunk_size, chunk_overlap)
+
+def iter_chunked_files(paths, workers: int, chunk_size: int, chunk_overlap: int):
+    """Yield (path, chunks) in input order while up to 2x`workers` files are chunked ahead."""
+    if workers <= 1:
+        for path in paths:
+            yield path, _chunk_file(path, chunk_size, chunk_overlap)
+        return
+
+    # spawn, not fork: the parent may already hold model threads and locks that fork would copy mid-use.
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        pending = deque()
+        for path in paths:
+            pending.append((path, pool.submit(_chunk_file, path, chunk_size, chunk_overlap)))
+            if len(pending) >= workers * 2:
+                done_path, future = pending.popleft()
+                yield done_path, future.result()
+        while pending:
+            done_path, future = pending.popleft()
+            yield done_path, future.result()
+
+# ────────────────────────────────────────────────────────────────────────────────
+# 3. Ingestion Pipeline
+# ────────────────────────────────────────────────────────────────────────────────
+
+def ingest_directory(
+    source_dir: str,
+    encode,
+    model_name: str,
+    index_dir: str = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    workers: int = None,
+    patterns=DEFAULT_PATTERNS,
+    chunk_size: int = rag_store.CHUNK_SIZE,
+    chunk_overlap: int = rag_store.CHUNK_OVERLAP,
+    progress=None,
+    index_settings: dict = None,
+):
+    """Chunk, embed and index every matching file under `source_dir`.
+
+    Files are chunked in a process pool and streamed back in order; chunks are
+    embedded `batch_size` at a time through `encode(list_of_texts)` and added to
+    the index as each batch completes. Previously seen chunks come from the
+    embedding cache. The FAISS index type comes from `index_settings` (see
+    modules.ann_index; IVF types are trained once enough vectors have
+    streamed in). A BM25 index over the same chunks is built at the end.
+    Returns (index, documents, bm25, stats); `progress(stats)` is called after
+    every batch.
+    """
+    start = time.perf_counter()
+    index_settings = index_settings or ann_index.settings_from_env()
+    index_dir = index_dir or rag_store.default_index_dir(source_dir)
+    workers = workers if workers is not None else (os.cpu_count() or 1)
+    paths = list(iter_source_files(source_dir, patterns))
+    manifest = rag_store.build_manifest(
+        corpus_fingerprint(source_dir, paths),
+        model_name,
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+        **ann_index.manifest_settings(index_settings),
+    )
+    stats = {"files": len(paths), "chunks": 0, "encoded": 0, "seconds": 0.0, "chunks_per_sec": 0.0,
+             "index_dir": index_dir, "loaded_from_disk": False}
+
+    stored = rag_store.load_index(index_dir, manifest)
+    if stored is not None:
+        index, documents, bm25 = stored
+        ann_index.configure(index, index_settings)
+        stats.update(chunks=len(documents), loaded_from_disk=True, seconds=time.perf_counter() - start)
+        return index, documents, bm25, stats
+
+    cache = rag_store.EmbeddingCache.load(index_dir, model_name)
+    builder = ann_index.IndexBuilder(index_settings)
+    documents = []
+    batch = []
+
+    def flush():
+        embeddings, n_encoded = cache.embed(batch, encode)
+        builder.add(embeddings)
+        documents.extend(batch)
+        batch.clear()
+
+        elapsed = time.perf_counter() - start
+        stats.update(chunks=len(documents), encoded=stats["encoded"] + n_encoded, seconds=elapsed,
+                     chunks_per_sec=len(documents) / elapsed if elapsed > 0 else 0.0)
+        if progress:
+            progress(dict(stats))
+
+    for _, chunks in iter_chunked_files(paths, workers, chunk_size, chunk_overlap):
+        for chunk in chunks:
+            batch.append(chunk)
+            if len(batch) >= batch_size:
+                flush()
+    if batch:
+        flush()
+    if not documents:
+        raise ValueError(f"No documents matching {patterns} found in {source_dir}")
+    index = builder.finish()
+
+    cache.prune(documents)
+    cache.save()
+    bm25 = BM25Index.build(documents)
+    rag_store.save_index(index_dir, index, documents, manifest, bm25)
+
+    elapsed = time.perf_counter() - start
+    stats.update(seconds=elapsed, chunks_per_sec=len(documents) / elapsed if elapsed > 0 else 0.0)
+    return index, documents, bm25, stats
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Index a directory of retirement documents for RAG.")
+    parser.add_argument("source_dir")
+    parser.add_argument("--index-dir", default=None)
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    from modules import retirement_planner
+
+    result = retirement_planner.process_retirement_corpus(
+        args.source_dir, index_dir=args.index_dir, batch_size=args.batch_size, workers=args.workers
+    )
+    print(result["message"])
@@ -0,0 +1,146 @@
+import hashlib
+import io
+import json
+import os
+
+import faiss
+import numpy as np
+
+from modules.bm25 import BM25Index
+from modules.utils import atomic_write_bytes, atomic_write_json
+
+# Bump when the on-disk layout changes so stale directories are rebuilt, not misread.
+STORE_VERSION = 2
+
+MANIFEST_FILE = "manifest.json"
+INDEX_FILE = "index.faiss"
+DOCUMENTS_FILE = "documents.json"
+EMBEDDINGS_FILE = "embeddings.npz"
+BM25_FILE = "bm25.npz"
+
+CHUNK_SIZE = 800
+CHUNK_OVERLAP = 200
+
+# ────────────────────────────────────────────────────────────────────────────────
+# 1. Paths, Hashing and Chunking
+# ────────────────────────────────────────────────────────────────────────────────
+
+def default_index_dir(source_path: str) -> str:
+    """Index directory stored next to the source, e.g. data/.retirement_facts.rag/"""
+    directory, filename = os.path.split(os.path.abspath(source_path))
+    stem = os.path.splitext(filename)[0]
+    return os.path.join(directory, f".{stem}.rag")
+
+def sha256_bytes(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+def chunk_hash(text: str) -> str:
+    return sha256_bytes(text.encode("utf-8"))
+
+def split_text(text: str, chunk_size: int = CHUNK_SIZE, chunk_overlap: int = CHUNK_OVERLAP) -> list:
+    from langchain_core.documents import Document
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+    text_splitter = RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+        separators=["\n\n", "\n", ".", "!", "?"],
+        length_function=len
+    )
+    doc = Document(page_content=text)
+    return [split.page_content for split in text_splitter.split_documents([doc])]
+
+# ────────────────────────────────────────────────────────────────────────────────
+# 2. Embedding Cache (chunk hash -> vector)
+# ────────────────────────────────────────────────────────────────────────────────
+
+class EmbeddingCache:
+    """Embeddings keyed by chunk hash, scoped to a single embedding model.
+
+    The model name is stored alongside the vectors; loading the cache for a
+    different model returns an empty cache, so switching models can never mix
+    vectors from two embedding spaces.
+    """
+
+    def __init__(self, path: str, model_name: str):
+        self.path = path
+        self.model_name = model_name
+        self.vectors = {}
+
+    @classmethod
+    def load(cls, index_dir: str, model_name: str) -> "EmbeddingCache":
+        cache = cls(os.path.join(index_dir, EMBEDDINGS_FILE), model_name)
+        if not os.path.exists(cache.path):
+            return cache
+        try:
+            with np.load(cache.path, allow_pickle=False) as data:
+                if str(data["model"]) != model_name:
+                    return cache
+                cache.vectors = dict(zip(data["hashes"].tolist(), data["vectors"]))
+        except Exception as e:
+            print(f"Ignoring unreadable embedding cache {cache.path}: {e}")
+        return cache
+
+    def embed(self, texts: list, encode) -> tuple:
+        """Return (embeddings, n_encoded), calling `encode` only for unseen chunks."""
+        hashes = [chunk_hash(text) for text in texts]
+        missing = list(dict.fromkeys(h for h in hashes if h not in self.vectors))
+        if missing:
+            text_by_hash = dict(zip(hashes, texts))
+            fresh = np.asarray(encode([text_by_hash[h] for h in missing]), dtype=np.float32)
+            self.vectors.update(zip(missing, fresh))
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32), 0
+        return np.stack([self.vectors[h] for h in hashes]).astype(np.float32, copy=False), len(missing)
+
+    def prune(self, keep_texts: list):
+        keep = {chunk_hash(text) for text in keep_texts}
+        self.vectors = {h: v for h, v in self.vectors.items() if h in keep}
+
+    def save(self):
+        hashes = list(self.vectors)
+        vectors = np.stack([self.vectors[h] for h in hashes]) if hashes else np.empty((0, 0), np.float32)
+        buf = io.BytesIO()
+        np.savez(buf, model=np.array(self.model_name), hashes=np.array(hashes, dtype="U64"), vectors=vectors)
+        atomic_write_bytes(self.path, buf.getvalue())
+
+# ────────────────────────────────────────────────────────────────────────────────
+# 3. Index + Document Store Persistence (dense FAISS + sparse BM25)
+# ────────────────────────────────────────────────────────────────────────────────
+
+def build_manifest(source_sha256: str, model_name: str, **settings) -> dict:
+    return {"version": STORE_VERSION, "source_sha256": source_sha256, "model": model_name, **settings}
+
+def load_index(index_dir: str, expected_manifest: dict):
+    """Return (index, documents, bm25) if the stored index matches `expected_manifest`, else None."""
+    manifest_path = os.path.join(index_dir, MANIFEST_FILE)
+    if not os.path.exists(manifest_path):
+        return None
+    try:
+        with open(manifest_path, "r") as f:
+            manifest = json.load(f)
+        if any(manifest.get(k) != v for k, v in expected_manifest.items()):
+            return None
+        with open(os.path.join(index_dir, DOCUMENTS_FILE), "r", encoding="utf-8") as f:
+            documents = json.load(f)
+        index = faiss.read_index(os.path.join(index_dir, INDEX_FILE))
+        bm25 = BM25Index.from_file(os.path.join(index_dir, BM25_FILE))
+    except Exception as e:
+        print(f"Ignoring unreadable index in {index_dir}: {e}")
+        return None
+    if index.ntotal != len(documents) or bm25.n_docs != len(documents) or manifest.get("chunks") != len(documents):
+        return None
+    return index, documents, bm25
+
+def save_index(index_dir: str, index, documents: list, manifest: dict, bm25: BM25Index = None):
+    """Persist both indexes and the documents; the manifest is written last and acts as the commit marker.
+
+    The BM25 index is built from `documents` when not given, so the dense and
+    sparse indexes on disk always describe the same chunks.
+    """
+    bm25 = bm25 if bm25 is not None else BM25Index.build(documents)
+    os.makedirs(index_dir, exist_ok=True)
+    atomic_write_bytes(os.path.join(index_dir, INDEX_FILE), faiss.serialize_index(index).tobytes())
+    atomic_write_bytes(os.path.join(index_dir, BM25_FILE), bm25.to_bytes())
+    atomic_write_json(os.path.join(index_dir, DOCUMENTS_FILE), documents)
+    atomic_write_json(os.path.join(index_dir, MANIFEST_FILE), {**manifest, "chunks": len(documents)}, indent=2)
@@ -0,0 +1,138 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+# Candidates past the first `top_n` are only reranked while they stay this close
+# to the best retrieval score: dense similarity within RERANK_DENSE_CUTOFF of the
+# best, or BM25 score at least RERANK_SPARSE_CUTOFF times the best.
+DEFAULT_DENSE_CUTOFF = 0.2
+DEFAULT_SPARSE_CUTOFF = 0.3
+# Skip the cross-encoder when the dense top_n lead the rest by this much similarity.
+DEFAULT_SKIP_MARGIN = 0.1
+DEFAULT_CACHE_SIZE = 4096
+
+def _digest(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+class Reranker:
+    """Cross-encoder reranking that avoids model calls where it can.
+
+    Each candidate is (text, dense similarity or None, BM25 score or None) in
+    retrieval order. Per query:
+
+    1. early cutoff: weak tail candidates (see the cutoffs above) are dropped;
+       if only `top_n` remain the reranker could only reorder them, so it is
+       skipped;
+    2. decisive margin: if the first `top_n` candidates are also the best
+       `top_n` by dense similarity and beat every other candidate by
+       `skip_margin`, retrieval order is kept;
+    3. otherwise (query, chunk) scores come from an LRU cache and only the
+       misses are sent to `predict` in one batch.
+    """
+
+    def __init__(self, cache_size: int = DEFAULT_CACHE_SIZE, adaptive: bool = True,
+                 skip_margin: float = DEFAULT_SKIP_MARGIN, dense_cutoff: float = DEFAULT_DENSE_CUTOFF,
+                 sparse_cutoff: float = DEFAULT_SPARSE_CUTOFF):
+        self.cache_size = cache_size
+        self.adaptive = adaptive
+        self.skip_margin = skip_margin
+        self.dense_cutoff = dense_cutoff
+        self.sparse_cutoff = sparse_cutoff
+        self._scores = OrderedDict()  # (query digest, chunk digest) -> score
+        self._lock = threading.Lock()
+        self._stats = {"queries": 0, "reranked": 0, "skipped_cutoff": 0, "skipped_margin": 0, "fully_cached": 0,
+                       "pairs_scored": 0, "pairs_cached": 0, "candidates_cut": 0}
+
+    @classmethod
+    def from_env(cls) -> "Reranker":
+        return cls(
+            cache_size=int(os.getenv("RERANK_CACHE_SIZE", str(DEFAULT_CACHE_SIZE))),
+            adaptive=os.getenv("RERANK_ADAPTIVE", "1") != "0",
+            skip_margin=float(os.getenv("RERANK_SKIP_MARGIN", str(DEFAULT_SKIP_MARGIN))),
+            dense_cutoff=float(os.getenv("RERANK_DENSE_CUTOFF", str(DEFAULT_DENSE_CUTOFF))),
+            sparse_cutoff=float(os.getenv("RERANK_SPARSE_CUTOFF", str(DEFAULT_SPARSE_CUTOFF))),
+        )
+
+    def _count(self, **increments):
+        with self._lock:
+            for name, value in increments.items():
+                self._stats[name] += value
+
+    def _cut(self, candidates: list, top_n: int) -> list:
+        dense = [c[1] for c in candidates if c[1] is not None]
+        sparse = [c[2] for c in candidates if c[2] is not None]
+        best_dense = max(dense) if dense else None
+        best_sparse = max(sparse) if sparse else None
+
+        def strong(candidate):
+            _, dense_score, sparse_score = candidate
+            return ((dense_score is not None and dense_score >= best_dense - self.dense_cutoff)
+                    or (sparse_score is not None and sparse_score > 0 and sparse_score >= self.sparse_cutoff * best_sparse))
+
+        return candidates[:top_n] + [c for c in candidates[top_n:] if strong(c)]
+
+    def _decisive(self, candidates: list, top_n: int) -> bool:
+        head, tail = candidates[:top_n], candidates[top_n:]
+        if self.skip_margin <= 0 or any(c[1] is None for c in head):
+            return False
+        weakest_head = min(c[1] for c in head)
+        tail_dense = [c[1] for c in tail if c[1] is not None]
+        # A tail candidate with no dense score came from BM25 alone: retrievers disagree.
+        if len(tail_dense) < len(tail):
+            return False
+        return weakest_head - max(tail_dense) >= self.skip_margin
+
+    def rerank(self, query: str, candidates: list, top_n: int, predict) -> list:
+        """Texts of the best `top_n` candidates; `predict(pairs)` is the cross-encoder."""
+        self._count(queries=1)
+        if self.adaptive:
+            kept = self._cut(candidates, top_n)
+            self._count(candidates_cut=len(candidates) - len(kept))
+            candidates = kept
+            if len(candidates) <= top_n:
+                self._count(skipped_cutoff=1)
+                return [c[0] for c in candidates]
+            if self._decisive(candidates, top_n):
+                self._count(skipped_margin=1)
+                return [c[0] for c in candidates[:top_n]]
+
+        query_key = _digest(query)
+        keys = [(query_key, _digest(c[0])) for c in candidates]
+        scores = [None] * len(candidates)
+        if self.cache_size > 0:
+            with self._lock:
+                for i, key in enumerate(keys):
+                    score = self._scores.get(key)
+                    if score is not None:
+                        self._scores.move_to_end(key)
+                        scores[i] = score
+        missing = [i for i, score in enumerate(scores) if score is None]
+        if missing:
+            fresh = predict([(query, candidates[i][0]) for i in missing])
+            for i, score in zip(missing, fresh):
+                scores[i] = float(score)
+            if self.cache_size > 0:
+                with self._lock:
+                    for i in missing:
+                        self._scores[keys[i]] = scores[i]
+                    while len(self._scores) > self.cache_size:
+                        self._scores.popitem(last=False)
+        self._count(reranked=1, fully_cached=int(not missing), pairs_scored=len(missing),
+                    pairs_cached=len(candidates) - len(missing))
+
+        order = sorted(range(len(candidates)), key=lambda i: scores[i], reverse=True)
+        return [candidates[i][0] for i in order[:top_n]]
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats.update(cache_entries=len(self._scores), cache_size=self.cache_size, adaptive=self.adaptive)
+        stats["rerank_calls_avoided"] = stats["skipped_cutoff"] + stats["skipped_margin"] + stats["fully_cached"]
+        pairs = stats["pairs_scored"] + stats["pairs_cached"]
+        stats["pair_hit_rate"] = stats["pairs_cached"] / pairs if pairs else 0.0
+        return stats
+
+    def clear(self):
+        with self._lock:
+            self._scores.clear()
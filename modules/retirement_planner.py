@@ -1,27 +1,31 @@
-import uuid
-from datetime import datetime
+import asyncio
 import os
 import json
+import threading
+import time
 import faiss
 import numpy as np
 import ollama
-from sentence_transformers import SentenceTransformer, CrossEncoder
-from langchain_core.documents import Document
-from langchain_text_splitters import RecursiveCharacterTextSplitter
 from jinja2 import Template
-from fastapi import APIRouter, Request
-from pydantic import BaseModel
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
 from typing import Optional
 from modules.utils import clean_rag_facts
+from modules import ann_index, inference_backend, llm_client, metrics, profile_store, projection, rag_ingest, rag_store, scenario_simulator
+from modules.bm25 import BM25Index, reciprocal_rank_fusion
+from modules.batching import LRUCache, MicroBatcher
+from modules.plan_cache import PlanCache
+from modules.rerank import Reranker
 import random
 
 router = APIRouter(prefix="/api/retirement")
 
 class RetirementInput(BaseModel):
-    age: int
+    age: int = Field(ge=0, le=120)
     currentSavings: float
     income: float
-    retirementAge: int
+    retirementAge: int = Field(ge=0, le=120)
     retirementSavingsGoal: float
     gender: Optional[str] = None
     currentJob: Optional[str] = None
@@ -36,54 +40,297 @@ class RetirementInput(BaseModel):
     insurancePayment: Optional[float] = None
     hasInvestment: Optional[str] = "no"
     investmentAmount: Optional[float] = None
+class SimulationInput(RetirementInput):
+    savingsRate: Optional[float] = None
+    meanReturn: Optional[float] = None
+    volatility: Optional[float] = None
+    contributionGrowth: Optional[float] = None
+    inflationRate: Optional[float] = None
+    paths: Optional[int] = None
+    seed: Optional[int] = None
+
 # ────────────────────────────────────────────────────────────────────────────────
 # 1. Models and Index Setup
 # ────────────────────────────────────────────────────────────────────────────────
 
-embedding_model = SentenceTransformer("all-MiniLM-L6-v2")
-cross_encoder = CrossEncoder("cross-encoder/ms-marco-MiniLM-L-6-v2")
-
-index = faiss.IndexFlatL2(384)
+EMBEDDING_MODEL_NAME = "all-MiniLM-L6-v2"
+CROSS_ENCODER_MODEL_NAME = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+EMBED_BATCH_SIZE = 64
+
+RAG_SOURCE_PATH = "data/retirement_facts.txt"
+# Directory of fact sheets / publications to serve instead of RAG_SOURCE_PATH
+# (indexed with modules.rag_ingest; `python -m modules.rag_ingest <dir>` prebuilds it).
+# RAG_INDEX_DIR overrides where the index is kept; match the CLI's --index-dir.
+RAG_CORPUS_DIR = os.getenv("RAG_CORPUS_DIR") or None
+RAG_INDEX_DIR = os.getenv("RAG_INDEX_DIR") or None
+# Hybrid retrieval: BM25 and dense candidates are fused with reciprocal-rank
+# fusion before reranking. RAG_RETRIEVAL_POOL is how deep each list is read.
+RAG_HYBRID = os.getenv("RAG_HYBRID", "1") != "0"
+RAG_RETRIEVAL_POOL = int(os.getenv("RAG_RETRIEVAL_POOL", "20"))
+# Fused candidates handed to the cross-encoder per query. On the fact sheet's
+# labeled queries (benchmarks.eval_retrieval) BM25 alone has every answer in
+# its top 5, so 5 keeps recall while scoring fewer pairs than 8.
+RAG_RERANK_K = int(os.getenv("RAG_RERANK_K", "5"))
+# torch (fp32) / onnx / onnx-int8 model backend and intra-op threads (see modules.inference_backend).
+INFERENCE_SETTINGS = inference_backend.settings_from_env()
+# FAISS index type and IVF / PQ / HNSW parameters (see modules.ann_index).
+INDEX_SETTINGS = ann_index.settings_from_env()
+# Concurrent queries share embedding / cross-encoder forward passes (modules.batching).
+INFERENCE_BATCHING = os.getenv("INFERENCE_BATCHING", "1") != "0"
+INFERENCE_MAX_BATCH_SIZE = int(os.getenv("INFERENCE_MAX_BATCH_SIZE", "32"))
+INFERENCE_MAX_WAIT_MS = float(os.getenv("INFERENCE_MAX_WAIT_MS", "3"))
+QUERY_EMBEDDING_CACHE_SIZE = int(os.getenv("QUERY_EMBEDDING_CACHE_SIZE", "1024"))
+MONTE_CARLO_PATHS = int(os.getenv("MONTE_CARLO_PATHS", "10000"))
+MONTE_CARLO_SEED = int(os.getenv("MONTE_CARLO_SEED", "42"))
+
+# Models are loaded on first use (or by `warm_up`) so importing this module
+# stays cheap for the Flask services, scripts and tests.
+_embedding_model = None
+_cross_encoder = None
+_model_lock = threading.Lock()
+_index_lock = threading.Lock()
+_index_ready = False
+_warmup_state = {"ready": False, "in_progress": False, "timings": {}, "error": None}
+
+index = ann_index.build_index(np.empty((0, 384), dtype=np.float32), INDEX_SETTINGS)
 document_store = []
+bm25_index = BM25Index.build([])
+
+# Generated narratives keyed by the canonicalized plan_data (see modules.plan_cache).
+plan_cache = PlanCache.from_env()
+# Cross-encoder scores and skip/cutoff counters (see modules.rerank).
+reranker = Reranker.from_env()
+
+def get_embedding_model():
+    global _embedding_model
+    if _embedding_model is None:
+        with _model_lock:
+            if _embedding_model is None:
+                _embedding_model = inference_backend.load_embedding_model(EMBEDDING_MODEL_NAME, INFERENCE_SETTINGS)
+    return _embedding_model
+
+def get_cross_encoder():
+    global _cross_encoder
+    if _cross_encoder is None:
+        with _model_lock:
+            if _cross_encoder is None:
+                _cross_encoder = inference_backend.load_cross_encoder(CROSS_ENCODER_MODEL_NAME, INFERENCE_SETTINGS)
+    return _cross_encoder
 
 # ────────────────────────────────────────────────────────────────────────────────
 # 2. Load and Index `.txt` File (RAG Context)
 # ────────────────────────────────────────────────────────────────────────────────
 
-def process_retirement_text(file_path="data/retirement_facts.txt"):
-    with open(file_path, "r", encoding="utf-8") as f:
-        text = f.read()
+def encode_texts(texts: list):
+    return get_embedding_model().encode(texts, batch_size=EMBED_BATCH_SIZE, convert_to_numpy=True)
+
+def predict_pairs(pairs: list):
+    return get_cross_encoder().predict(pairs)
+
+embedding_batcher = MicroBatcher(encode_texts, INFERENCE_MAX_BATCH_SIZE, INFERENCE_MAX_WAIT_MS, name="embedding")
+rerank_batcher = MicroBatcher(predict_pairs, INFERENCE_MAX_BATCH_SIZE, INFERENCE_MAX_WAIT_MS, name="rerank")
+query_embeddings = LRUCache(QUERY_EMBEDDING_CACHE_SIZE)
+
+def embed_query(prompt: str) -> np.ndarray:
+    """Embedding of one query: LRU-cached, and batched with concurrent queries when enabled."""
+    vector = query_embeddings.get(prompt)
+    if vector is None:
+        vector = embedding_batcher.map([prompt])[0] if INFERENCE_BATCHING else encode_texts([prompt])[0]
+        vector = ann_index.normalize(vector)[0]
+        vector.setflags(write=False)
+        query_embeddings.put(prompt, vector)
+    return vector
+
+def score_pairs(pairs: list):
+    return rerank_batcher.map(pairs) if INFERENCE_BATCHING else predict_pairs(pairs)
+
+@metrics.span("retirement", "index_load")
+def process_retirement_text(file_path=RAG_SOURCE_PATH, index_dir=None):
+    """Index `file_path`, reusing the persisted index/embeddings when nothing changed.
+
+    The index and document store live in `index_dir` (default: a hidden
+    directory next to the source file). A warm start with an unchanged source
+    only reads the stored index; otherwise the file is re-split and only
+    chunks missing from the embedding cache are re-encoded.
+    """
+    global index, bm25_index, _index_ready
+    index_dir = index_dir or rag_store.default_index_dir(file_path)
+    file_name = os.path.basename(file_path)
+
+    with open(file_path, "rb") as f:
+        raw = f.read()
+    manifest = rag_store.build_manifest(
+        rag_store.sha256_bytes(raw),
+        EMBEDDING_MODEL_NAME,
+        chunk_size=rag_store.CHUNK_SIZE,
+        chunk_overlap=rag_store.CHUNK_OVERLAP,
+        **ann_index.manifest_settings(INDEX_SETTINGS),
+    )
+
+    stored = rag_store.load_index(index_dir, manifest)
+    if stored is not None:
+        index, documents, bm25_index = stored
+        ann_index.configure(index, INDEX_SETTINGS)
+        document_store[:] = documents
+        _index_ready = True
+        return {"message": f"Loaded {len(documents)} indexed chunks for {file_name} from {index_dir}"}
+
+    texts = rag_store.split_text(raw.decode("utf-8"))
+    cache = rag_store.EmbeddingCache.load(index_dir, EMBEDDING_MODEL_NAME)
+    embeddings, n_encoded = cache.embed(texts, encode_texts)
 
-    text_splitter = RecursiveCharacterTextSplitter(
-        chunk_size=800,
-        chunk_overlap=200,
-        separators=["\n\n", "\n", ".", "!", "?"],
-        length_function=len
+    index = ann_index.build_index(embeddings, INDEX_SETTINGS)
+    bm25_index = BM25Index.build(texts)
+    document_store[:] = texts
+    _index_ready = True
+
+    try:
+        cache.prune(texts)
+        cache.save()
+        rag_store.save_index(index_dir, index, texts, manifest, bm25_index)
+    except OSError as e:
+        print(f"Could not persist RAG index to {index_dir}: {e}")
+    return {"message": f"Indexed {len(texts)} chunks from {file_name} ({n_encoded} newly embedded)"}
+
+@metrics.span("retirement", "index_load")
+def process_retirement_corpus(source_dir, index_dir=None, batch_size=rag_ingest.DEFAULT_BATCH_SIZE, workers=None):
+    """Index every fact sheet / publication under `source_dir` (see modules.rag_ingest)."""
+    global index, bm25_index, _index_ready
+
+    def encode(texts):
+        return get_embedding_model().encode(texts, batch_size=batch_size, convert_to_numpy=True)
+
+    new_index, documents, new_bm25, stats = rag_ingest.ingest_directory(
+        source_dir, encode, EMBEDDING_MODEL_NAME, index_dir=index_dir, batch_size=batch_size, workers=workers,
+        index_settings=INDEX_SETTINGS,
     )
-    doc = Document(page_content=text)
-    splits = text_splitter.split_documents([doc])
+    index = new_index
+    bm25_index = new_bm25
+    document_store[:] = documents
+    _index_ready = True
+    if stats["loaded_from_disk"]:
+        return {"message": f"Loaded {stats['chunks']} indexed chunks from {stats['index_dir']}", "stats": stats}
+    return {
+        "message": f"Indexed {stats['chunks']} chunks from {stats['files']} files "
+                   f"({stats['encoded']} newly embedded, {stats['chunks_per_sec']:.1f} chunks/s)",
+        "stats": stats,
+    }
+
+def ensure_index(file_path=RAG_SOURCE_PATH, corpus_dir=RAG_CORPUS_DIR):
+    """Load (or build) the default index once; later calls are a no-op.
+
+    With `corpus_dir` (RAG_CORPUS_DIR) the directory corpus is served instead of `file_path`.
+    """
+    if _index_ready:
+        return
+    with _index_lock:
+        if not _index_ready:
+            if corpus_dir:
+                print(process_retirement_corpus(corpus_dir, index_dir=RAG_INDEX_DIR)["message"])
+            else:
+                print(process_retirement_text(file_path, index_dir=RAG_INDEX_DIR)["message"])
+
+# ────────────────────────────────────────────────────────────────────────────────
+# 2.5. Warm-up and Readiness
+# ────────────────────────────────────────────────────────────────────────────────
+
+def warm_up(file_path=RAG_SOURCE_PATH, corpus_dir=RAG_CORPUS_DIR) -> dict:
+    """Load both models and the index and run one dummy query through each.
+
+    Safe to call repeatedly and from several threads. The first run's per-step
+    timings (seconds) are reported by `readiness` so cold-start cost can be
+    measured.
+    """
+    _warmup_state.update(in_progress=True, error=None)
+    timings = {}
+    start = time.perf_counter()
+    try:
+        step = time.perf_counter()
+        get_embedding_model()
+        timings["embedding_model"] = time.perf_counter() - step
 
-    embeddings = [embedding_model.encode(split.page_content) for split in splits]
-    index.add(np.array(embeddings, dtype=np.float32))
-    document_store.extend([split.page_content for split in splits])
-    return {"message": f"Indexed {len(splits)} chunks from retirement_fact.txt"}
+        step = time.perf_counter()
+        get_cross_encoder()
+        timings["cross_encoder"] = time.perf_counter() - step
+
+        step = time.perf_counter()
+        ensure_index(file_path, corpus_dir)
+        timings["index"] = time.perf_counter() - step
+
+        step = time.perf_counter()
+        retrieve_with_rerank("retirement savings rate", k=2, top_n=1)
+        timings["first_query"] = time.perf_counter() - step
+    except Exception as e:
+        print(f"Warm-up failed: {e}")
+        _warmup_state.update(in_progress=False, error=str(e))
+        raise
+    timings["total"] = time.perf_counter() - start
+    # Keep the first (cold) timings; repeat calls only confirm readiness.
+    if not _warmup_state["ready"]:
+        _warmup_state["timings"] = timings
+    _warmup_state.update(ready=True, in_progress=False)
+    return readiness()
+
+def readiness() -> dict:
+    return {
+        "ready": _warmup_state["ready"],
+        "in_progress": _warmup_state["in_progress"],
+        "embedding_model_loaded": _embedding_model is not None,
+        "cross_encoder_loaded": _cross_encoder is not None,
+        "inference_backend": {
+            "configured": INFERENCE_SETTINGS["backend"],
+            "embedding": inference_backend.loaded_backends.get(EMBEDDING_MODEL_NAME),
+            "cross_encoder": inference_backend.loaded_backends.get(CROSS_ENCODER_MODEL_NAME),
+        },
+        "indexed_chunks": len(document_store),
+        "warmup_seconds": _warmup_state["timings"],
+        "error": _warmup_state["error"],
+    }
 
 # ────────────────────────────────────────────────────────────────────────────────
 # 3. Semantic Search + Reranking
 # ────────────────────────────────────────────────────────────────────────────────
 
-def retrieve_with_rerank(prompt: str, k=8, top_n=3) -> str:
-    if not document_store:
-        return "No documents indexed."
+def dense_similarity(distances: np.ndarray) -> np.ndarray:
+    """FAISS scores as cosine similarity (indexed vectors are unit length, so L2^2 = 2 - 2 cos)."""
+    if index.metric_type == faiss.METRIC_INNER_PRODUCT:
+        return distances
+    return 1.0 - distances / 2.0
 
-    query_embedding = embedding_model.encode([prompt])[0]
-    D, I = index.search(np.array([query_embedding], dtype=np.float32), k)
-    candidates = [document_store[i] for i in I[0] if i < len(document_store)]
+def search_candidates(prompt: str, k=8, hybrid=None, pool=None) -> tuple:
+    """(chunk indices, {index: dense similarity}, {index: BM25 score}) for the `k` best chunks, best first.
 
-    pairs = [(prompt, doc) for doc in candidates]
-    scores = cross_encoder.predict(pairs)
+    Dense-only when hybrid is off; otherwise the top `pool` FAISS and BM25
+    hits are merged with reciprocal-rank fusion, so exact terms ("401(k)",
+    "$23,000") that embeddings blur still reach the reranker.
+    """
+    hybrid = RAG_HYBRID if hybrid is None else hybrid
+    pool = max(k, pool or RAG_RETRIEVAL_POOL) if hybrid else k
+    with metrics.span("retirement", "embed"):
+        query_embedding = embed_query(prompt)
+    with metrics.span("retirement", "faiss_search"):
+        D, I = index.search(np.array([query_embedding], dtype=np.float32), min(pool, len(document_store)))
+    dense = {int(i): float(s) for i, s in zip(I[0], dense_similarity(D[0])) if 0 <= i < len(document_store)}
+    if not hybrid:
+        return list(dense)[:k], dense, {}
+    with metrics.span("retirement", "bm25_search"):
+        ids, scores = bm25_index.search(prompt, pool)
+    sparse = dict(zip(ids.tolist(), scores.tolist()))
+    return reciprocal_rank_fusion([list(dense), list(sparse)])[:k], dense, sparse
+
+def retrieve_candidates(prompt: str, k=8, hybrid=None, pool=None) -> list:
+    return search_candidates(prompt, k, hybrid, pool)[0]
+
+def retrieve_with_rerank(prompt: str, k=None, top_n=3) -> str:
+    k = max(k or RAG_RERANK_K, top_n)
+    ensure_index()
+    if not document_store:
+        return "No documents indexed."
 
-    top_docs = [doc for doc, _ in sorted(zip(candidates, scores), key=lambda x: x[1], reverse=True)][:top_n]
+    ids, dense, sparse = search_candidates(prompt, k)
+    candidates = [(document_store[i], dense.get(i), sparse.get(i)) for i in ids]
+    with metrics.span("retirement", "rerank"):
+        top_docs = reranker.rerank(prompt, candidates, top_n, score_pairs)
     return "\n\n".join(top_docs)
 
 # ────────────────────────────────────────────────────────────────────────────────
@@ -136,6 +383,7 @@ def format_user_data(user_input):
 # 6. Prompt Generator: User + JSON + RAG
 # ────────────────────────────────────────────────────────────────────────────────
 
+@metrics.span("retirement", "prompt_render")
 def create_prompt(user_data: dict, json_facts: str, rag_context: str) -> tuple[str, str]:
     system_prompt = "You are a retirement planning assistant. Use structured facts, retrieved context, and user input."
 
@@ -170,10 +418,13 @@ def create_prompt(user_data: dict, json_facts: str, rag_context: str) -> tuple[s
 # 7. Call Ollama
 # ────────────────────────────────────────────────────────────────────────────────
 
+OLLAMA_FAILURE_MESSAGE = "Ollama failed to generate a response."
+
+@metrics.span("retirement", "llm")
 def call_ollama(system_prompt, user_prompt):
     try:
         response = ollama.chat(
-            model="mistral:7b",
+            model=llm_client.DEFAULT_MODEL,
             messages=[
                 {"role": "system", "content": system_prompt},
                 {"role": "user", "content": user_prompt}
@@ -182,7 +433,19 @@ def call_ollama(system_prompt, user_prompt):
         return response["message"]["content"]
     except Exception as e:
         print("❌ Ollama call failed:", e)
-        return "Ollama failed to generate a response."
+        return OLLAMA_FAILURE_MESSAGE
+
+@metrics.span("retirement", "llm")
+async def call_ollama_async(system_prompt, user_prompt):
+    """Async `call_ollama` through the pooled, concurrency-limited client."""
+    try:
+        return await llm_client.default_client.chat([
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt}
+        ])
+    except llm_client.LLMError as e:
+        print("❌ Ollama call failed:", e)
+        return OLLAMA_FAILURE_MESSAGE
 # ────────────────────────────────────────────────────────────────────────────────
 # 7.5. Helpers (optional)
 # ────────────────────────────────────────────────────────────────────────────────
@@ -287,7 +550,12 @@ def generate_mortgage_section(user_input):
 # 8. Generate Retirement Plan
 # ────────────────────────────────────────────────────────────────────────────────
 
-def create_retirement_plan(user_input: dict):
+@metrics.span("retirement", "plan_data")
+def build_plan_data(user_input: dict, assumptions: dict = None) -> dict:
+    """Compute every plan metric in Python; the LLM only writes the narrative.
+
+    `assumptions` overrides entries of projection.DEFAULT_ASSUMPTIONS.
+    """
     # Extract and calculate all metrics using Python
     current_age = int(user_input.get('age', 0))
     retirement_age = int(user_input.get('retirementAge', 0))
@@ -301,36 +569,41 @@ def create_retirement_plan(user_input: dict):
     has_investment = user_input.get('hasInvestment', 'no') == 'yes'
     investment_amount = float(user_input.get('investmentAmount', 0))
     
-    # Calculate all metrics
+    # Calculate all metrics (closed-form, see modules.projection)
+    assumptions = {**projection.DEFAULT_ASSUMPTIONS, **(assumptions or {})}
     years_left = retirement_age - current_age
-    annual_contribution = income * 0.15
-    annual_return = 0.065
+    if years_left > scenario_simulator.MAX_YEARS:
+        raise ValueError(f"Retirement age must be within {scenario_simulator.MAX_YEARS} years of the current age")
+    annual_contribution = income * assumptions["savings_rate"]
+    annual_return = assumptions["return_rate"]
     
     # Projected savings calculation
-    projected_savings = current_savings * (1 + annual_return) ** years_left
-    for year in range(years_left):
-        projected_savings += annual_contribution * (1 + annual_return) ** (years_left - year - 1)
+    projected_savings = float(projection.project_savings(
+        current_savings, income, years_left,
+        savings_rate=assumptions["savings_rate"],
+        annual_return=annual_return,
+        contribution_growth=assumptions["contribution_growth"],
+    ))
+    projected_savings_real = projected_savings / (1 + assumptions["inflation_rate"]) ** years_left
     
     # Calculate gap and required savings rate
     gap = goal - projected_savings
-    required_savings_rate = (goal - current_savings) / (income * years_left)
-    required_savings_rate = min(max(required_savings_rate, 0.15), 0.50)
+    required_savings_rate = float(projection.required_savings_rate(goal, current_savings, income, years_left))
     
     # Calculate benchmarks
-    age_benchmarks = {
-        30: 1.0,
-        35: 2.0,
-        40: 3.0,
-        45: 4.0,
-        50: 6.0,
-        55: 7.0,
-        60: 8.0,
-        65: 10.0
-    }
+    benchmark_savings = float(projection.benchmark_savings(current_age, income))
     
-    benchmark_age = min(age_benchmarks.keys(), key=lambda x: abs(x - current_age))
-    benchmark_multiplier = age_benchmarks[benchmark_age]
-    benchmark_savings = income * benchmark_multiplier
+    # Monte Carlo view of the same assumptions (seeded, so identical profiles get identical plans)
+    simulation = scenario_simulator.run_simulation(
+        current_savings, income, years_left, goal,
+        savings_rate=assumptions["savings_rate"],
+        mean_return=annual_return,
+        volatility=assumptions["return_volatility"],
+        contribution_growth=assumptions["contribution_growth"],
+        inflation_rate=assumptions["inflation_rate"],
+        n_paths=MONTE_CARLO_PATHS,
+        seed=MONTE_CARLO_SEED,
+    )
     
     # Calculate percentages for context
     mortgage_percentage = mortgage_amount/income*100 if has_mortgage else 0
@@ -350,11 +623,14 @@ def create_retirement_plan(user_input: dict):
         },
         "financial_metrics": {
             "projected_savings": projected_savings,
+            "projected_savings_today_dollars": projected_savings_real,
             "gap_to_goal": gap,
             "required_savings_rate": required_savings_rate,
             "benchmark_savings": benchmark_savings,
             "annual_contribution": annual_contribution,
-            "annual_return": annual_return
+            "annual_return": annual_return,
+            "success_probability": simulation["success_probability"],
+            "simulated_final_balance_percentiles": simulation["final_percentiles"]
         },
         "assets": {
             "has_mortgage": has_mortgage,
@@ -365,19 +641,27 @@ def create_retirement_plan(user_input: dict):
             "investment_percentage": investment_percentage
         },
         "assumptions": {
-            "savings_rate": 0.15,
-            "return_rate": 0.065,
-            "inflation_rate": 0.03
-        }
+            "savings_rate": assumptions["savings_rate"],
+            "return_rate": assumptions["return_rate"],
+            "inflation_rate": assumptions["inflation_rate"],
+            "contribution_growth": assumptions["contribution_growth"],
+            "return_volatility": assumptions["return_volatility"]
+        },
+        # Full simulation (per-year bands) for the API response; left out of the LLM prompt.
+        "monte_carlo": simulation
     }
-    
+    return plan_data
+
+@metrics.span("retirement", "prompt_render")
+def build_plan_prompts(plan_data: dict) -> tuple[str, str]:
+    prompt_data = {k: v for k, v in plan_data.items() if k != "monte_carlo"}
     # Create prompt for LLM
     system_prompt = """You are a retirement planning expert. Create a personalized retirement plan using the provided data.
     The plan should be conversational, supportive, and actionable. Include specific numbers and percentages.
     Structure the response with clear sections using markdown formatting."""
     
     user_prompt = f"""Create a retirement plan using this data:
-    {json.dumps(plan_data, indent=2)}
+    {json.dumps(prompt_data, indent=2)}
     
     Guidelines:
     1. Start with a personalized introduction mentioning age, job, and current savings
@@ -410,36 +694,69 @@ def create_retirement_plan(user_input: dict):
     
     ### 🌟 Final Thoughts
     [Motivational closing]"""
-    
-    # Call LLM to generate the narrative
+    return system_prompt, user_prompt
+
+def plan_response(plan: str, plan_data: dict) -> dict:
+    plan_metrics = plan_data["financial_metrics"]
+    return {
+        "plan": plan,
+        "projected_savings": plan_metrics["projected_savings"],
+        "years_left": plan_data["user_profile"]["years_until_retirement"],
+        "gap": plan_metrics["gap_to_goal"],
+        "required_savings_rate": plan_metrics["required_savings_rate"],
+        "monte_carlo": plan_data.get("monte_carlo"),
+        "status": "success"
+    }
+
+def is_cacheable_plan(plan: str) -> bool:
+    return bool(plan) and plan != OLLAMA_FAILURE_MESSAGE
+
+def create_retirement_plan(user_input: dict):
+    plan_data = build_plan_data(user_input)
+
+    def generate():
+        system_prompt, user_prompt = build_plan_prompts(plan_data)
+        return call_ollama(system_prompt, user_prompt)
+
+    # Call LLM to generate the narrative (identical profiles share one generation)
     try:
-        llm_response = call_ollama(system_prompt, user_prompt)
-        plan = llm_response
+        plan = plan_cache.get_or_compute(plan_cache.make_key(plan_data), generate, cacheable=is_cacheable_plan)
     except Exception as e:
         print(f"Error generating plan with LLM: {str(e)}")
         # Fallback to Python-generated plan if LLM fails
         plan = generate_fallback_plan(plan_data)
-    
-    return {
-        "plan": plan,
-        "projected_savings": projected_savings,
-        "years_left": years_left,
-        "gap": gap,
-        "required_savings_rate": required_savings_rate,
-        "status": "success"
-    }
+    return plan_response(plan, plan_data)
+
+async def create_retirement_plan_async(user_input: dict):
+    """Same as `create_retirement_plan`, but awaits the LLM without blocking the event loop."""
+    # The Monte Carlo run is CPU work; keep it off the event loop.
+    plan_data = await asyncio.to_thread(build_plan_data, user_input)
+
+    async def generate():
+        system_prompt, user_prompt = build_plan_prompts(plan_data)
+        return await call_ollama_async(system_prompt, user_prompt)
+
+    try:
+        plan = await plan_cache.get_or_compute_async(
+            plan_cache.make_key(plan_data), generate, cacheable=is_cacheable_plan
+        )
+    except Exception as e:
+        print(f"Error generating plan with LLM: {str(e)}")
+        plan = generate_fallback_plan(plan_data)
+    return plan_response(plan, plan_data)
 
 def generate_fallback_plan(plan_data):
     """Generate a basic plan using Python if LLM fails"""
     user = plan_data["user_profile"]
-    metrics = plan_data["financial_metrics"]
+    plan_metrics = plan_data["financial_metrics"]
     assets = plan_data["assets"]
+    assumptions = plan_data["assumptions"]
     
     return f"""## 🎯 Your Personalized Retirement Plan
 
 Based on your profile as a {user['age']}-year-old {user['gender']} working as a {user['job']}, 
-with ${user['current_savings']:,.0f} saved, you're {'ahead of' if user['current_savings'] >= metrics['benchmark_savings'] else 'behind'} 
-the benchmark of ${metrics['benchmark_savings']:,.0f} for your age and income.
+with ${user['current_savings']:,.0f} saved, you're {'ahead of' if user['current_savings'] >= plan_metrics['benchmark_savings'] else 'behind'} 
+the benchmark of ${plan_metrics['benchmark_savings']:,.0f} for your age and income.
 
 ### 📊 Current Status
 - Age: {user['age']}
@@ -450,15 +767,15 @@ the benchmark of ${metrics['benchmark_savings']:,.0f} for your age and income.
 - Years Until Retirement: {user['years_until_retirement']}
 
 ### 📈 Projections
-At your current savings rate of 15%, you're projected to have ${metrics['projected_savings']:,.0f} by retirement age {user['retirement_age']}.
+At your current savings rate of {assumptions['savings_rate']:.0%}, you're projected to have ${plan_metrics['projected_savings']:,.0f} by retirement age {user['retirement_age']}.
 This projection assumes:
-- Annual savings rate of 15% (${metrics['annual_contribution']:,.0f})
-- Average annual return of 6.5%
+- Annual savings rate of {assumptions['savings_rate']:.0%} (${plan_metrics['annual_contribution']:,.0f})
+- Average annual return of {assumptions['return_rate']:.1%}
 - No major withdrawals before retirement
 - Consistent income growth with inflation
 
 ### 🎯 Action Plan
-- Increase savings rate to {metrics['required_savings_rate']:.1%} of income
+- Increase savings rate to {plan_metrics['required_savings_rate']:.1%} of income
 - Automate contributions to retirement accounts
 - Review and rebalance portfolio annually
 - Consider working with a financial advisor
@@ -471,31 +788,20 @@ This projection assumes:
 - Inflation impact on purchasing power
 
 ### 🌟 Final Thoughts
-{'You\'re in a great position — with consistency and smart investing, you\'re on track to retire comfortably. Keep the momentum going!' if metrics['gap_to_goal'] <= 0 else 'While there\'s work to be done, remember that every step forward counts. Stay committed to your plan, and you\'ll build the retirement you deserve.'}"""
+{'You\'re in a great position — with consistency and smart investing, you\'re on track to retire comfortably. Keep the momentum going!' if plan_metrics['gap_to_goal'] <= 0 else 'While there\'s work to be done, remember that every step forward counts. Stay committed to your plan, and you\'ll build the retirement you deserve.'}"""
 
 
 # ────────────────────────────────────────────────────────────────────────────────
 # 9. Save User Profile
 # ────────────────────────────────────────────────────────────────────────────────
-def save_user_profile(user_input: dict, path="data/retirement_user_data.json"):
-    entry = {
-        "id": str(uuid.uuid4()),
-        "timestamp": datetime.now().isoformat(),
-        "data": user_input
-    }
+def save_user_profile(user_input: dict, path=profile_store.DEFAULT_DB_PATH):
+    save_user_profiles([user_input], path)
 
+@metrics.span("retirement", "profile_write")
+def save_user_profiles(user_inputs: list, path=profile_store.DEFAULT_DB_PATH):
+    """Append several profiles to the profile store in a single transaction."""
     try:
-        if os.path.exists(path):
-            with open(path, "r") as f:
-                all_data = json.load(f)
-        else:
-            all_data = []
-
-        all_data.append(entry)
-
-        with open(path, "w") as f:
-            json.dump(all_data, f, indent=2)
-
+        profile_store.get_store(path).append_many(user_inputs)
     except Exception as e:
         print(f"Error saving user input: {e}")
 
@@ -503,22 +809,14 @@ def save_user_profile(user_input: dict, path="data/retirement_user_data.json"):
 # 10. Load All User Profiles
 # ────────────────────────────────────────────────────────────────────────────────
 
-def load_all_user_profiles(path="data/retirement_user_data.json"):
-    if not os.path.exists(path):
-        return []
-    with open(path, "r") as f:
-        return json.load(f)
-       
+def load_all_user_profiles(path=profile_store.DEFAULT_DB_PATH):
+    return list(profile_store.get_store(path).iter_all())
+
 # ────────────────────────────────────────────────────────────────────────────────
 # 11. Optional Projection
 # ────────────────────────────────────────────────────────────────────────────────
 
-def calculate_retirement(user_input):
-    save_user_profile(user_input)
-
-    # Generate the retirement plan
-    plan_data = create_retirement_plan(user_input)
-    
+def format_retirement_result(plan_data):
     # Ensure we have all required fields
     if not plan_data or 'plan' not in plan_data:
         raise ValueError("Failed to generate retirement plan")
@@ -530,17 +828,28 @@ def calculate_retirement(user_input):
             "projected_savings": plan_data["projected_savings"],
             "years_left": plan_data["years_left"],
             "gap": plan_data["gap"],
-            "required_savings_rate": plan_data["required_savings_rate"]
+            "required_savings_rate": plan_data["required_savings_rate"],
+            "monte_carlo": plan_data.get("monte_carlo")
         },
         "status": "success"
     }
     
     return result
 
+def calculate_retirement(user_input):
+    save_user_profile(user_input)
+
+    # Generate the retirement plan
+    return format_retirement_result(create_retirement_plan(user_input))
+
+async def calculate_retirement_async(user_input):
+    await asyncio.to_thread(save_user_profile, user_input)
+    return format_retirement_result(await create_retirement_plan_async(user_input))
+
 @router.post("/plan")
 async def generate_retirement_plan(user_input: RetirementInput):
     try:
-        result = calculate_retirement(user_input.model_dump())
+        result = await calculate_retirement_async(user_input.model_dump())
         return result
     except Exception as e:
         print(f"Error generating retirement plan: {str(e)}")
@@ -549,10 +858,215 @@ async def generate_retirement_plan(user_input: RetirementInput):
             "status": "error"
         }
 
+# ────────────────────────────────────────────────────────────────────────────────
+# 12. Streaming Plan (Server-Sent Events)
+# ────────────────────────────────────────────────────────────────────────────────
+
+def sse_event(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+async def stream_retirement_plan(user_input: dict):
+    """Yield SSE events: `metrics` first, then `token`s, then `done`.
+
+    If the LLM fails before or during the stream, a `fallback` event carries
+    the complete Python-generated plan, which replaces any partial text the
+    client has rendered so far.
+    """
+    try:
+        plan_data = await asyncio.to_thread(build_plan_data, user_input)
+    except Exception as e:
+        print(f"Error generating retirement plan: {str(e)}")
+        yield sse_event("error", {"error": str(e), "status": "error"})
+        return
+
+    plan_metrics = plan_response(None, plan_data)
+    del plan_metrics["plan"], plan_metrics["status"]
+    yield sse_event("metrics", plan_metrics)
+
+    await asyncio.to_thread(save_user_profile, user_input)
+    cache_key = plan_cache.make_key(plan_data)
+    plan, future = plan_cache.get(cache_key), None
+    if plan is None:
+        # Identical profiles share one generation, streamed or not: only the
+        # leader streams from the LLM, the others get its finished plan.
+        future, leader = plan_cache.claim(cache_key)
+        if leader:
+            plan = plan_cache.get(cache_key)
+            if plan is not None:
+                plan_cache.finish(cache_key, future, plan, cacheable=False)
+        else:
+            try:
+                plan = await asyncio.wrap_future(future)
+            except Exception as e:
+                print(f"Error streaming plan with LLM: {str(e)}")
+                plan = generate_fallback_plan(plan_data)
+                yield sse_event("fallback", {"reason": str(e), "plan": plan})
+                yield sse_event("done", plan_response(plan, plan_data))
+                return
+    if plan is not None:
+        yield sse_event("token", {"text": plan})
+        yield sse_event("done", plan_response(plan, plan_data))
+        return
+
+    system_prompt, user_prompt = build_plan_prompts(plan_data)
+    tokens = []
+    try:
+        async for token in llm_client.default_client.stream_chat([
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt}
+        ]):
+            tokens.append(token)
+            yield sse_event("token", {"text": token})
+    except llm_client.LLMError as e:
+        plan_cache.finish(cache_key, future, error=e)
+        print(f"Error streaming plan with LLM: {str(e)}")
+        plan = generate_fallback_plan(plan_data)
+        yield sse_event("fallback", {"reason": str(e), "plan": plan})
+        yield sse_event("done", plan_response(plan, plan_data))
+        return
+    except BaseException:
+        # Client went away (or the task was cancelled): release the waiters.
+        plan_cache.finish(cache_key, future, error=RuntimeError("Plan stream closed before it finished"))
+        raise
+    plan = "".join(tokens)
+    plan_cache.finish(cache_key, future, plan, cacheable=is_cacheable_plan(plan))
+    yield sse_event("done", plan_response(plan, plan_data))
+
+@router.post("/plan/stream")
+async def stream_retirement_plan_route(user_input: RetirementInput):
+    return StreamingResponse(
+        stream_retirement_plan(user_input.model_dump()),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+# ────────────────────────────────────────────────────────────────────────────────
+# 13. Batch Plans (NDJSON)
+# ────────────────────────────────────────────────────────────────────────────────
+
+BATCH_MAX_CONCURRENCY = int(os.getenv("BATCH_MAX_CONCURRENCY", str(llm_client.MAX_CONCURRENCY)))
+
+class BatchPlanRequest(BaseModel):
+    profiles: list[RetirementInput]
+    concurrency: Optional[int] = None
+
+def ndjson_line(data: dict) -> str:
+    return json.dumps(data) + "\n"
+
+async def stream_batch_plans(user_inputs: list, concurrency: int = None):
+    """Yield NDJSON lines for a batch of profiles.
+
+    1. one `batch` line (row count, distinct profiles, concurrency);
+    2. one `metrics` line per row, all computed in a single vectorized pass;
+    3. one `plan` line per row as its narrative finishes (completion order).
+       Each distinct profile still runs the full `build_plan_data` (including
+       its Monte Carlo simulation) and one LLM call; rows with exactly the
+       same input are generated once and reported for every row.
+    4. a final `done` line.
+    """
+    start = time.perf_counter()
+    concurrency = max(1, min(concurrency or BATCH_MAX_CONCURRENCY, BATCH_MAX_CONCURRENCY))
+
+    # Group on the exact input: plan_cache keys may round values, and every
+    # row's plan must match its own metrics line.
+    rows_by_key = {}
+    for i, user_input in enumerate(user_inputs):
+        rows_by_key.setdefault(json.dumps(user_input, sort_keys=True), []).append(i)
+    yield ndjson_line({"type": "batch", "count": len(user_inputs), "unique": len(rows_by_key),
+                       "concurrency": concurrency})
+
+    scores = projection.score_profiles(user_inputs)
+    for i in range(len(user_inputs)):
+        yield ndjson_line({
+            "type": "metrics",
+            "index": i,
+            "projected_savings": float(scores["projected_savings"][i]),
+            "years_left": int(scores["years_left"][i]),
+            "gap": float(scores["gap"][i]),
+            "required_savings_rate": float(scores["required_savings_rate"][i]),
+        })
+
+    await asyncio.to_thread(save_user_profiles, user_inputs)
+
+    pending = asyncio.Queue()
+    for key, rows in rows_by_key.items():
+        pending.put_nowait((key, rows))
+    finished = asyncio.Queue()
+
+    async def worker():
+        while True:
+            try:
+                key, rows = pending.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            try:
+                result = format_retirement_result(await create_retirement_plan_async(user_inputs[rows[0]]))
+            except Exception as e:
+                print(f"Error generating retirement plan: {str(e)}")
+                result = {"error": str(e), "status": "error"}
+            await finished.put((rows, result))
+
+    workers = [asyncio.create_task(worker()) for _ in range(min(concurrency, len(rows_by_key)))]
+    try:
+        for _ in range(len(rows_by_key)):
+            rows, result = await finished.get()
+            for i in rows:
+                yield ndjson_line({"type": "plan", "index": i, **result})
+    finally:
+        for task in workers:
+            task.cancel()
+
+    yield ndjson_line({"type": "done", "count": len(user_inputs), "unique": len(rows_by_key),
+                       "seconds": time.perf_counter() - start})
+
+@router.post("/plan/batch")
+async def generate_retirement_plans_batch(request: BatchPlanRequest):
+    user_inputs = [profile.model_dump() for profile in request.profiles]
+    return StreamingResponse(stream_batch_plans(user_inputs, request.concurrency),
+                             media_type="application/x-ndjson")
+
+@router.post("/simulate")
+def simulate_retirement(user_input: SimulationInput):
+    try:
+        return scenario_simulator.simulate(user_input.model_dump(exclude_none=True))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/llm/metrics")
+def get_llm_metrics():
+    return llm_client.default_client.metrics()
+
+@router.get("/cache/stats")
+def get_plan_cache_stats():
+    return plan_cache.stats()
+
+@router.get("/rerank/stats")
+def get_rerank_stats():
+    return reranker.stats()
+
+@router.get("/inference/stats")
+def get_inference_stats():
+    return {
+        "batching": INFERENCE_BATCHING,
+        "embedding": embedding_batcher.stats(),
+        "rerank": rerank_batcher.stats(),
+        "query_embedding_cache": query_embeddings.stats(),
+    }
+
 @router.get("/user_profiles")
-def get_user_profiles():
+def get_user_profiles(limit: int = 100, cursor: Optional[str] = None, since: Optional[str] = None,
+                      until: Optional[str] = None, stream: bool = False):
+    """Page through saved profiles (oldest first), or stream them all as NDJSON with `stream=true`.
+
+    Pass the returned `next_cursor` back as `cursor` for the next page;
+    `since`/`until` filter on the ISO timestamp.
+    """
     try:
-        profiles = load_all_user_profiles()
-        return {"profiles": profiles}
+        store = profile_store.get_store()
+        if stream:
+            return StreamingResponse((ndjson_line(p) for p in store.iter_all(since=since, until=until)),
+                                     media_type="application/x-ndjson")
+        profiles, next_cursor = store.page(limit, cursor, since, until)
+        return {"profiles": profiles, "next_cursor": next_cursor}
     except Exception as e:
         return {"error": str(e)}
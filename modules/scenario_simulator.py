@@ -0,0 +1,179 @@
+import os
+
+import numpy as np
+
+from modules.projection import DEFAULT_ASSUMPTIONS
+
+DEFAULT_PATHS = 10_000
+# Upper bound on paths for one request (`simulate`); bounds CPU time per call.
+MAX_PATHS = int(os.getenv("MONTE_CARLO_MAX_PATHS", "1000000"))
+# Upper bound on simulated years; memory grows with years x paths, so both are capped.
+MAX_YEARS = int(os.getenv("MONTE_CARLO_MAX_YEARS", "120"))
+DEFAULT_VOLATILITY = DEFAULT_ASSUMPTIONS["return_volatility"]
+PERCENTILES = (5, 25, 50, 75, 95)
+# Paths simulated per chunk; above this the run switches to histogram percentiles.
+DEFAULT_CHUNK_SIZE = 50_000
+# Log-spaced balance bins used by chunked mode: [0, $1) then $1 .. $10B, ~0.5% wide each.
+HISTOGRAM_DECADES = 10
+HISTOGRAM_STEPS = 4095
+HISTOGRAM_EDGES = np.concatenate(([0.0], np.logspace(0, HISTOGRAM_DECADES, HISTOGRAM_STEPS + 1)))
+
+# ────────────────────────────────────────────────────────────────────────────────
+# 1. Path Simulation
+# ────────────────────────────────────────────────────────────────────────────────
+
+def lognormal_params(mean_return: float, volatility: float) -> tuple:
+    """Log-space (mu, sigma) whose gross return 1+R has the given arithmetic mean and volatility."""
+    sigma2 = np.log1p(volatility ** 2 / (1 + mean_return) ** 2)
+    return np.log1p(mean_return) - sigma2 / 2, np.sqrt(sigma2)
+
+def simulate_balances(current_savings, annual_contribution, years: int, n_paths: int,
+                      mean_return=DEFAULT_ASSUMPTIONS["return_rate"], volatility=DEFAULT_VOLATILITY,
+                      contribution_growth=DEFAULT_ASSUMPTIONS["contribution_growth"], rng=None):
+    """Balances for `n_paths` random return paths, shape (years + 1, n_paths); row 0 is today.
+
+    Uses W_t = G_t * (W_0 + sum_{k<=t} C_k / G_k), where G_t is the cumulative
+    growth factor, so every path and year is computed with array operations.
+    Contributions C_k are paid at the end of year k. Arrays are time-major and
+    updated in place to keep large runs memory-friendly.
+    """
+    rng = rng if rng is not None else np.random.default_rng()
+    mu, sigma = lognormal_params(mean_return, volatility)
+    balances = np.empty((years + 1, n_paths))
+    balances[0] = current_savings
+    if years == 0:
+        return balances
+
+    log_growth = rng.standard_normal((years, n_paths))
+    log_growth *= sigma
+    log_growth += mu
+    np.cumsum(log_growth, axis=0, out=log_growth)
+
+    contributions = annual_contribution * (1 + contribution_growth) ** np.arange(years)
+    wealth = balances[1:]
+    np.exp(-log_growth, out=wealth)
+    wealth *= contributions[:, None]
+    np.cumsum(wealth, axis=0, out=wealth)
+    wealth += current_savings
+    wealth *= np.exp(log_growth, out=log_growth)
+    return balances
+
+# ────────────────────────────────────────────────────────────────────────────────
+# 2. Summaries
+# ────────────────────────────────────────────────────────────────────────────────
+
+def histogram_bins(balances: np.ndarray) -> np.ndarray:
+    """Index into HISTOGRAM_EDGES for each balance, computed arithmetically instead of by search."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        steps = np.floor(np.log10(balances) * (HISTOGRAM_STEPS / HISTOGRAM_DECADES))
+    steps = np.nan_to_num(steps, nan=-1.0, neginf=-1.0)
+    return np.clip(steps, -1, HISTOGRAM_STEPS - 1).astype(np.int64) + 1
+
+def _histogram_percentiles(counts: np.ndarray, total: int, percentiles) -> np.ndarray:
+    """Percentiles per year from histogram counts over HISTOGRAM_EDGES (geometric bin midpoints)."""
+    cumulative = np.cumsum(counts, axis=1)
+    targets = np.asarray(percentiles, dtype=np.float64) / 100 * total
+    bins = np.stack([(cumulative < t).sum(axis=1) for t in targets])
+    bins = np.minimum(bins, len(HISTOGRAM_EDGES) - 2)
+    lower, upper = HISTOGRAM_EDGES[bins], HISTOGRAM_EDGES[bins + 1]
+    return np.where(lower > 0, np.sqrt(lower * upper), upper / 2)
+
+def run_simulation(current_savings: float, income: float, years: int, goal: float,
+                   savings_rate=DEFAULT_ASSUMPTIONS["savings_rate"],
+                   mean_return=DEFAULT_ASSUMPTIONS["return_rate"],
+                   volatility=DEFAULT_VOLATILITY,
+                   contribution_growth=DEFAULT_ASSUMPTIONS["contribution_growth"],
+                   inflation_rate=DEFAULT_ASSUMPTIONS["inflation_rate"],
+                   n_paths: int = DEFAULT_PATHS, seed=None, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                   percentiles=PERCENTILES) -> dict:
+    """Monte Carlo accumulation to retirement: success probability and percentile bands.
+
+    Runs up to `chunk_size` paths at a time, so memory stays bounded at
+    chunk_size x years floats however many paths are requested; `years` is
+    capped at MAX_YEARS (ValueError above it, negative years count as 0). A single chunk
+    gives exact percentiles; with several chunks they come from log-spaced
+    histograms (~0.5% resolution) and `approximate` is True. The success
+    probability is exact either way. The same `seed` gives the same result.
+    """
+    if n_paths < 1:
+        raise ValueError(f"n_paths must be at least 1, got {n_paths}")
+    years = max(int(years), 0)
+    if years > MAX_YEARS:
+        raise ValueError(f"years must be at most {MAX_YEARS}, got {years}")
+    rng = np.random.default_rng(seed)
+    contribution = income * savings_rate
+    n_chunks = -(-n_paths // chunk_size)
+    successes = 0
+    final_sum = 0.0
+
+    if n_chunks <= 1:
+        balances = simulate_balances(current_savings, contribution, years, n_paths, mean_return, volatility,
+                                     contribution_growth, rng)
+        bands = np.percentile(balances, percentiles, axis=1)
+        successes = int((balances[-1] >= goal).sum())
+        final_sum = float(balances[-1].sum())
+    else:
+        counts = np.zeros((years + 1, len(HISTOGRAM_EDGES) - 1), dtype=np.int64)
+        year_offsets = np.arange(years + 1) * counts.shape[1]
+        for chunk in range(n_chunks):
+            size = min(chunk_size, n_paths - chunk * chunk_size)
+            balances = simulate_balances(current_savings, contribution, years, size, mean_return, volatility,
+                                         contribution_growth, rng)
+            successes += int((balances[-1] >= goal).sum())
+            final_sum += float(balances[-1].sum())
+            bins = histogram_bins(balances)
+            bins += year_offsets[:, None]
+            counts += np.bincount(bins.ravel(), minlength=counts.size).reshape(counts.shape)
+        bands = _histogram_percentiles(counts, n_paths, percentiles)
+
+    deflator = (1 + inflation_rate) ** np.arange(years + 1)
+    return {
+        "n_paths": n_paths,
+        "years": years,
+        "seed": seed,
+        "approximate": n_chunks > 1,
+        "success_probability": successes / n_paths,
+        "mean_final_balance": final_sum / n_paths,
+        "percentiles": {f"p{p}": band.tolist() for p, band in zip(percentiles, bands)},
+        "final_percentiles": {f"p{p}": float(band[-1]) for p, band in zip(percentiles, bands)},
+        "final_percentiles_today_dollars": {f"p{p}": float(band[-1] / deflator[-1]) for p, band in zip(percentiles, bands)},
+        "assumptions": {
+            "savings_rate": savings_rate,
+            "mean_return": mean_return,
+            "volatility": volatility,
+            "contribution_growth": contribution_growth,
+            "inflation_rate": inflation_rate,
+        },
+    }
+
+# ────────────────────────────────────────────────────────────────────────────────
+# 3. Questionnaire Entry Point
+# ────────────────────────────────────────────────────────────────────────────────
+
+def simulate(data: dict) -> dict:
+    """Run a simulation for a questionnaire-style payload (see RetirementInput).
+
+    Optional keys: savingsRate, meanReturn, volatility, contributionGrowth,
+    inflationRate, paths (1 .. MAX_PATHS), seed. Raises ValueError for an
+    out-of-range `paths` or more than MAX_YEARS years to retirement.
+    """
+    n_paths = int(data.get("paths", DEFAULT_PATHS))
+    if not 1 <= n_paths <= MAX_PATHS:
+        raise ValueError(f"paths must be between 1 and {MAX_PATHS}, got {n_paths}")
+    age = int(data.get("age") or 0)
+    retirement_age = int(data.get("retirementAge") or 0)
+    result = run_simulation(
+        current_savings=float(data.get("currentSavings") or 0),
+        income=float(data.get("income") or 0),
+        years=retirement_age - age,
+        goal=float(data.get("retirementSavingsGoal") or 0),
+        savings_rate=float(data.get("savingsRate", DEFAULT_ASSUMPTIONS["savings_rate"])),
+        mean_return=float(data.get("meanReturn", DEFAULT_ASSUMPTIONS["return_rate"])),
+        volatility=float(data.get("volatility", DEFAULT_VOLATILITY)),
+        contribution_growth=float(data.get("contributionGrowth", DEFAULT_ASSUMPTIONS["contribution_growth"])),
+        inflation_rate=float(data.get("inflationRate", DEFAULT_ASSUMPTIONS["inflation_rate"])),
+        n_paths=n_paths,
+        seed=data.get("seed"),
+    )
+    result["ages"] = list(range(age, age + result["years"] + 1))
+    return result
@@ -1,4 +1,7 @@
+import contextlib
 import json
+import os
+import tempfile
 
 def load_json_file(filepath):
     with open(filepath) as f:
@@ -7,3 +10,24 @@ def clean_rag_facts(text: str, max_lines: int = 10) -> str:
     """Deduplicate and trim retrieved facts to avoid repetition."""
     lines = list(dict.fromkeys(text.strip().splitlines()))
     return "\n".join(lines[:max_lines])
+
+def atomic_write_bytes(filepath, data: bytes):
+    """Write `data` via a temp file + rename so readers never see a half-written file."""
+    directory = os.path.dirname(os.path.abspath(filepath))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-", suffix="-" + os.path.basename(filepath))
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, filepath)
+    except BaseException:
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(tmp_path)
+        raise
+
+def atomic_write_json(filepath, obj, **dump_kwargs):
+    """JSON-encode `obj` and write it atomically (see `atomic_write_bytes`)."""
+    atomic_write_bytes(filepath, json.dumps(obj, **dump_kwargs).encode("utf-8"))
@@ -0,0 +1,52 @@
+import pytest
+
+from modules.market_alerts import AlertEngine
+
+@pytest.mark.parametrize("rule", [
+    {"symbol": "AAPL", "type": "above", "threshold": 100, "user": ["alice"]},
+    {"symbol": "AAPL", "type": "above", "threshold": 100, "user": {"name": "alice"}},
+    {"symbol": 42, "type": "above", "threshold": 100},
+    {"symbol": "", "type": "above", "threshold": 100},
+    {"symbol": "AAPL", "type": "sideways", "threshold": 100},
+    {"symbol": "AAPL", "type": "above", "threshold": "lots"},
+    {"symbol": "AAPL", "type": "above", "threshold": float("nan")},
+    {"symbol": "AAPL", "type": "above", "threshold": 100, "cooldown": -1},
+    {"symbol": "AAPL", "type": "above"},
+    "AAPL above 100",
+])
+def test_invalid_rule_rejects_whole_batch(rule):
+    engine = AlertEngine()
+    with pytest.raises(ValueError):
+        engine.add_rules([{"symbol": "MSFT", "type": "below", "threshold": 10}, rule])
+    assert engine.rules() == []
+
+def test_engine_keeps_working_after_invalid_rule():
+    engine = AlertEngine(default_cooldown=0)
+    engine.add_rule("AAPL", "above", 100, user="alice")
+    with pytest.raises(ValueError):
+        engine.add_rule("AAPL", "above", 100, user=["bob"])
+    alerts = engine.update({"AAPL": 101}, now=1.0)
+    assert [(a["user"], a["symbol"]) for a in alerts] == [("alice", "AAPL")]
+
+def test_user_is_coerced_to_string():
+    engine = AlertEngine(default_cooldown=0)
+    engine.add_rule("AAPL", "above", 100, user=7)
+    assert engine.rules()[0]["user"] == "7"
+    assert engine.update({"AAPL": 101}, now=1.0)[0]["user"] == "7"
+
+def test_duplicate_rules_notify_once_and_level_rules_only_on_entry():
+    engine = AlertEngine(default_cooldown=0)
+    engine.add_rules([{"symbol": "AAPL", "type": "above", "threshold": 100, "user": "alice"}] * 2)
+    assert len(engine.update({"AAPL": 101}, now=1.0)) == 1
+    assert engine.update({"AAPL": 102}, now=2.0) == []
+    engine.update({"AAPL": 99}, now=3.0)
+    assert len(engine.update({"AAPL": 101}, now=4.0)) == 1
+
+def test_cooldown_throttles_repeat_crossings():
+    engine = AlertEngine(default_cooldown=60)
+    engine.add_rule("AAPL", "cross_above", 100)
+    engine.update({"AAPL": 99}, now=0.0)
+    assert len(engine.update({"AAPL": 101}, now=1.0)) == 1
+    engine.update({"AAPL": 99}, now=2.0)
+    assert engine.update({"AAPL": 101}, now=3.0) == []
+    assert engine.stats["throttled"] == 1
@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+
+from modules.market_series import SeriesStore, lttb
+
+X = np.arange(100, dtype=np.float64)
+Y = np.sin(X / 5)
+
+@pytest.mark.parametrize("n_out", [1, 0, -3])
+def test_lttb_rejects_fewer_than_two_points(n_out):
+    with pytest.raises(ValueError):
+        lttb(X, Y, n_out)
+
+def test_lttb_two_points_keeps_endpoints():
+    assert lttb(X, Y, 2).tolist() == [0, 99]
+
+@pytest.mark.parametrize("n_out", [100, 101, 1000])
+def test_lttb_returns_everything_when_it_fits(n_out):
+    assert lttb(X, Y, n_out).tolist() == list(range(100))
+
+@pytest.mark.parametrize("n_out", [3, 10, 99])
+def test_lttb_downsamples_to_requested_size(n_out):
+    kept = lttb(X, Y, n_out)
+    assert len(kept) == n_out
+    assert kept[0] == 0 and kept[-1] == 99
+    assert np.all(np.diff(kept) > 0)
+
+def test_lttb_keeps_a_spike():
+    y = np.zeros(100)
+    y[37] = 50.0
+    assert 37 in lttb(X, y, 10)
+
+def test_query_window_and_downsampling(tmp_path):
+    store = SeriesStore(str(tmp_path))
+    store.replace("AAPL", list(range(0, 1000, 10)), list(Y))
+    window = store.query("AAPL", start=100, end=190)
+    assert window["timestamps"] == list(range(100, 200, 10))
+    sampled = store.query("AAPL", points=2)
+    assert sampled["total_points"] == 100
+    assert sampled["timestamps"] == [0, 990]
+    with pytest.raises(ValueError):
+        store.query("AAPL", points=1)
@@ -0,0 +1,68 @@
+from modules.news_digest import NewsStore, decode_cursor, encode_cursor
+
+def make_articles():
+    return [
+        {"id": i, "title": f"Story {i}", "source": "wire" if i % 2 else "desk",
+         "publishedAt": f"2026-01-{i:02d}", "aiSummary": f"Summary {i}"}
+        for i in range(1, 11)
+    ]
+
+def collect(store, limit, source=None):
+    pages, cursor = [], None
+    while True:
+        articles, cursor = store.page(limit, cursor, source)
+        pages.append([a["id"] for a in articles])
+        if cursor is None:
+            return pages
+
+def test_cursor_pages_cover_every_article_newest_first():
+    store = NewsStore(make_articles())
+    assert collect(store, 4) == [[10, 9, 8, 7], [6, 5, 4, 3], [2, 1]]
+    assert collect(store, 10) == [list(range(10, 0, -1))]
+
+def test_cursor_pages_per_source():
+    store = NewsStore(make_articles())
+    assert collect(store, 3, source="wire") == [[9, 7, 5], [3, 1]]
+    assert store.page(3, source="unknown") == ([], None)
+
+def test_cursor_is_stable_when_newer_articles_arrive():
+    articles = make_articles()
+    store = NewsStore(articles)
+    first, cursor = store.page(3)
+    articles.append({"id": 11, "source": "wire", "publishedAt": "2026-01-11"})
+    store.rebuild()
+    second, _ = store.page(3, cursor)
+    assert [a["id"] for a in second] == [7, 6, 5]
+
+def test_unknown_cursor_returns_empty_page():
+    store = NewsStore(make_articles())
+    assert store.page(3, encode_cursor("missing")) == ([], None)
+    assert decode_cursor("!!not base64") is None
+
+def test_fields_projection():
+    store = NewsStore(make_articles())
+    articles, _ = store.page(1, fields=("id", "title"))
+    assert articles == [{"id": 10, "title": "Story 10"}]
+
+def test_etag_changes_on_touch_and_rebuild_and_with_query():
+    store = NewsStore(make_articles(), epoch="file-hash")
+    etag = store.etag(5, None, None, None)
+    assert etag == store.etag(5, None, None, None)
+    assert etag != store.etag(6, None, None, None)
+    assert etag != NewsStore(make_articles(), epoch="other-file").etag(5, None, None, None)
+    store.touch()
+    touched = store.etag(5, None, None, None)
+    assert touched != etag
+    store.rebuild()
+    assert store.etag(5, None, None, None) != touched
+
+def test_page_json_is_memoized_until_touch():
+    articles = make_articles()
+    store = NewsStore(articles)
+    body, cursor = store.page_json(2)
+    assert store.page_json(2) == (body, cursor)
+    with store.article_lock:
+        articles[-1]["aiSummary"] = "Updated"
+    assert store.page_json(2)[0] == body
+    store.touch()
+    assert "Updated" in store.page_json(2)[0]
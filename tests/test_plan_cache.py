@@ -0,0 +1,107 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from modules.plan_cache import PlanCache, make_key
+
+def test_key_ignores_formatting_noise_and_monte_carlo():
+    plan_data = {"income": 85000.0, "job": " teacher ", "monte_carlo": {"p50": [1, 2, 3]}}
+    assert make_key(plan_data) == make_key({"income": 85000, "job": "teacher"})
+    assert make_key({"income": 85412}, 3) == make_key({"income": 85380}, 3)
+    assert make_key({"income": 85412}) != make_key({"income": 85380})
+
+def test_lru_eviction_by_entries():
+    cache = PlanCache(max_entries=2)
+    cache.set("a", "1")
+    cache.set("b", "2")
+    assert cache.get("a") == "1"  # "b" is now least recently used
+    cache.set("c", "3")
+    assert cache.get("b") is None
+    assert cache.get("a") == "1" and cache.get("c") == "3"
+    assert cache.stats()["evictions"] == 1
+
+def test_eviction_by_bytes_and_oversized_values_skipped():
+    cache = PlanCache(max_bytes=15)
+    cache.set("a", "x" * 8)
+    cache.set("b", "y" * 8)
+    assert cache.get("a") is None and cache.get("b") == "y" * 8
+    cache.set("c", "z" * 100)
+    assert cache.get("c") is None
+    assert cache.stats()["bytes"] <= 15
+
+def test_ttl_expiry():
+    cache = PlanCache(ttl_seconds=0.01)
+    cache.set("a", "1")
+    time.sleep(0.02)
+    assert cache.get("a") is None
+    assert cache.stats()["expirations"] == 1
+
+def test_disk_cap_evicts_oldest_rows(tmp_path):
+    cache = PlanCache(path=str(tmp_path / "plans.db"), disk_max_entries=2)
+    for key in ("a", "b", "c"):
+        cache.set(key, key.upper())
+    reopened = PlanCache(path=str(tmp_path / "plans.db"))
+    assert reopened.get("a") is None
+    assert reopened.get("b") == "B" and reopened.get("c") == "C"
+
+def test_concurrent_callers_share_one_computation():
+    cache = PlanCache()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.1)
+        return "plan"
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_compute("k", compute)))
+               for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == ["plan"] * 8
+    assert len(calls) == 1
+    assert cache.stats()["in_flight"] == 0
+
+def test_async_callers_share_one_computation_and_errors():
+    cache = PlanCache()
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "plan"
+
+    async def failing():
+        await asyncio.sleep(0.05)
+        raise RuntimeError("llm down")
+
+    async def main():
+        plans = await asyncio.gather(*[cache.get_or_compute_async("k", compute) for _ in range(5)])
+        errors = await asyncio.gather(*[cache.get_or_compute_async("e", failing) for _ in range(3)],
+                                      return_exceptions=True)
+        return plans, errors
+
+    plans, errors = asyncio.run(main())
+    assert plans == ["plan"] * 5 and len(calls) == 1
+    assert all(isinstance(e, RuntimeError) for e in errors)
+    assert cache.get("e") is None
+
+def test_uncacheable_result_is_shared_but_not_stored():
+    cache = PlanCache()
+    assert cache.get_or_compute("k", lambda: "fallback", cacheable=lambda v: v != "fallback") == "fallback"
+    assert cache.get("k") is None
+
+def test_interrupted_leader_releases_the_key():
+    cache = PlanCache()
+
+    def interrupted():
+        raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        cache.get_or_compute("k", interrupted)
+    assert cache.stats()["in_flight"] == 0
+    assert cache.get_or_compute("k", lambda: "plan") == "plan"
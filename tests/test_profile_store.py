@@ -0,0 +1,68 @@
+import json
+
+import pytest
+
+from modules.profile_store import ProfileStore, encode_cursor
+
+def test_pages_follow_insertion_order(tmp_path):
+    store = ProfileStore(str(tmp_path / "profiles.db"))
+    entries = store.append_many([{"age": age} for age in range(25)])
+    seen, cursor = [], None
+    while True:
+        page, cursor = store.page(10, cursor)
+        seen.append([e["data"]["age"] for e in page])
+        if cursor is None:
+            break
+    assert seen == [list(range(10)), list(range(10, 20)), list(range(20, 25))]
+    assert [e["id"] for e in store.iter_all(batch_size=7)] == [e["id"] for e in entries]
+    assert store.get(entries[3]["id"])["data"] == {"age": 3}
+
+def test_exact_multiple_has_no_trailing_empty_page(tmp_path):
+    store = ProfileStore(str(tmp_path / "profiles.db"))
+    store.append_many([{"n": n} for n in range(10)])
+    page, cursor = store.page(5)
+    page, cursor = store.page(5, cursor)
+    assert len(page) == 5 and cursor is None
+
+def test_time_window_filters(tmp_path):
+    store = ProfileStore(str(tmp_path / "profiles.db"))
+    store.append({"n": 1})
+    entries, _ = store.page(10, since="2000-01-01", until="2000-01-02")
+    assert entries == []
+    entries, _ = store.page(10, since="2000-01-01")
+    assert len(entries) == 1
+
+def test_invalid_cursor_raises(tmp_path):
+    store = ProfileStore(str(tmp_path / "profiles.db"))
+    with pytest.raises(ValueError):
+        store.page(10, "not-a-cursor!")
+    assert store.page(10, encode_cursor(10**6)) == ([], None)
+
+def test_json_migration_runs_once_and_keeps_the_file(tmp_path):
+    legacy = tmp_path / "profiles.json"
+    rows = [{"id": f"p{i}", "timestamp": f"2024-01-0{i}T00:00:00", "data": {"age": 30 + i}} for i in range(1, 4)]
+    legacy.write_text(json.dumps(rows))
+    store = ProfileStore(str(tmp_path / "profiles.db"))
+    assert not store.is_migrated(str(legacy))
+    assert store.migrate_json(str(legacy)) == 3
+    assert store.is_migrated(str(legacy))
+    assert legacy.exists()
+    assert store.migrate_json(str(legacy)) == 0
+    assert store.count() == 3
+    assert store.get("p2") == rows[1]
+
+def test_migration_ignores_rows_already_present(tmp_path):
+    legacy = tmp_path / "profiles.json"
+    legacy.write_text(json.dumps([{"id": "p1", "timestamp": "t", "data": {}}]))
+    first = ProfileStore(str(tmp_path / "a.db"))
+    first.migrate_json(str(legacy))
+    second = ProfileStore(str(tmp_path / "a.db"))
+    assert second.migrate_json(str(legacy)) == 0
+    assert second.count() == 1
+
+def test_empty_legacy_file_is_marked_migrated(tmp_path):
+    legacy = tmp_path / "profiles.json"
+    legacy.write_text("")
+    store = ProfileStore(str(tmp_path / "profiles.db"))
+    assert store.migrate_json(str(legacy)) == 0
+    assert store.is_migrated(str(legacy))
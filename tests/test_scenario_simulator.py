@@ -0,0 +1,73 @@
+import numpy as np
+import pytest
+
+from modules import projection, scenario_simulator
+
+PROFILE = {
+    "age": 35,
+    "retirementAge": 65,
+    "currentSavings": 50000,
+    "income": 80000,
+    "retirementSavingsGoal": 1500000,
+}
+
+def test_zero_volatility_matches_deterministic_projection():
+    result = scenario_simulator.run_simulation(50000, 80000, 30, 1500000, volatility=0.0,
+                                               contribution_growth=0.02, n_paths=100, seed=1)
+    expected = projection.project_savings(50000, 80000, 30, contribution_growth=0.02)
+    assert not result["approximate"]
+    for band in result["final_percentiles"].values():
+        assert band == pytest.approx(float(expected), rel=1e-9)
+    assert result["mean_final_balance"] == pytest.approx(float(expected), rel=1e-9)
+    assert result["success_probability"] == (1.0 if expected >= 1500000 else 0.0)
+
+@pytest.mark.parametrize("paths", [0, -5])
+def test_simulate_rejects_non_positive_paths(paths):
+    with pytest.raises(ValueError):
+        scenario_simulator.simulate({**PROFILE, "paths": paths})
+
+def test_simulate_rejects_paths_above_limit():
+    with pytest.raises(ValueError):
+        scenario_simulator.simulate({**PROFILE, "paths": scenario_simulator.MAX_PATHS + 1})
+
+def test_run_simulation_rejects_zero_paths():
+    with pytest.raises(ValueError):
+        scenario_simulator.run_simulation(50000, 80000, 30, 1500000, n_paths=0)
+
+def test_chunked_percentiles_match_exact_zero_volatility():
+    kwargs = dict(volatility=0.0, n_paths=2500, seed=3)
+    exact = scenario_simulator.run_simulation(50000, 80000, 30, 1500000, **kwargs)
+    chunked = scenario_simulator.run_simulation(50000, 80000, 30, 1500000, chunk_size=1000, **kwargs)
+    assert chunked["approximate"] and not exact["approximate"]
+    for name, band in exact["percentiles"].items():
+        # Histogram bins are ~0.5% wide.
+        np.testing.assert_allclose(chunked["percentiles"][name][1:], band[1:], rtol=0.01)
+    assert chunked["success_probability"] == exact["success_probability"]
+
+def test_chunked_run_is_close_to_single_chunk():
+    kwargs = dict(n_paths=40000, seed=7)
+    exact = scenario_simulator.run_simulation(50000, 80000, 30, 1500000, **kwargs)
+    chunked = scenario_simulator.run_simulation(50000, 80000, 30, 1500000, chunk_size=10000, **kwargs)
+    assert chunked["n_paths"] == exact["n_paths"] == 40000
+    assert chunked["success_probability"] == pytest.approx(exact["success_probability"], abs=0.02)
+    for name in ("p25", "p50", "p75"):
+        assert chunked["final_percentiles"][name] == pytest.approx(exact["final_percentiles"][name], rel=0.03)
+
+def test_simulate_is_reproducible_with_seed():
+    first = scenario_simulator.simulate({**PROFILE, "paths": 500, "seed": 11})
+    second = scenario_simulator.simulate({**PROFILE, "paths": 500, "seed": 11})
+    assert first["final_percentiles"] == second["final_percentiles"]
+    assert first["ages"][0] == 35 and first["ages"][-1] == 65
+
+def test_run_simulation_rejects_years_above_limit():
+    with pytest.raises(ValueError):
+        scenario_simulator.run_simulation(50000, 80000, scenario_simulator.MAX_YEARS + 1, 1500000, n_paths=10)
+
+def test_simulate_rejects_far_retirement_age():
+    with pytest.raises(ValueError):
+        scenario_simulator.simulate({**PROFILE, "age": 30, "retirementAge": 100000, "paths": 10})
+
+def test_negative_years_count_as_zero():
+    result = scenario_simulator.run_simulation(50000, 80000, -5, 1500000, n_paths=10, seed=1)
+    assert result["years"] == 0
+    assert result["final_percentiles"]["p50"] == pytest.approx(50000)